@@ -16,6 +16,7 @@ logger = logging.getLogger(__name__)
 
 # Import blockchain startup functions
 from start_blockchain import check_node_modules, start_blockchain
+from off_chain.startup_orchestrator import StartupOrchestrator
 
 # Constants
 PROJECT_DIR = Path(__file__).parent
@@ -23,8 +24,9 @@ ON_CHAIN_DIR = PROJECT_DIR / "on_chain"
 OFF_CHAIN_DIR = PROJECT_DIR / "off_chain"
 
 # Global variables
-hardhat_process = None
+hardhat_supervisor = None
 application_running = False
+startup_failed = False
 
 def signal_handler(sig, frame):
     """Handle termination signals to gracefully shut down the application."""
@@ -33,13 +35,8 @@ def signal_handler(sig, frame):
     application_running = False
     
     # Stop Hardhat node if it's running
-    if hardhat_process:
-        logger.info("Stopping Hardhat node...")
-        if sys.platform == 'win32':
-            subprocess.run(f"taskkill /F /PID {hardhat_process.pid} /T", shell=True)
-        else:
-            os.killpg(os.getpgid(hardhat_process.pid), signal.SIGTERM)
-        logger.info("Hardhat node stopped")
+    if hardhat_supervisor:
+        hardhat_supervisor.close()
     
     sys.exit(0)
 
@@ -56,36 +53,53 @@ def start_application():
         application_running = True
         
         # Keep the main thread alive
-        while application_running:
+        while application_running and not startup_failed:
             time.sleep(1)
             
     except Exception as e:
         logger.error(f"Error starting application: {e}")
         sys.exit(1)
 
+def on_blockchain_complete(ok, result):
+    """Callback of the blockchain stage: keeps the supervisor, or stops the application on failure."""
+    global hardhat_supervisor, application_running, startup_failed
+    if ok:
+        hardhat_supervisor = result
+        return
+    logger.error(f"Error starting blockchain environment: {result}")
+    startup_failed = True
+    application_running = False
+
+def build_startup():
+    """Node.js dependencies -> Hardhat node and contracts, run in background while the application starts."""
+    orchestrator = StartupOrchestrator(logger=logger)
+    orchestrator.add("node_modules", check_node_modules, description="Checking Node.js dependencies...")
+    orchestrator.add("blockchain", start_blockchain, depends=["node_modules"],
+                     description="Starting blockchain environment...")
+    orchestrator.on_complete("blockchain", on_blockchain_complete)
+    return orchestrator
+
 def main():
     """Main entry point for the application."""
-    global hardhat_process
-    
     # Set up signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     try:
-        # Check for Node.js dependencies
-        check_node_modules()
-        
-        # Start Hardhat node and deploy contracts
+        # Start Hardhat node and deploy contracts in background
         logger.info("Starting blockchain environment...")
-        hardhat_process = start_blockchain()
+        build_startup().start()
         
         # Start the main application
         start_application()
         
     except Exception as e:
         logger.error(f"Error in main: {e}")
-        if hardhat_process:
-            hardhat_process.terminate()
+        if hardhat_supervisor:
+            hardhat_supervisor.close()
+        sys.exit(1)
+    
+    if startup_failed:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,26 +1,33 @@
 # Standard Library Imports
+import atexit
 import sys
-import time
 import os
-import threading
 import subprocess
-import requests
+import threading
 from pathlib import Path
-import json
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QApplication
 
 from configuration.log_load_setting import logger
+from lazy_loader import lazy_import
 
-# Import blockchain modules
+# Import blockchain modules: web3/requests e l'interactor si caricano solo quando parte il primo stage
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from on_chain.interact_contract import BlockchainInteractor
+BlockchainInteractor = lazy_import("on_chain.interact_contract", "BlockchainInteractor")
+deploy_contracts_cached = lazy_import("on_chain.deployment_cache", "deploy_contracts")
+get_supervisor = lazy_import("on_chain.hardhat_supervisor", "get_supervisor")
 
 # Global variables
 blockchain_interactor = None
+operation_anchor_service = None
+hardhat_supervisor = None
+web3_transport = None
+event_indexer = None
+co2_projection = None
+_web3_transport_lock = threading.Lock()
 HARDHAT_NODE_URL = "http://127.0.0.1:8545"
 PROJECT_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 ON_CHAIN_DIR = PROJECT_DIR / "on_chain"
+# Output del nodo Hardhat (file a rotazione, le ultime righe sono anche in hardhat_supervisor.tail())
+HARDHAT_LOG_FILE = PROJECT_DIR / "off_chain" / "log" / "hardhat_node.log"
 
 # Constants for logging
 LOG_PREFIX_HARDHAT = "[HARDHAT] "
@@ -28,137 +35,131 @@ LOG_PREFIX_ETHERS = "[ETHERS.JS] "
 
 
 def start_hardhat_node():
-    """Start the Hardhat node in a separate process."""
+    """
+    Starts the Hardhat node through the shared supervisor and waits until it is ready.
+    The node is restarted (and the contracts redeployed) if it dies, and stopped when the app exits.
+    """
+    global hardhat_supervisor
+    if hardhat_supervisor is None:
+        hardhat_supervisor = get_supervisor(node_url=HARDHAT_NODE_URL, logger=logger, log_file=HARDHAT_LOG_FILE)
+        hardhat_supervisor.on_restart(deploy_contracts_cached)
+        atexit.register(hardhat_supervisor.close)
+    if not hardhat_supervisor.start():
+        return None
+    return hardhat_supervisor
+
+
+def ensure_node_modules():
+    """Installs the Node.js dependencies of on_chain if node_modules is missing."""
+    if (ON_CHAIN_DIR / "node_modules").exists():
+        return
+    logger.info(f"{LOG_PREFIX_HARDHAT}Node modules not found. Installing dependencies...")
+    result = subprocess.run(["npm", "install"], shell=sys.platform == 'win32', cwd=str(ON_CHAIN_DIR),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"Failed to install dependencies: {result.stderr}")
+    logger.info(f"{LOG_PREFIX_HARDHAT}Dependencies installed successfully")
+
+
+def deploy_contracts():
+    """Deploy the contracts missing on the node or changed since the last deployment."""
+    # Deploy contracts using Hardhat script, only when the manifest says it is needed
+    result = deploy_contracts_cached(HARDHAT_NODE_URL)
+    if result is None:
+        logger.info(f"{LOG_PREFIX_ETHERS}Contracts already deployed, deployment skipped")
+        return True
+
+    if result.returncode != 0:
+        raise Exception(f"Contract deployment failed: {result.stderr}")
+
+    logger.info(f"{LOG_PREFIX_ETHERS}Contracts deployed successfully")
+    # Log the output but filter out any Docker/Ganache references
+    for line in result.stdout.splitlines():
+        if not any(term in line.lower() for term in ["docker", "ganache"]):
+            logger.info(f"{LOG_PREFIX_ETHERS}{line}")
+    return True
+
+
+def init_blockchain_interactor():
+    """Creates the shared BlockchainInteractor."""
+    global blockchain_interactor
+    blockchain_interactor = BlockchainInteractor()
+    logger.info(f"{LOG_PREFIX_ETHERS}Blockchain interactor initialized successfully")
+    return blockchain_interactor
+
+
+def get_web3_transport():
+    """Web3Transport shared by the operation anchoring and the event indexing."""
+    global web3_transport
+    with _web3_transport_lock:
+        if web3_transport is None:
+            from on_chain.web3_transport import Web3Transport
+            web3_transport = Web3Transport(HARDHAT_NODE_URL)
+        return web3_transport
+
+
+def start_operation_anchoring():
+    """Starts the Merkle anchoring of the operations; the app keeps working without it."""
+    global operation_anchor_service
     try:
-        logger.info(f"{LOG_PREFIX_HARDHAT}Starting Hardhat node...")
-        # Use shell=True on Windows to avoid console window popup
-        shell_param = True if sys.platform == 'win32' else False
-        
-        # Start the Hardhat node
-        node_process = subprocess.Popen(
-            "npx hardhat node",
-            shell=shell_param,
-            cwd=str(ON_CHAIN_DIR),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node process started")
-        return node_process
+        from on_chain.merkle_anchor import OperationAnchorService
+        from persistence.repository_impl.anchor_repository_impl import AnchorRepositoryImpl
+
+        operation_anchor_service = OperationAnchorService(get_web3_transport(), AnchorRepositoryImpl(),
+                                                          logger=logger)
+        operation_anchor_service.start()
+        logger.info(f"{LOG_PREFIX_HARDHAT}Operation anchoring started")
     except Exception as e:
-        logger.error(f"{LOG_PREFIX_HARDHAT}Error starting Hardhat node: {e}")
-        return None
+        operation_anchor_service = None
+        logger.warning(f"{LOG_PREFIX_HARDHAT}Operation anchoring not available: {e}")
+    return operation_anchor_service
 
 
-def wait_for_hardhat(max_attempts=30, delay=1):
-    """Wait for Hardhat node to be available."""
-    logger.info(f"{LOG_PREFIX_HARDHAT}Waiting for Hardhat node to be ready...")
-    
-    for attempt in range(max_attempts):
-        try:
-            response = requests.post(
-                HARDHAT_NODE_URL,
-                json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                timeout=2
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node is ready (attempt {attempt + 1}/{max_attempts})")
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        
-        logger.info(f"{LOG_PREFIX_HARDHAT}Waiting for Hardhat node... ({attempt + 1}/{max_attempts})")
-        time.sleep(delay)
-    
-    logger.error(f"{LOG_PREFIX_HARDHAT}Hardhat node did not start after {max_attempts} attempts")
-    return False
-
-
-class BlockchainSetupThread(threading.Thread):
-    def __init__(self, splash_screen=None):
-        super().__init__()
-        self.splash_screen = splash_screen
-        self.success = False
-        self.error_message = None
-        self.blockchain_interactor = None
-        self._w3 = None
-
-    def update_splash_message(self, message):
-        if self.splash_screen:
-            self.splash_screen.showMessage(message, Qt.AlignBottom | Qt.AlignHCenter, Qt.white)
-            QApplication.processEvents()
-
-    def run(self):
-        global blockchain_interactor
-        try:
-            self.update_splash_message("Starting Hardhat blockchain environment...")
-            self.hardhat_process = start_hardhat_node()
-            if not self.hardhat_process:
-                raise Exception("Failed to start Hardhat node")
-
-            self.update_splash_message("Waiting for Hardhat node to be ready...")
-            if not wait_for_hardhat(max_attempts=30):
-                raise Exception("Failed to connect to Hardhat node")
-
-            self.update_splash_message("Deploying smart contracts with ethers.js...")
-            if self._deploy_contracts():
-                self.update_splash_message("Initializing blockchain interactor with ethers.js...")
-                blockchain_interactor = BlockchainInteractor()
-                self.success = True
-                logger.info(f"{LOG_PREFIX_ETHERS}Blockchain interactor initialized successfully")
-            else:
-                raise Exception(self.error_message)
-
-        except Exception as e:
-            self.error_message = str(e)
-            logger.error(f"Blockchain setup error: {e}")
-            self.success = False
-
-    def _deploy_contracts(self) -> bool:
-        """Deploy contracts using Hardhat script."""
-        try:
-            contract_file = Path(__file__).resolve().parent.parent / "on_chain" / "contract_addresses.json"
-
-            # Backup existing contract addresses if they exist
-            if contract_file.exists():
-                self.update_splash_message("Backing up existing contract addresses...")
-                backup_timestamp = time.strftime("%Y%m%d_%H%M%S")
-                backup_file = contract_file.with_name(f"contract_addresses_backup_{backup_timestamp}.json")
-                try:
-                    import shutil
-                    shutil.copy2(contract_file, backup_file)
-                    logger.info(f"Backed up contract addresses to {backup_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to backup contract addresses: {e}")
-
-            # Deploy contracts using Hardhat script
-            self.update_splash_message("Deploying contracts with Hardhat and ethers.js...")
-            result = subprocess.run(
-                "npx hardhat run scripts/deploy.js --network localhost",
-                shell=True,
-                cwd=str(ON_CHAIN_DIR),
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                self.error_message = f"Contract deployment failed: {result.stderr}"
-                logger.error(f"{LOG_PREFIX_ETHERS}{self.error_message}")
-                return False
-                
-            logger.info(f"{LOG_PREFIX_ETHERS}Contracts deployed successfully")
-            # Log the output but filter out any Docker/Ganache references
-            for line in result.stdout.splitlines():
-                if not any(term in line.lower() for term in ["docker", "ganache"]):
-                    logger.info(f"{LOG_PREFIX_ETHERS}{line}")
-
-            return True
-                
-        except Exception as e:
-            self.error_message = f"Error deploying contracts: {e}"
-            logger.error(self.error_message)
-            return False
+def start_event_indexing():
+    """
+    Starts indexing the events of all the contracts in contract_addresses.json, with the
+    SupplyChainCO2 mirror attached; the app keeps working without it.
+    """
+    global event_indexer, co2_projection
+    try:
+        from on_chain.co2_projection import SupplyChainCO2Projection
 
-        return True
+        indexer = get_web3_transport().event_indexer(logger=logger)
+        try:
+            co2_projection = SupplyChainCO2Projection(indexer)
+        except Exception:
+            indexer.close()
+            raise
+        indexer.start()
+        atexit.register(indexer.close)
+        event_indexer = indexer
+        logger.info(f"{LOG_PREFIX_HARDHAT}Event indexing started from block {indexer.checkpoint + 1}")
+    except Exception as e:
+        event_indexer = co2_projection = None
+        logger.warning(f"{LOG_PREFIX_HARDHAT}Event indexing not available: {e}")
+    return event_indexer
+
+
+def _start_hardhat_stage():
+    if not start_hardhat_node():
+        raise Exception("Failed to start Hardhat node")
+
+
+def register_blockchain_stages(orchestrator, database_stage: str = "database"):
+    """
+    Adds the blockchain stages to a StartupOrchestrator:
+    node_modules -> hardhat -> contracts -> blockchain -> anchoring (the last one also after database_stage),
+    and contracts -> indexing.
+    """
+    orchestrator.add("node_modules", ensure_node_modules, description="Checking Node.js dependencies...")
+    orchestrator.add("hardhat", _start_hardhat_stage, depends=["node_modules"],
+                     description="Starting Hardhat blockchain environment...")
+    orchestrator.add("contracts", deploy_contracts, depends=["hardhat"],
+                     description="Deploying smart contracts with ethers.js...")
+    orchestrator.add("blockchain", init_blockchain_interactor, depends=["contracts"],
+                     description="Initializing blockchain interactor with ethers.js...")
+    anchoring_depends = ["blockchain"] + ([database_stage] if database_stage in orchestrator else [])
+    orchestrator.add("anchoring", start_operation_anchoring, depends=anchoring_depends,
+                     description="Starting operation anchoring...")
+    orchestrator.add("indexing", start_event_indexing, depends=["contracts"],
+                     description="Starting contract event indexing...")
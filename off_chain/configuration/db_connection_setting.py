@@ -1,53 +1,144 @@
 import atexit
 import sqlite3
 import os
+import threading
 
-from configuration.db_load_setting import DATABASE_PATH
+from configuration.db_load_setting import DATABASE_PATH, configDatabase
 from configuration.log_load_setting import logger
 
 
 class DatabaseConnectionSetting:
     """
-    Singleton class to handle SQLite3 database connections
+    Bounded pool of SQLite3 connections, one per thread.
+    Connections are opened with the storage profile of db_setting.yaml (WAL by default),
+    so readers run concurrently while a single writer commits.
     """
 
-    _connection = None  # variable to store the connection
+    _pool_config = configDatabase.get("pool", {})
+    MAX_CONNECTIONS = int(_pool_config.get("max_connections", 8))
+    ACQUIRE_TIMEOUT = float(_pool_config.get("acquire_timeout", 30))
+    BUSY_TIMEOUT = float(_pool_config.get("busy_timeout", 5))
+
+    # Storage profile: PRAGMA applied to every new connection
+    STORAGE_PROFILE = configDatabase.get("storage_profile", {"journal_mode": "WAL"})
+    _VALORI_PRAGMA = {
+        "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+        "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+        "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+    }
+    _PRAGMA_NUMERICI = {"mmap_size", "cache_size"}
+
+    _local = threading.local()  # connection of the current thread
+    _slots = threading.BoundedSemaphore(MAX_CONNECTIONS)
+    _registry = {}  # thread ident -> (thread, connection)
+    _registry_lock = threading.Lock()
+
+    # Un solo writer alla volta nel processo: le transazioni di scrittura lo acquisiscono
+    write_lock = threading.RLock()
 
     @staticmethod
-    def get_connection():
+    def _open_connection():
+        """
+        Opens a new connection for the current thread.
+        """
+        try:
+            connection = sqlite3.connect(DATABASE_PATH, timeout=DatabaseConnectionSetting.BUSY_TIMEOUT,
+                                         check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            DatabaseConnectionSetting._apply_storage_profile(connection)
+            logger.info("BackEnd: get_connection: Name database is: %s", os.path.basename(DATABASE_PATH))
+            logger.info("BackEnd: get_connection: Path for the database is: %s", DATABASE_PATH)
+            logger.info("BackEnd: get_connection: The database connection was created successfully for thread %s.",
+                        threading.current_thread().name)
+            return connection
+        except sqlite3.ProgrammingError as e:
+            logger.error(f"Cannot operate on a closed database: {e}")
+            raise Exception(f"Cannot operate on a closed database: {e}")
+        except sqlite3.DatabaseError as e:
+            logger.error(f"File is encrypted or is not a database: {e}")
+            raise Exception(f"File is encrypted or is not a database: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected Error: {e}")
+            raise Exception(f"Unexpected Error: {e}")
 
+    @staticmethod
+    def _apply_storage_profile(connection):
+        """
+        Applies the PRAGMA of the storage profile, rejecting unknown names or values.
+        """
+        for pragma, valore in DatabaseConnectionSetting.STORAGE_PROFILE.items():
+            if pragma in DatabaseConnectionSetting._PRAGMA_NUMERICI:
+                valore = int(valore)
+            elif str(valore).upper() in DatabaseConnectionSetting._VALORI_PRAGMA.get(pragma, ()):
+                valore = str(valore).upper()
+            else:
+                raise Exception(f"Invalid storage profile setting: {pragma} = {valore}")
+            connection.execute(f"PRAGMA {pragma}={valore};")
+
+    @staticmethod
+    def _release_dead_threads():
+        """
+        Closes the connections owned by threads that have terminated and frees their slots.
         """
-        Returns a single instance of the database connection.
-        """
-        if DatabaseConnectionSetting._connection is None:
-            try:
-                DatabaseConnectionSetting._connection = sqlite3.connect(DATABASE_PATH)
-                logger.info(f"BackEnd: get_connection: Name database is: {os.path.basename(DATABASE_PATH)}")
-                logger.info(f"BackEnd: get_connection: Path for the database is: {DATABASE_PATH}")
-                DatabaseConnectionSetting._connection.row_factory = sqlite3.Row
-                logger.info("BackEnd: get_connection: The database connection was created successfully.")
-            except sqlite3.ProgrammingError as e:
-                logger.error(f"Cannot operate on a closed database: {e}")
-                raise Exception(f"Cannot operate on a closed database: {e}")
-            except sqlite3.DatabaseError as e:
-                logger.error(f"File is encrypted or is not a database: {e}")
-                raise Exception(f"File is encrypted or is not a database: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected Error: {e}")
-                raise Exception(f"Unexpected Error: {e}")
-
-        logger.info(f"BackEnd: get_connection: The database connection instance is: {DatabaseConnectionSetting._connection}")
-        return DatabaseConnectionSetting._connection  # Retorna la conexión única
+        with DatabaseConnectionSetting._registry_lock:
+            dead = [ident for ident, (thread, _) in DatabaseConnectionSetting._registry.items()
+                    if not thread.is_alive()]
+            for ident in dead:
+                _, connection = DatabaseConnectionSetting._registry.pop(ident)
+                connection.close()
+                DatabaseConnectionSetting._slots.release()
+                logger.info("BackEnd: get_connection: Released connection of terminated thread %s.", ident)
+
+    @staticmethod
+    def get_connection():
+        """
+        Returns the connection of the calling thread, opening it if needed.
+        """
+        connection = getattr(DatabaseConnectionSetting._local, "connection", None)
+        if connection is not None:
+            return connection
+
+        DatabaseConnectionSetting._release_dead_threads()
+        if not DatabaseConnectionSetting._slots.acquire(timeout=DatabaseConnectionSetting.ACQUIRE_TIMEOUT):
+            logger.error("Connection pool exhausted: no connection available.")
+            raise Exception(f"Connection pool exhausted: {DatabaseConnectionSetting.MAX_CONNECTIONS} "
+                            f"connections already in use.")
+        try:
+            connection = DatabaseConnectionSetting._open_connection()
+        except Exception:
+            DatabaseConnectionSetting._slots.release()
+            raise
+
+        DatabaseConnectionSetting._local.connection = connection
+        with DatabaseConnectionSetting._registry_lock:
+            DatabaseConnectionSetting._registry[threading.get_ident()] = (threading.current_thread(), connection)
+        return connection
 
     @staticmethod
     def close_connection():
         """
-        Closes the database connection if it exists.
+        Closes the connection of the calling thread if it exists.
         """
-        if DatabaseConnectionSetting._connection:
+        connection = getattr(DatabaseConnectionSetting._local, "connection", None)
+        if connection:
             logger.info("BackEnd: Closing database .....")
-            DatabaseConnectionSetting._connection.close()
-            DatabaseConnectionSetting._connection = None
+            with DatabaseConnectionSetting._registry_lock:
+                DatabaseConnectionSetting._registry.pop(threading.get_ident(), None)
+            connection.close()
+            DatabaseConnectionSetting._local.connection = None
+            DatabaseConnectionSetting._slots.release()
+
+    @staticmethod
+    def close_all_connections():
+        """
+        Closes every pooled connection, whichever thread owns it.
+        """
+        with DatabaseConnectionSetting._registry_lock:
+            for _, connection in DatabaseConnectionSetting._registry.values():
+                connection.close()
+                DatabaseConnectionSetting._slots.release()
+            DatabaseConnectionSetting._registry.clear()
+        DatabaseConnectionSetting._local = threading.local()
 
 # Register connection close at the end of the program execution
 # atexit.register(DatabaseConnectionSetting.close_connection)
@@ -0,0 +1,120 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from configuration.db_connection_setting import DatabaseConnectionSetting
+from configuration.db_load_setting import configDatabase
+from configuration.log_load_setting import logger, query_logger
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread that coalesces the writes submitted within a short window into one transaction.
+    Each unit of work runs inside its own SAVEPOINT: a failing unit is rolled back alone
+    and only its caller receives the error, the others are committed together.
+    """
+
+    _group_commit_config = configDatabase.get("group_commit", {})
+    ENABLED = bool(_group_commit_config.get("enabled", False))
+    WINDOW = float(_group_commit_config.get("window_ms", 5)) / 1000
+    MAX_BATCH = int(_group_commit_config.get("max_batch", 64))
+
+    # Class variable that stores the single instance
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super(GroupCommitWriter, cls).__new__(cls)
+                cls._instance._queue = queue.Queue()
+                cls._instance._thread = threading.Thread(target=cls._instance._run, name="GroupCommitWriter",
+                                                         daemon=True)
+                cls._instance._thread.start()
+                atexit.register(cls._instance.stop)
+                logger.info("BackEnd: Successfully initializing the instance for GroupCommitWriter.")
+        return cls._instance
+
+    def submit(self, work) -> Future:
+        """
+        Queues a unit of work, a callable receiving the writer cursor, and returns its Future.
+        """
+        future = Future()
+        self._queue.put((work, future))
+        return future
+
+    def execute(self, work):
+        """
+        Runs a unit of work in the next group and waits until it is committed.
+        Returns the value of the unit or raises its own error.
+        """
+        return self.submit(work).result()
+
+    def stop(self):
+        """
+        Commits the units still queued and stops the writer thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        attivo = True
+        while attivo:
+            elemento = self._queue.get()
+            if elemento is None:
+                break
+            gruppo = [elemento]
+            scadenza = time.monotonic() + self.WINDOW
+            while len(gruppo) < self.MAX_BATCH:
+                attesa = scadenza - time.monotonic()
+                if attesa <= 0:
+                    break
+                try:
+                    elemento = self._queue.get(timeout=attesa)
+                except queue.Empty:
+                    break
+                if elemento is None:
+                    attivo = False
+                    break
+                gruppo.append(elemento)
+            self._commit_gruppo(gruppo)
+        DatabaseConnectionSetting.close_connection()
+
+    def _commit_gruppo(self, gruppo: list):
+        """
+        Executes a group of units in one transaction and resolves their futures after the commit.
+        """
+        completati = []
+        with DatabaseConnectionSetting.write_lock:
+            conn = DatabaseConnectionSetting.get_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN TRANSACTION;")
+                for work, future in gruppo:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cursor.execute("SAVEPOINT unita;")
+                    try:
+                        risultato = work(cursor)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO unita;")
+                        cursor.execute("RELEASE unita;")
+                        future.set_exception(e)
+                        continue
+                    cursor.execute("RELEASE unita;")
+                    completati.append((future, risultato))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"BackEnd: GroupCommitWriter: Group of {len(gruppo)} writes rolled back: {e}")
+                for _, future in gruppo:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        query_logger.debug("BackEnd: GroupCommitWriter: Committed %d writes in one transaction.", len(completati))
+        for future, risultato in completati:
+            future.set_result(risultato)
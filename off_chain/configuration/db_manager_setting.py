@@ -1,7 +1,11 @@
 import sqlite3
+import threading
+import time
 
 from configuration.db_connection_setting import DatabaseConnectionSetting
-from configuration.log_load_setting import logger
+from configuration.db_group_commit_setting import GroupCommitWriter
+from configuration.db_query_stats_setting import QueryStatsSetting
+from configuration.log_load_setting import logger, query_logger
 
 
 class DatabaseManagerSetting:
@@ -16,20 +20,49 @@ class DatabaseManagerSetting:
     """
 
     def __init__(self):
-        self.conn = DatabaseConnectionSetting.get_connection()
+        self._local = threading.local()  # cursor of each thread on its own pooled connection
+        # Statistiche delle query, None se disattivate in db_setting.yaml
+        self.query_stats = QueryStatsSetting() if QueryStatsSetting.ENABLED else None
         logger.info("BackEnd: DatabaseManagerSetting: DatabaseManagerSetting constructor.")
-        self.cursor = self.conn.cursor()
+
+    @property
+    def conn(self):
+        """
+        Connection of the calling thread, taken from the pool.
+        """
+        return DatabaseConnectionSetting.get_connection()
+
+    @property
+    def cursor(self):
+        """
+        Cursor of the calling thread, reopened if its connection has changed.
+        """
+        conn = self.conn
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None or cursor.connection is not conn:
+            cursor = conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def _traccia(self, cursor):
+        """
+        Returns the cursor wrapped by the query statistics, or the cursor itself if they are disabled.
+        """
+        return self.query_stats.cursore(cursor) if self.query_stats else cursor
 
     def fetch_one(self, query, params=()):
         """
         Executes a SELECT query and returns a single result.
         """
         try:
+            inizio = time.perf_counter()
             self.cursor.execute(query, params)
             result = self.cursor.fetchone()
+            if self.query_stats:
+                self.query_stats.registra(query, time.perf_counter() - inizio, 1 if result else 0, self.conn, params)
             result_tuple = tuple(result) if result else None  # Convertir Row a tupla
-            logger.info(
-                f"BackEnd: fetch_one: Info executing query: {query} with params: {params} | Results: {len(result_tuple)}")
+            query_logger.debug("BackEnd: fetch_one: Info executing query: %s with params: %s | Results: %d",
+                               query, params, 0 if result_tuple is None else len(result_tuple))
             # conn.close()
             return result_tuple
         except Exception as e:
@@ -40,10 +73,14 @@ class DatabaseManagerSetting:
         Executes a SELECT query and returns multiple results.
         """
         try:
+            inizio = time.perf_counter()
             results = self.cursor.execute(query, params)
             results_precise = [tuple(row) for row in results.fetchall()]
-            logger.info(
-                f"BackEnd: fetch_query: Info executing query: {query} with params: {params} | Results: {len(results_precise)}")
+            if self.query_stats:
+                self.query_stats.registra(query, time.perf_counter() - inizio, len(results_precise), self.conn,
+                                          params)
+            query_logger.debug("BackEnd: fetch_query: Info executing query: %s with params: %s | Results: %d",
+                               query, params, len(results_precise))
             # conn.close()
             return results_precise if results_precise else []
         except Exception as e:
@@ -51,6 +88,16 @@ class DatabaseManagerSetting:
                          stacklevel=2, extra={'query': query, 'params': params})
             raise Exception(f"Error executing SELECT query: {e}")
 
+    def fetch_page(self, query, params=(), limit=None, offset=0):
+        """
+        Executes a SELECT query returning only the page of rows [offset, offset + limit).
+        The query must have a deterministic ORDER BY; without limit every row is returned.
+        """
+        if limit is None:
+            return self.fetch_query(query, params)
+        query = query.rstrip().rstrip(";") + "\n        LIMIT ? OFFSET ?;"
+        return self.fetch_query(query, tuple(params) + (int(limit), int(offset)))
+
     def execute_query(self, query, params=(), multiple=False):
         """
         Executes an INSERT, UPDATE, or DELETE query.
@@ -60,35 +107,95 @@ class DatabaseManagerSetting:
         - query: SQL query to execute.
         - params: Tuple or list of tuples (if multiple=True) for parameterized queries.
         - multiple: If True, executes multiple queries using executemany().
+
+        Returns the lastrowid of the statement (of the last row with executemany()).
+        With group_commit enabled, single statements are committed by the GroupCommitWriter.
         """
 
+        if not multiple and GroupCommitWriter.ENABLED:
+            query_logger.debug("Info executing query(execute_query, group commit): %s with params: %s", query, params)
+            return self._execute_group_commit(lambda cursor: self._traccia(cursor).execute(query, params).lastrowid)
+
+        with DatabaseConnectionSetting.write_lock:
+            try:
+                # conn = DatabaseConnectionSetting.get_connection()
+                # cursor = conn.cursor()
+                # Begin transaction
+                self.cursor.execute("BEGIN TRANSACTION;")
+
+                if multiple:
+                    query_logger.debug("BackEnd: execute_query: Info executing query: %s with params: %s",
+                                       query, params)
+                    self._traccia(self.cursor).executemany(query, params)  # Execute multiple queries
+                else:
+                    query_logger.debug("Info executing query(execute_query): %s with params: %s", query, params)
+                    self._traccia(self.cursor).execute(query, params)  # Execute single query
+
+                self.conn.commit()  # Commit changes
+                return self.cursor.lastrowid
+
+            except sqlite3.IntegrityError as e:
+                self.conn.rollback()  # Deshacer cambios en caso de violación de integridad
+                logger.error(f"Database integrity error: {e}")
+                raise Exception(f"Database integrity error: {e}")
+
+            except sqlite3.OperationalError as e:
+                self.conn.rollback()  # Deshacer cambios en caso de error de operación
+                logger.error(f"Database operational error: {e}")
+                raise Exception(f"Database operational error: {e}")
+
+            except Exception as e:
+                self.conn.rollback()  # Deshacer cambios en caso de error desconocido
+                logger.error(f"Database unexpected error: {e}")
+                raise Exception(f"Database unexpected error: {e}")
+
+    def execute_unit_of_work(self, work):
+        """
+        Executes a unit of work, a callable receiving the cursor, in one transaction with one commit.
+        Every statement of the unit is rolled back if any of them fails.
+        Returns the value returned by the unit (e.g. a lastrowid read inside the transaction).
+        """
+        query_logger.debug("BackEnd: execute_unit_of_work: Info executing unit of work: %s",
+                           getattr(work, '__qualname__', work))
+        if GroupCommitWriter.ENABLED:
+            return self._execute_group_commit(lambda cursor: work(self._traccia(cursor)))
+
+        with DatabaseConnectionSetting.write_lock:
+            try:
+                self.cursor.execute("BEGIN TRANSACTION;")
+                risultato = work(self._traccia(self.cursor))
+                self.conn.commit()
+                return risultato
+
+            except sqlite3.IntegrityError as e:
+                self.conn.rollback()
+                logger.error(f"Database integrity error: {e}")
+                raise Exception(f"Database integrity error: {e}")
+
+            except sqlite3.OperationalError as e:
+                self.conn.rollback()
+                logger.error(f"Database operational error: {e}")
+                raise Exception(f"Database operational error: {e}")
+
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"Database unexpected error: {e}")
+                raise Exception(f"Database unexpected error: {e}")
+
+    def _execute_group_commit(self, work):
+        """
+        Executes a unit of work through the GroupCommitWriter, waiting for its commit.
+        The unit runs in its own savepoint, so its errors are reported only to this caller.
+        """
         try:
-            # conn = DatabaseConnectionSetting.get_connection()
-            # cursor = conn.cursor()
-            # Begin transaction
-            self.cursor.execute("BEGIN TRANSACTION;")
-
-            if multiple:
-                logger.info(f"BackEnd: execute_query: Info executing query: {query} with params: {params}")
-                self.cursor.executemany(query, params)  # Execute multiple queries
-            else:
-                logger.info(f"Info executing query(execute_query): {query} with params: {params}")
-                self.cursor.execute(query, params)  # Execute single query
-
-            self.conn.commit()  # Commit changes
-
+            return GroupCommitWriter().execute(work)
         except sqlite3.IntegrityError as e:
-            self.conn.rollback()  # Deshacer cambios en caso de violación de integridad
             logger.error(f"Database integrity error: {e}")
             raise Exception(f"Database integrity error: {e}")
-
         except sqlite3.OperationalError as e:
-            self.conn.rollback()  # Deshacer cambios en caso de error de operación
             logger.error(f"Database operational error: {e}")
             raise Exception(f"Database operational error: {e}")
-
         except Exception as e:
-            self.conn.rollback()  # Deshacer cambios en caso de error desconocido
             logger.error(f"Database unexpected error: {e}")
             raise Exception(f"Database unexpected error: {e}")
 
@@ -100,21 +207,23 @@ class DatabaseManagerSetting:
         - queries: List of tuples containing (query, params).
         """
 
-        try:
-            # conn = DatabaseConnectionSetting.get_connection()
-            # cursor = conn.cursor()
+        with DatabaseConnectionSetting.write_lock:
+            try:
+                # conn = DatabaseConnectionSetting.get_connection()
+                # cursor = conn.cursor()
 
-            # Begin transaction
-            self.cursor.execute("BEGIN TRANSACTION;")
+                # Begin transaction
+                self.cursor.execute("BEGIN TRANSACTION;")
 
-            for query, params in queries:
-                logger.info(f"BackEnd: execute_transaction: Info executing query: {query} with params: {params}")
-                self.cursor.execute(query, params)
+                for query, params in queries:
+                    query_logger.debug("BackEnd: execute_transaction: Info executing query: %s with params: %s",
+                                       query, params)
+                    self._traccia(self.cursor).execute(query, params)
 
-            self.conn.commit()  # Commit all changes
-        except Exception as e:
-            self.conn.rollback()  # Rollback on error
-            raise Exception(f"Transaction error: {e}")
+                self.conn.commit()  # Commit all changes
+            except Exception as e:
+                self.conn.rollback()  # Rollback on error
+                raise Exception(f"Transaction error: {e}")
 
     def execute_bd_migrations(self, queries):
         """
@@ -123,19 +232,20 @@ class DatabaseManagerSetting:
         Parameters:
         - queries: List of tuples containing (query, params).
         """
-        try:
-            # conn = DatabaseConnectionSetting.get_connection()
-            # cursor = conn.cursor()
-
-            # Begin transaction
-            self.cursor.execute("BEGIN TRANSACTION;")
-
-            for query, params in queries:
-                # logger.info(f"BackEnd: execute_bd_migrations: Executing migration, the query executed was: {query}")
-
-                self.cursor.execute(query, params)
-            logger.info(f"BackEnd: execute_bd_migrations: Executing migration ...")
-            self.conn.commit()  # Commit all changes
-        except Exception as e:
-            self.conn.rollback()  # Rollback on error
-            raise Exception(f"Transaction error: {e}")
+        with DatabaseConnectionSetting.write_lock:
+            try:
+                # conn = DatabaseConnectionSetting.get_connection()
+                # cursor = conn.cursor()
+
+                # Begin transaction
+                self.cursor.execute("BEGIN TRANSACTION;")
+
+                for query, params in queries:
+                    # logger.info(f"BackEnd: execute_bd_migrations: Executing migration, the query executed was: {query}")
+
+                    self.cursor.execute(query, params)
+                logger.info(f"BackEnd: execute_bd_migrations: Executing migration ...")
+                self.conn.commit()  # Commit all changes
+            except Exception as e:
+                self.conn.rollback()  # Rollback on error
+                raise Exception(f"Transaction error: {e}")
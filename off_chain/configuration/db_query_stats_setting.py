@@ -0,0 +1,232 @@
+import atexit
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from configuration.db_load_setting import configDatabase
+from configuration.log_load_setting import logger
+
+# Limiti superiori (ms) dei bucket dell'istogramma delle latenze: progressione geometrica da 10 us a ~1 min
+_LIMITI_BUCKET_MS = [0.01 * 1.25 ** k for k in range(71)]
+
+_COMMENTI = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGHE = re.compile(r"'(?:[^']|'')*'")
+_NUMERI = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTE_PARAMETRI = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPAZI = re.compile(r"\s+")
+_CONTROLLO_TRANSAZIONE = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "EXPLAIN")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """
+    Normalizes a statement: no comments, literals replaced by ?, IN lists of any length folded to (?+).
+    """
+    testo = _COMMENTI.sub(" ", query)
+    testo = _STRINGHE.sub("?", testo)
+    testo = _NUMERI.sub("?", testo)
+    testo = _LISTE_PARAMETRI.sub("(?+)", testo)
+    return _SPAZI.sub(" ", testo).strip().rstrip(";").strip()
+
+
+class _Statistica:
+    """
+    Counters and latency histogram of one fingerprint.
+    """
+    __slots__ = ("chiamate", "totale_ms", "massimo_ms", "righe", "bucket")
+
+    def __init__(self):
+        self.chiamate = 0
+        self.totale_ms = 0.0
+        self.massimo_ms = 0.0
+        self.righe = 0
+        self.bucket = [0] * (len(_LIMITI_BUCKET_MS) + 1)
+
+    def aggiungi(self, durata_ms: float, righe: int):
+        self.chiamate += 1
+        self.totale_ms += durata_ms
+        self.righe += righe
+        if durata_ms > self.massimo_ms:
+            self.massimo_ms = durata_ms
+        self.bucket[bisect.bisect_left(_LIMITI_BUCKET_MS, durata_ms)] += 1
+
+    def percentile(self, p: float) -> float:
+        """
+        Upper bound (ms) of the histogram bucket holding the p-th percentile, capped at the maximum.
+        """
+        soglia = p / 100 * self.chiamate
+        cumulato = 0
+        for i, conteggio in enumerate(self.bucket):
+            cumulato += conteggio
+            if conteggio and cumulato >= soglia:
+                limite = _LIMITI_BUCKET_MS[i] if i < len(_LIMITI_BUCKET_MS) else self.massimo_ms
+                return round(min(limite, self.massimo_ms), 3)
+        return 0.0
+
+    def to_dict(self, query: str) -> dict:
+        return {
+            "query": query,
+            "calls": self.chiamate,
+            "total_ms": round(self.totale_ms, 3),
+            "mean_ms": round(self.totale_ms / self.chiamate, 3) if self.chiamate else 0.0,
+            "max_ms": round(self.massimo_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "rows": self.righe,
+        }
+
+
+class QueryStatsSetting:
+    """
+    Per-statement instrumentation of DatabaseManagerSetting: every statement is grouped by fingerprint
+    with call count, rows, and a p50/p95/p99 latency histogram. Statements slower than slow_query_ms
+    are kept in a bounded journal together with their EXPLAIN QUERY PLAN.
+    Parameters are never stored, they may contain credentials.
+    """
+
+    _stats_config = configDatabase.get("query_stats", {})
+    ENABLED = bool(_stats_config.get("enabled", False))
+    SLOW_QUERY_MS = float(_stats_config.get("slow_query_ms", 50))
+    SLOW_JOURNAL_SIZE = int(_stats_config.get("slow_journal_size", 200))
+    REPORT_PATH = _stats_config.get("report_path") or None
+
+    # Class variable that stores the single instance
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super(QueryStatsSetting, cls).__new__(cls)
+                cls._instance._lock = threading.Lock()
+                cls._instance._statistiche = {}
+                cls._instance._piani = {}
+                cls._instance._lente = deque(maxlen=cls.SLOW_JOURNAL_SIZE)
+                if cls.REPORT_PATH:
+                    atexit.register(cls._instance.dump_report)
+                logger.info("BackEnd: Successfully initializing the instance for QueryStatsSetting.")
+        return cls._instance
+
+    def registra(self, query: str, durata: float, righe: int = 0, connection=None, params=None):
+        """
+        Records one execution of a statement, durata in seconds.
+        """
+        chiave = fingerprint(query)
+        durata_ms = durata * 1000
+        with self._lock:
+            statistica = self._statistiche.get(chiave)
+            if statistica is None:
+                statistica = self._statistiche[chiave] = _Statistica()
+            statistica.aggiungi(durata_ms, righe)
+            if durata_ms < self.SLOW_QUERY_MS:
+                return
+            serve_piano = chiave not in self._piani
+
+        piano = self._piani.get(chiave)
+        if serve_piano:
+            piano = self._explain(query, connection, params)
+            with self._lock:
+                self._piani[chiave] = piano
+        with self._lock:
+            self._lente.append({"query": chiave, "ms": round(durata_ms, 3), "rows": righe,
+                                "at": time.strftime("%Y-%m-%d %H:%M:%S"), "plan": piano})
+        logger.warning("BackEnd: QueryStatsSetting: Slow query (%.1f ms): %s", durata_ms, chiave)
+
+    @staticmethod
+    def _explain(query: str, connection, params):
+        """
+        Returns the EXPLAIN QUERY PLAN of a statement on its own connection, or None if not available.
+        """
+        if connection is None or params is None or query.lstrip().upper().startswith(_CONTROLLO_TRANSAZIONE):
+            return None
+        try:
+            # Cursore separato: il risultato della query originale non viene toccato
+            return [riga[3] for riga in connection.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()]
+        except Exception as e:
+            logger.warning("BackEnd: QueryStatsSetting: Unable to explain slow query: %s", e)
+            return None
+
+    def cursore(self, cursor):
+        """
+        Wraps a cursor so that the statements executed through it are recorded.
+        """
+        return CursoreCronometrato(cursor, self)
+
+    def snapshot(self) -> list:
+        """
+        Returns the statistics of every fingerprint, slowest in total first.
+        """
+        with self._lock:
+            righe = [statistica.to_dict(query) for query, statistica in self._statistiche.items()]
+        return sorted(righe, key=lambda riga: riga["total_ms"], reverse=True)
+
+    def slow_queries(self) -> list:
+        with self._lock:
+            return list(self._lente)
+
+    def reset(self):
+        with self._lock:
+            self._statistiche.clear()
+            self._piani.clear()
+            self._lente.clear()
+
+    def dump_report(self, percorso: str = None) -> str:
+        """
+        Writes statistics and slow query journal to a JSON file and returns its path.
+        A relative path is resolved from the off_chain folder.
+        """
+        percorso = percorso or self.REPORT_PATH
+        if not percorso:
+            return None
+        if not os.path.isabs(percorso):
+            percorso = os.path.join(os.path.dirname(__file__), "..", percorso)
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "slow_query_ms": self.SLOW_QUERY_MS,
+            "statements": self.snapshot(),
+            "slow_queries": self.slow_queries(),
+        }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(percorso)), exist_ok=True)
+            with open(percorso, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+        except OSError as e:
+            logger.error(f"BackEnd: QueryStatsSetting: Unable to write the query report: {e}")
+            return None
+        return percorso
+
+
+class CursoreCronometrato:
+    """
+    Cursor proxy handed to the units of work: times execute/executemany, delegates everything else.
+    """
+    __slots__ = ("_cursor", "_stats")
+
+    def __init__(self, cursor, stats: QueryStatsSetting):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, query, params=()):
+        inizio = time.perf_counter()
+        self._cursor.execute(query, params)
+        self._stats.registra(query, time.perf_counter() - inizio, max(self._cursor.rowcount, 0),
+                             self._cursor.connection, params)
+        return self
+
+    def executemany(self, query, seq_params):
+        inizio = time.perf_counter()
+        self._cursor.executemany(query, seq_params)
+        self._stats.registra(query, time.perf_counter() - inizio, max(self._cursor.rowcount, 0))
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
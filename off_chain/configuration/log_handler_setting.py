@@ -0,0 +1,51 @@
+import gzip
+import logging
+import logging.handlers
+import os
+import shutil
+import threading
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through one record every `every` records of the logger it is attached to.
+    Records at WARNING or above are never dropped.
+    """
+
+    def __init__(self, every: int = 100, name: str = ""):
+        super().__init__(name)
+        self.every = max(1, int(every))
+        self._contatore = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            passa = self._contatore % self.every == 0
+            self._contatore += 1
+        return passa
+
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-bounded rotating file handler whose rotated files are compressed with gzip
+    (logOffChainApp.log.1.gz, logOffChainApp.log.2.gz, ...).
+    """
+
+    def __init__(self, filename, mode="a", maxBytes=0, backupCount=0, encoding=None, delay=False):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, mode=mode, maxBytes=maxBytes, backupCount=backupCount,
+                         encoding=encoding, delay=delay)
+        self.namer = self._nome_compresso
+        self.rotator = self._comprimi
+
+    @staticmethod
+    def _nome_compresso(nome):
+        return nome + ".gz"
+
+    @staticmethod
+    def _comprimi(sorgente, destinazione):
+        with open(sorgente, "rb") as file_sorgente, gzip.open(destinazione, "wb") as file_destinazione:
+            shutil.copyfileobj(file_sorgente, file_destinazione)
+        os.remove(sorgente)
@@ -1,5 +1,8 @@
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import queue
 import yaml
 import os
 
@@ -8,6 +11,7 @@ class LogConfig:
     """
     Manages logging (python) configuration using an external YAML file 'log_setting.yaml'.
     Ensures logs are correctly formatted and written to both console and file.
+    With enable_queue the handlers run in a QueueListener thread: logging calls only enqueue the record.
     """
 
 
@@ -19,19 +23,17 @@ class LogConfig:
     LOGGING_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "log_setting.yaml")
     LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), "log/logOffChainApp.log")
 
+    # Listener that drains the logging queue, started by setup_logger
+    listener = None
+
     @staticmethod
     def setup_logger():
         """
-        1-Clears the content of the log file at the start of each execution.
-        2-Loads logging settings from the YAML configuration file.
-        3-Configures handlers for console and file logging.
+        1-Loads logging settings from the YAML configuration file.
+        2-Configures handlers for console and file logging (the file is rotated by size, not truncated).
+        3-Moves the handlers behind a queue, if enabled.
         """
 
-        # Clear the content of the log file(logOffChainApp.log) instead of deleting it
-        if os.path.exists(LogConfig.LOG_FILE_PATH):
-            with open(LogConfig.LOG_FILE_PATH, "w") as file:
-                file.truncate(0)  # Clear the file content
-
         # Verify that the logging file(log_setting.yaml) configuration file exists
         if not os.path.exists(LogConfig.LOGGING_CONFIG_PATH):
             raise FileNotFoundError(f"Logging configuration file not found: {LogConfig.LOGGING_CONFIG_PATH}")
@@ -51,16 +53,15 @@ class LogConfig:
                 if enable_file_logging:
                     active_handlers.append("file")
 
-                    # Ensure file handler overwrites the log file(logOffChainApp.log) on each execution
-                    if "file" in config["logging"]["handlers"]:
-                        config["logging"]["handlers"]["file"]["mode"] = "w"  # Overwrite mode
-
                 # Apply handlers to the application logger and root logger
                 config["logging"]["loggers"]["app_logger"]["handlers"] = active_handlers
                 config["logging"]["root"]["handlers"] = active_handlers
 
                 # Apply logging(log_setting.yaml) configuration
                 logging.config.dictConfig(config["logging"])
+
+                if config["logging"].get("enable_queue", False):
+                    LogConfig._start_queue_listener(["app_logger", ""])
         except yaml.YAMLError as e:
             raise ValueError(f"Error loading log_setting.yaml: {str(e)}")
 
@@ -71,8 +72,35 @@ class LogConfig:
             "enabled" if enable_file_logging else "disabled") + ")")
         return logger
 
+    @staticmethod
+    def _start_queue_listener(nomi_logger):
+        """
+        Replaces the handlers of the given loggers with one QueueHandler and runs the
+        original handlers in a QueueListener thread, stopped (and flushed) at exit.
+        """
+        handlers = []
+        for nome in nomi_logger:
+            for handler in logging.getLogger(nome).handlers:
+                if handler not in handlers:
+                    handlers.append(handler)
+
+        coda = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(coda)
+        for nome in nomi_logger:
+            logger_configurato = logging.getLogger(nome)
+            for handler in list(logger_configurato.handlers):
+                logger_configurato.removeHandler(handler)
+            logger_configurato.addHandler(queue_handler)
+
+        LogConfig.listener = logging.handlers.QueueListener(coda, *handlers, respect_handler_level=True)
+        LogConfig.listener.start()
+        atexit.register(LogConfig.listener.stop)
+
 
 # ===================== LOGGING CONFIGURATION =====================
 
 # Initialize the global logger instance
 logger = LogConfig.setup_logger()
+
+# Logger of the SQL executed on the hot path, %-style and at DEBUG: disabled by default, sampled when enabled
+query_logger = logging.getLogger("app_logger.query")
@@ -0,0 +1,61 @@
+import base64
+import hashlib
+import hmac
+import os
+
+from configuration.db_load_setting import configDatabase
+
+
+class PasswordHashSetting:
+    """
+    Tunable slow hash for the passwords stored in Credenziali (PBKDF2-HMAC).
+    A stored hash has the form pbkdf2_<algorithm>$<iterations>$<salt>$<hash>;
+    values without this prefix are legacy plaintext passwords, accepted once and then rehashed.
+    """
+
+    _hash_config = configDatabase.get("password_hash", {})
+    ALGORITHM = str(_hash_config.get("algorithm", "sha256"))
+    ITERATIONS = int(_hash_config.get("iterations", 310000))
+    SALT_BYTES = int(_hash_config.get("salt_bytes", 16))
+
+    PREFISSO = "pbkdf2_"
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, algorithm: str, iterations: int) -> bytes:
+        return hashlib.pbkdf2_hmac(algorithm, password.encode("utf-8"), salt, iterations)
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """
+        Returns the encoded hash of a password with a new random salt.
+        """
+        salt = os.urandom(PasswordHashSetting.SALT_BYTES)
+        digest = PasswordHashSetting._derive(password, salt, PasswordHashSetting.ALGORITHM,
+                                             PasswordHashSetting.ITERATIONS)
+        return (f"{PasswordHashSetting.PREFISSO}{PasswordHashSetting.ALGORITHM}"
+                f"${PasswordHashSetting.ITERATIONS}"
+                f"${base64.b64encode(salt).decode('ascii')}"
+                f"${base64.b64encode(digest).decode('ascii')}")
+
+    @staticmethod
+    def verify_password(password: str, salvata: str) -> bool:
+        """
+        Checks a password against the stored value in constant time.
+        """
+        if not salvata.startswith(PasswordHashSetting.PREFISSO):
+            return hmac.compare_digest(password.encode("utf-8"), salvata.encode("utf-8"))
+        try:
+            schema, iterations, salt, digest = salvata.split("$")
+            calcolato = PasswordHashSetting._derive(password, base64.b64decode(salt),
+                                                    schema[len(PasswordHashSetting.PREFISSO):], int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(calcolato, base64.b64decode(digest))
+
+    @staticmethod
+    def needs_rehash(salvata: str) -> bool:
+        """
+        True if the stored value is plaintext or was hashed with different parameters.
+        """
+        return not salvata.startswith(f"{PasswordHashSetting.PREFISSO}{PasswordHashSetting.ALGORITHM}"
+                                      f"${PasswordHashSetting.ITERATIONS}$")
@@ -9,6 +9,152 @@ class DatabaseMigrations:
     # Variable of the class to track if the migrations were executed
     _migrations_executed = False
 
+    # Passi versionati eseguiti dopo la creazione delle tabelle: (versione, descrizione, query).
+    # La versione applicata e' salvata in PRAGMA user_version, quindi ogni passo gira una sola volta.
+    VERSIONED_MIGRATIONS = [
+        (1, "Secondary indexes on the hot filter columns", [
+            # Operazioni di un'azienda, anche filtrate per data
+            '''
+            CREATE INDEX IF NOT EXISTS idx_operazione_azienda_data
+            ON Operazione (Id_azienda, Data_operazione)
+            ''',
+            # Operazioni di un certo tipo per azienda (materie prime, composizione)
+            '''
+            CREATE INDEX IF NOT EXISTS idx_operazione_azienda_tipo_data
+            ON Operazione (Id_azienda, Operazione, Data_operazione)
+            ''',
+            # Coprente per le somme di CO2 per prodotto
+            '''
+            CREATE INDEX IF NOT EXISTS idx_operazione_prodotto_co2
+            ON Operazione (Id_prodotto, Consumo_CO2)
+            ''',
+            # Solo i prodotti sugli scaffali, base delle liste prodotti
+            '''
+            CREATE INDEX IF NOT EXISTS idx_operazione_scaffali
+            ON Operazione (Id_azienda, Id_prodotto)
+            WHERE Operazione = 'Messo sugli scaffali'
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_certificato_prodotto
+            ON Certificato (Id_prodotto)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_certificato_certificatore
+            ON Certificato (Id_azienda_certificatore)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_prodotto_stato
+            ON Prodotto (Stato)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_prodotto_nome
+            ON Prodotto (Nome)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_azioni_azienda_data
+            ON Azioni_compensative (Id_azienda, Data)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_azienda_tipo
+            ON Azienda (Tipo)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_azienda_nome
+            ON Azienda (Nome)
+            ''',
+            "ANALYZE"
+        ]),
+        (2, "Index on the credential of each company, used by the login", [
+            # Username ha gia' l'indice UNIQUE: serve quello per risalire all'azienda
+            '''
+            CREATE INDEX IF NOT EXISTS idx_azienda_credenziali
+            ON Azienda (Id_credenziali)
+            ''',
+            "ANALYZE"
+        ]),
+        (3, "Merkle anchoring of the operations on the chain", [
+            # Un blocco di operazioni ancorato: solo la radice va on-chain.
+            # Id_batch e' il batchId di OperationAnchor, valido solo su quel contratto e su quella catena
+            # (hash del blocco genesi): la catena Hardhat vive in memoria e ricomincia a ogni riavvio.
+            '''
+            CREATE TABLE IF NOT EXISTS Ancoraggio (
+                Id_ancoraggio INTEGER PRIMARY KEY AUTOINCREMENT,
+                Id_batch INTEGER NOT NULL,
+                Contratto TEXT NOT NULL,
+                Catena TEXT NOT NULL,
+                Radice TEXT NOT NULL,
+                Tx_hash TEXT,
+                Numero_operazioni INTEGER NOT NULL,
+                Obsoleto INTEGER NOT NULL DEFAULT 0,
+                Data_ancoraggio TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            # Un batch on-chain corrisponde a un solo ancoraggio valido; quelli obsoleti restano come storico
+            '''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_ancoraggio_batch
+            ON Ancoraggio (Catena, Contratto, Id_batch)
+            WHERE Obsoleto = 0
+            ''',
+            # Prova di inclusione di ogni operazione: foglia e nodi fratelli (JSON)
+            '''
+            CREATE TABLE IF NOT EXISTS Prova_ancoraggio (
+                Id_operazione INTEGER PRIMARY KEY,
+                Id_ancoraggio INTEGER NOT NULL,
+                Foglia TEXT NOT NULL,
+                Prova TEXT NOT NULL,
+                FOREIGN KEY (Id_operazione) REFERENCES Operazione(Id_operazione),
+                FOREIGN KEY (Id_ancoraggio) REFERENCES Ancoraggio(Id_ancoraggio)
+            )
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_prova_ancoraggio_ancoraggio
+            ON Prova_ancoraggio (Id_ancoraggio)
+            '''
+        ]),
+    ]
+
+    # Sotto questa dimensione (righe misurate da ANALYZE) una scansione completa e' la scelta giusta
+    PLAN_CHECK_MIN_ROWS = 1000
+
+    @staticmethod
+    def query_plan_checks() -> list:
+        """
+        Repository queries whose plan is checked after the migrations: (nome, query).
+        They are the constants the repositories execute, so the check follows every change to them.
+        The full lists (all thresholds, all companies) necessarily read the whole table and are not included.
+        """
+        from persistence.repository_impl.certification_repository_impl import CertificationRepositoryImpl
+        from persistence.repository_impl.company_repository_impl import CompanyRepositoryImpl
+        from persistence.repository_impl.compensation_action_repository_impl import CompensationActionRepositoryImpl
+        from persistence.repository_impl.composition_repository_impl import CompositionRepositoryImpl
+        from persistence.repository_impl.credential_repository_impl import CredentialRepositoryImpl
+        from persistence.repository_impl.operation_repository_impl import OperationRepositoryImpl
+        from persistence.repository_impl.product_repository_impl import ProductRepositoryImpl
+
+        return [
+            ("operazioni_by_azienda", OperationRepositoryImpl._QUERY_OPERAZIONI_BY_AZIENDA),
+            ("operazioni_by_data", OperationRepositoryImpl._QUERY_OPERAZIONI_BY_DATA),
+            ("operazioni_ordinate_co2", OperationRepositoryImpl._QUERY_OPERAZIONI_ORDINATE_CO2),
+            ("materie_prime", ProductRepositoryImpl._QUERY_MATERIE_PRIME),
+            ("prodotti_to_composizione", CompositionRepositoryImpl._QUERY_PRODOTTI_TO_COMPOSIZIONE),
+            ("prodotti_by_rivenditore",
+             ProductRepositoryImpl._query_prodotti_con_co2(ProductRepositoryImpl._FILTRO_PRODOTTI_BY_RIVENDITORE)),
+            ("prodotti_by_nome",
+             ProductRepositoryImpl._query_prodotti_con_co2(ProductRepositoryImpl._FILTRO_PRODOTTI_BY_NOME)),
+            ("co2_consumata_prodotti", ProductRepositoryImpl._query_co2_consumata(2)),
+            ("nomi_prodotti", ProductRepositoryImpl._QUERY_NOMI_PRODOTTI),
+            ("prodotti_to_rivenditore", ProductRepositoryImpl._QUERY_PRODOTTI_TO_RIVENDITORE),
+            ("certificazioni_by_prodotto", CertificationRepositoryImpl._QUERY_CERTIFICAZIONI_BY_PRODOTTO),
+            ("numero_certificazioni", CertificationRepositoryImpl._QUERY_NUMERO_CERTIFICAZIONI),
+            ("azioni_by_data", CompensationActionRepositoryImpl._QUERY_AZIONI_PER_DATA),
+            ("rivenditori", CompanyRepositoryImpl._QUERY_RIVENDITORI),
+            ("aziende_by_tipo",
+             CompanyRepositoryImpl._query_aziende_con_saldo(CompanyRepositoryImpl._FILTRO_AZIENDE_BY_TIPO)),
+            ("azienda_by_nome",
+             CompanyRepositoryImpl._query_aziende_con_saldo(CompanyRepositoryImpl._FILTRO_AZIENDE_BY_NOME)),
+            ("credenziale_by_username", CredentialRepositoryImpl._QUERY_CREDENZIALE_BY_USERNAME),
+        ]
+
     @staticmethod
     def run_migrations():
         TABLE_CREATION_QUERIES = [
@@ -88,6 +234,90 @@ class DatabaseMigrations:
                 Nome_azione TEXT NOT NULL,
                 FOREIGN KEY (Id_azienda) REFERENCES Azienda(Id_azienda) ON DELETE CASCADE
             )
+            ''',
+            # Registro della CO2 consumata e compensata per azienda, aggiornato dai trigger seguenti
+            '''
+            CREATE TABLE IF NOT EXISTS Saldo_CO2 (
+                Id_azienda INTEGER PRIMARY KEY,
+                Co2_consumata REAL NOT NULL DEFAULT 0,
+                Co2_compensata REAL NOT NULL DEFAULT 0,
+                FOREIGN KEY (Id_azienda) REFERENCES Azienda(Id_azienda) ON DELETE CASCADE
+            )
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_saldo_co2_saldo
+            ON Saldo_CO2 ((Co2_compensata - Co2_consumata))
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_azienda_insert
+            AFTER INSERT ON Azienda
+            BEGIN
+                INSERT OR IGNORE INTO Saldo_CO2 (Id_azienda) VALUES (NEW.Id_azienda);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_operazione_insert
+            AFTER INSERT ON Operazione
+            BEGIN
+                INSERT INTO Saldo_CO2 (Id_azienda, Co2_consumata) VALUES (NEW.Id_azienda, NEW.Consumo_CO2)
+                ON CONFLICT (Id_azienda) DO UPDATE SET Co2_consumata = Co2_consumata + excluded.Co2_consumata;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_operazione_update
+            AFTER UPDATE OF Id_azienda, Consumo_CO2 ON Operazione
+            BEGIN
+                UPDATE Saldo_CO2 SET Co2_consumata = Co2_consumata - OLD.Consumo_CO2
+                WHERE Id_azienda = OLD.Id_azienda;
+                INSERT INTO Saldo_CO2 (Id_azienda, Co2_consumata) VALUES (NEW.Id_azienda, NEW.Consumo_CO2)
+                ON CONFLICT (Id_azienda) DO UPDATE SET Co2_consumata = Co2_consumata + excluded.Co2_consumata;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_operazione_delete
+            AFTER DELETE ON Operazione
+            BEGIN
+                UPDATE Saldo_CO2 SET Co2_consumata = Co2_consumata - OLD.Consumo_CO2
+                WHERE Id_azienda = OLD.Id_azienda;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_azione_insert
+            AFTER INSERT ON Azioni_compensative
+            BEGIN
+                INSERT INTO Saldo_CO2 (Id_azienda, Co2_compensata) VALUES (NEW.Id_azienda, NEW.Co2_compensata)
+                ON CONFLICT (Id_azienda) DO UPDATE SET Co2_compensata = Co2_compensata + excluded.Co2_compensata;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_azione_update
+            AFTER UPDATE OF Id_azienda, Co2_compensata ON Azioni_compensative
+            BEGIN
+                UPDATE Saldo_CO2 SET Co2_compensata = Co2_compensata - OLD.Co2_compensata
+                WHERE Id_azienda = OLD.Id_azienda;
+                INSERT INTO Saldo_CO2 (Id_azienda, Co2_compensata) VALUES (NEW.Id_azienda, NEW.Co2_compensata)
+                ON CONFLICT (Id_azienda) DO UPDATE SET Co2_compensata = Co2_compensata + excluded.Co2_compensata;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_saldo_co2_azione_delete
+            AFTER DELETE ON Azioni_compensative
+            BEGIN
+                UPDATE Saldo_CO2 SET Co2_compensata = Co2_compensata - OLD.Co2_compensata
+                WHERE Id_azienda = OLD.Id_azienda;
+            END
+            ''',
+            # Allinea il registro per le aziende create prima dei trigger (una sola volta per azienda)
+            '''
+            INSERT INTO Saldo_CO2 (Id_azienda, Co2_consumata, Co2_compensata)
+            SELECT
+                Azienda.Id_azienda,
+                COALESCE((SELECT SUM(Consumo_CO2) FROM Operazione
+                          WHERE Operazione.Id_azienda = Azienda.Id_azienda), 0),
+                COALESCE((SELECT SUM(Co2_compensata) FROM Azioni_compensative
+                          WHERE Azioni_compensative.Id_azienda = Azienda.Id_azienda), 0)
+            FROM Azienda
+            WHERE Azienda.Id_azienda NOT IN (SELECT Id_azienda FROM Saldo_CO2)
             '''
         ]
 
@@ -103,6 +333,7 @@ class DatabaseMigrations:
 
             # Execute migrations
             xx.execute_bd_migrations(queries_with_params)
+            DatabaseMigrations._run_versioned_migrations(xx)
 
             # Check if the migrations were executed
             DatabaseMigrations._migrations_executed = True
@@ -112,6 +343,63 @@ class DatabaseMigrations:
             logger.error(f"Error during database migration: {e}")
             raise Exception(f"Migration error: {e}")
 
+        DatabaseMigrations.verifica_piani_query()
+
+    @staticmethod
+    def _run_versioned_migrations(db_manager: DatabaseManagerSetting):
+        """
+        Applies, in order, every versioned step newer than PRAGMA user_version.
+        Each step runs in its own transaction together with the version bump.
+        """
+        versione_corrente = db_manager.fetch_one("PRAGMA user_version;")[0]
+        for versione, descrizione, queries in DatabaseMigrations.VERSIONED_MIGRATIONS:
+            if versione <= versione_corrente:
+                continue
+            passi = [(query, ()) for query in queries]
+            passi.append((f"PRAGMA user_version = {int(versione)};", ()))
+            db_manager.execute_bd_migrations(passi)
+            logger.info(f"BackEnd: run_migrations: Applied migration {versione} ({descrizione}).")
+
+    @staticmethod
+    def verifica_piani_query() -> list:
+        """
+        Runs EXPLAIN QUERY PLAN on query_plan_checks() and logs a warning for every
+        full table scan. Returns the list of (nome, dettaglio) that were flagged.
+        A scan of a table that ANALYZE measured below PLAN_CHECK_MIN_ROWS is the planner's
+        right choice for that table size and is not flagged.
+        """
+        db_manager = DatabaseManagerSetting()
+        scansioni = []
+        righe_tabelle = DatabaseMigrations._righe_tabelle(db_manager)
+        for nome, query in DatabaseMigrations.query_plan_checks():
+            params = (None,) * query.count("?")
+            try:
+                piano = db_manager.fetch_query("EXPLAIN QUERY PLAN " + query, params)
+            except Exception as e:
+                logger.warning(f"BackEnd: verifica_piani_query: Unable to check {nome}: {e}")
+                continue
+            for riga in piano:
+                dettaglio = riga[3]
+                if not dettaglio.startswith("SCAN ") or "INDEX" in dettaglio:
+                    continue
+                tabella = dettaglio.split()[1]
+                if righe_tabelle.get(tabella, DatabaseMigrations.PLAN_CHECK_MIN_ROWS) >= \
+                        DatabaseMigrations.PLAN_CHECK_MIN_ROWS:
+                    scansioni.append((nome, dettaglio))
+                    logger.warning(f"BackEnd: verifica_piani_query: {nome} is not index-driven: {dettaglio}")
+        return scansioni
+
+    @staticmethod
+    def _righe_tabelle(db_manager: DatabaseManagerSetting) -> dict:
+        """Row count of every table according to sqlite_stat1 (empty if ANALYZE never ran)."""
+        if not db_manager.fetch_one("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"):
+            return {}
+        statistiche = db_manager.fetch_query("SELECT tbl, stat FROM sqlite_stat1")
+        righe = {}
+        for tabella, stat in statistiche:
+            righe[tabella] = max(righe.get(tabella, 0), int(stat.split()[0]))
+        return righe
+
 
 # Execute migrations when the module is imported
 #DatabaseMigrations.run_migrations()
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+
+
+class AnchorRepository(ABC):
+    """
+    Repository interface for the Merkle anchoring of the operations (Ancoraggio, Prova_ancoraggio).
+    """
+
+    @abstractmethod
+    def get_operazioni_da_ancorare(self, limit: int) -> list:
+        """
+        Restituisce al massimo limit operazioni non ancora ancorate, in ordine di id, come
+        (Id_operazione, Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione).
+        """
+        pass
+
+    @abstractmethod
+    def salva_ancoraggio(self, id_batch: int, contratto: str, catena: str, radice: str, tx_hash: str,
+                         prove: list) -> int:
+        """
+        Salva il blocco ancorato (batch id_batch del contratto contratto sulla catena catena) e le prove
+        (Id_operazione, foglia, prova) in una sola transazione; restituisce l'Id_ancoraggio locale.
+        """
+        pass
+
+    @abstractmethod
+    def get_ancoraggi_validi(self) -> list:
+        """
+        Restituisce gli ancoraggi non obsoleti, in ordine di Id_ancoraggio, come
+        (Id_ancoraggio, Id_batch, Contratto, Catena, Radice).
+        """
+        pass
+
+    @abstractmethod
+    def segna_obsoleti(self, id_ancoraggi: list):
+        """
+        Segna come obsoleti gli ancoraggi non piu' presenti sulla catena ed elimina le loro prove,
+        cosi' le operazioni tornano tra quelle da ancorare.
+        """
+        pass
+
+    @abstractmethod
+    def get_prova(self, id_operazione: int):
+        """
+        Restituisce (Id_batch, Radice, Foglia, Prova, operazione) per un'operazione ancorata,
+        con l'operazione come la restituisce get_operazioni_da_ancorare; None se non e' ancorata.
+        """
+        pass
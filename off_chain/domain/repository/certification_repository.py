@@ -22,6 +22,11 @@ class CertificationRepository(ABC):
         """Restituisce true se il prodotto è certificato, false altrimenti."""
         pass
 
+    @abstractmethod
+    def are_certificati(self, prodotti: [int]) -> set:
+        """Restituisce l'insieme dei prodotti certificati tra quelli indicati."""
+        pass
+
     @abstractmethod
     def inserisci_certificato(self, prodotto: int, tipo: str, azienda: int, data: datetime):
         """Inserisce un nuovo certificato."""
@@ -13,17 +13,17 @@ class CompanyRepository(ABC):
         pass
 
     @abstractmethod
-    def get_lista_aziende(self) -> list:
+    def get_lista_aziende(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista di tutte le aziende con i rispettivi valori di CO2 consumata e compensata."""
         pass
 
     @abstractmethod
-    def get_lista_aziende_ordinata(self) -> list:
+    def get_lista_aziende_ordinata(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista ordinata per saldo CO2 di tutte le aziende."""
         pass
 
     @abstractmethod
-    def get_lista_aziende_filtrata_tipo(self, tipo: str) -> list:
+    def get_lista_aziende_filtrata_tipo(self, tipo: str, limit: int = None, offset: int = 0) -> list:
         """
         Restituisce la lista di tutte le aziende con i rispettivi valori di CO2 consumata e compensata
         filtrata per tipo
@@ -31,7 +31,7 @@ class CompanyRepository(ABC):
         pass
 
     @abstractmethod
-    def get_azienda_by_nome(self, nome: str) -> list:
+    def get_azienda_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
         """
         Restituisce la lista di tutte le aziende con i rispettivi valori di CO2 consumata e compensata
         filtrata per nome
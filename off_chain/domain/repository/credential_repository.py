@@ -7,6 +7,14 @@ class CredentialRepository(ABC):
     def get_lista_credenziali(self) -> list:
         pass
 
+    @abstractmethod
+    def get_credenziale_by_username(self, username: str):
+        pass
+
+    @abstractmethod
+    def aggiorna_password(self, id_credenziali: int, password_hash: str):
+        pass
+
     @abstractmethod
     def get_azienda_by_id(self, id_: int) -> list:
         pass
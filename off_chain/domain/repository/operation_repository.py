@@ -9,17 +9,18 @@ class OperationRepository(ABC):
     """
 
     @abstractmethod
-    def get_operazioni_ordinate_co2(self, azienda: int) -> list:
+    def get_operazioni_ordinate_co2(self, azienda: int, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista di tutte le operazioni effettuate da una certa azienda ordinate per co2 consumata """
         pass
 
     @abstractmethod
-    def get_operazioni_by_data(self, azienda: int, d1: datetime, d2: datetime) -> list:
+    def get_operazioni_by_data(self, azienda: int, d1: datetime, d2: datetime, limit: int = None,
+                               offset: int = 0) -> list:
         """Restituisce la lista di tutte le operazioni effettuate da una certa azienda ordinate per co2 consumata """
         pass
 
     @abstractmethod
-    def get_operazioni_by_azienda(self, azienda: int) -> list:
+    def get_operazioni_by_azienda(self, azienda: int, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista di tutte le operazioni effettuate da una certa azienda """
         pass
 
@@ -50,3 +51,11 @@ class OperationRepository(ABC):
         a seconda del tipo di azienda che la sta effettuando
         """
         pass
+
+    @abstractmethod
+    def inserisci_operazioni_batch(self, azienda: int, operazioni: list) -> list:
+        """
+        Inserisce un blocco di operazioni gia' validate in un'unica transazione.
+        Restituisce la lista (posizione, errore) delle operazioni non inserite.
+        """
+        pass
@@ -7,7 +7,7 @@ class ProductRepository(ABC):
     """
 
     @abstractmethod
-    def get_storico_prodotto(self, prodotto: int) -> list:
+    def get_storico_prodotto(self, prodotto: int, limit: int = None, offset: int = 0) -> list:
         """Restituisce lo storico del prodotto selezionato."""
         pass
 
@@ -17,45 +17,50 @@ class ProductRepository(ABC):
         pass
 
     @abstractmethod
-    def get_lista_prodotti(self) -> list:
+    def get_lista_prodotti(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista di prodotti sugli scaffali per il guest."""
         pass
 
     @abstractmethod
-    def get_prodotti_ordinati_co2(self) -> list:
+    def get_prodotti_ordinati_co2(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce tutti i prodotti sugli scaffali ordinati per co2 consumata."""
         pass
 
     @abstractmethod
-    def get_prodotti_by_nome(self, nome: str) -> list:
+    def get_prodotti_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
         """Restituisce tutti i prodotti sugli scaffali con un certo nome."""
         pass
 
     @abstractmethod
-    def get_lista_prodotti_by_rivenditore(self, rivenditore: int) -> list:
+    def get_lista_prodotti_by_rivenditore(self, rivenditore: int, limit: int = None, offset: int = 0) -> list:
         """Restituisce una lista di prodotti sullo scaffale filtrati per rivenditore."""
         pass
 
     @abstractmethod
-    def get_prodotti_certificati(self) -> list:
+    def get_prodotti_certificati(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce la lista di tutti i prodotti sullo scaffale certificati."""
         pass
 
     @abstractmethod
-    def get_prodotti_certificati_by_rivenditore(self, id_rivenditore: int) -> list:
+    def get_prodotti_certificati_by_rivenditore(self, id_rivenditore: int, limit: int = None, offset: int = 0) -> list:
         """Restituisce i prodotti certificati sullo scaffale filtrati per rivenditore."""
         pass
 
     @abstractmethod
-    def get_prodotti_certificati_ordinati_co2(self) -> list:
+    def get_prodotti_certificati_ordinati_co2(self, limit: int = None, offset: int = 0) -> list:
         """Restituisce i prodotti certificati sullo scaffale ordinati per co2 consumata."""
         pass
 
     @abstractmethod
-    def get_prodotti_certificati_by_nome(self, nome: str) -> list:
+    def get_prodotti_certificati_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
         """Restituisce i prodotti certificati sullo scaffale filtrati per nome."""
         pass
 
+    @abstractmethod
+    def get_nomi_prodotti(self, limit: int = None) -> list:
+        """Restituisce i nomi distinti dei prodotti sullo scaffale, in ordine alfabetico."""
+        pass
+
     @abstractmethod
     def get_prodotti_to_rivenditore(self) -> list:
         """Get ."""
@@ -68,3 +73,8 @@ class ProductRepository(ABC):
         può inserire nella tabella "composizione" come valori dell'attributo "materia prima"
         """
         pass
+
+    @abstractmethod
+    def get_prodotti_by_ids(self, prodotti: [int]) -> dict:
+        """Restituisce {Id_prodotto: (Nome, Stato)} per i prodotti esistenti tra quelli indicati."""
+        pass
@@ -33,3 +33,13 @@ class ThresholdRepository(ABC):
     def get_soglia_by_operazione_and_prodotto(self, operazione: str, prodotto: str) -> int:
         """Questa funzione restituisce la soglia data l'operazione e il prodotto"""
         pass
+
+    @abstractmethod
+    def get_scarti_soglia(self, operazioni: list) -> list:
+        """Restituisce lo scarto dalla soglia per ogni (co2, operazione, prodotto) della lista."""
+        pass
+
+    @abstractmethod
+    def modifica_soglia(self, operazione: str, prodotto: str, soglia: float):
+        """Modifica la soglia massima data l'operazione e il prodotto."""
+        pass
@@ -1,51 +1,94 @@
 # Standard Library Imports
+import importlib
 import sys
 import time
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap
-from PyQt5.QtWidgets import QApplication, QSplashScreen, QMessageBox
+from PyQt5.QtWidgets import QApplication, QSplashScreen
 
 from configuration.log_load_setting import logger
-from presentation.view.vista_accedi import VistaAccedi
-from blockchain_manager import BlockchainSetupThread
+import lazy_loader
+from database.db_migrations import DatabaseMigrations
+from startup_orchestrator import StartupOrchestrator
+import blockchain_manager
 
-def setup_gui(session):
+# Stage che devono essere completati prima di mostrare la finestra di login
+GUI_STAGES = ["database", "views"]
+
+
+def _import_views():
+    """Imports the login view (and with it the controllers and repositories) off the main thread."""
+    return importlib.import_module("presentation.view.vista_accedi").VistaAccedi
+
+
+def build_startup(with_blockchain: bool = True) -> StartupOrchestrator:
+    """
+    Startup stages of the application: migrations and view imports run while the Hardhat
+    node boots and the contracts are deployed.
+    """
+    orchestrator = StartupOrchestrator(logger=logger)
+    orchestrator.add("database", DatabaseMigrations.run_migrations, description="Initializing database...")
+    orchestrator.add("views", _import_views, description="Loading the interface...")
+    if with_blockchain:
+        blockchain_manager.register_blockchain_stages(orchestrator, database_stage="database")
+        orchestrator.on_complete("blockchain", _on_blockchain_complete)
+    return orchestrator
+
+
+def _on_blockchain_complete(ok, result):
+    if ok:
+        logger.info("Hardhat blockchain environment setup completed successfully")
+    else:
+        logger.warning("Proceeding without Hardhat blockchain functionality")
+        logger.error(f"Hardhat blockchain setup failed: {result}")
+
+
+def setup_gui(session=None, orchestrator: StartupOrchestrator = None):
     """Setup and initialize the GUI components"""
+    inizio = time.perf_counter()
     # Starting the PyQt application
     app = QApplication(sys.argv)
     logger.info("Frontend: Starting the PyQt application...")
-    
-    logger.info(f"Start session on {session.start_app}")
+
+    if session is not None:
+        logger.info(f"Start session on {session.start_app}")
 
     # Show Splash Screen
     splash = QSplashScreen(QPixmap("presentation/resources/logo_splash.png"), Qt.WindowStaysOnTopHint)
     splash.show()
 
-    # Start blockchain setup in a separate thread
-    blockchain_setup = BlockchainSetupThread(splash_screen=splash)
-    blockchain_setup.start()
-    
-    # Wait for blockchain setup to complete with timeout
-    blockchain_setup.join(timeout=60)  # Aumentato a 60 secondi timeout
-    
-    if not blockchain_setup.is_alive() and blockchain_setup.success:
-        logger.info("Hardhat blockchain environment setup completed successfully")
-    else:
-        if blockchain_setup.is_alive():
-            logger.error("Hardhat blockchain setup timed out")
-            blockchain_setup.join()  # Aspetta comunque il completamento del thread
-        logger.warning("Proceeding without Hardhat blockchain functionality")
-        if blockchain_setup.error_message:
-            logger.error(f"Hardhat blockchain setup failed: {blockchain_setup.error_message}")
+    orchestrator = orchestrator or build_startup()
+    orchestrator.start()
 
-    time.sleep(1)
+    # La finestra di login aspetta solo database e viste; la blockchain continua in background
+    messaggio = None
+    while not orchestrator.wait(GUI_STAGES, timeout=0.05):
+        stato = orchestrator.status_message()
+        if stato != messaggio:
+            messaggio = stato
+            splash.showMessage(stato, Qt.AlignBottom | Qt.AlignHCenter, Qt.white)
+        app.processEvents()
+
+    try:
+        orchestrator.result("database")
+    except Exception as e:
+        logger.error(f"Error initializing database: {e}")
+        sys.exit(1)  # Stops the application if there is a critical error
+    if orchestrator.succeeded("views"):
+        vista_accedi = orchestrator.result("views")
+    else:
+        # Rilancia nel main thread l'errore dell'import, con il traceback completo
+        vista_accedi = _import_views()
 
     # Create the main window
-    window = VistaAccedi()
+    window = vista_accedi()
     window.show()
-    
+
     # Hide splash screen
     splash.finish(window)
-    
+    logger.info(f"Frontend: first window shown after {time.perf_counter() - inizio:.2f}s")
+    if lazy_loader.import_profile_enabled():
+        logger.info(lazy_loader.import_profile_report())
+
     # Start the application event loop
     return app, window
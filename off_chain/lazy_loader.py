@@ -0,0 +1,170 @@
+# lazy_loader.py - Modules and repository instances loaded on first use, with an import-time profile.
+
+import builtins
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+# Con SFS_IMPORT_PROFILE=1 ogni primo import viene cronometrato e il report finisce nel log
+IMPORT_PROFILE_ENV = "SFS_IMPORT_PROFILE"
+
+_profile: Dict[str, Dict[str, float]] = {}
+_profile_lock = threading.Lock()
+_profile_started = None
+_original_import = None
+_local = threading.local()
+
+
+def _record(name: str, total: float, self_time: float, lazy: bool = False):
+    with _profile_lock:
+        voce = _profile.setdefault(name, {"total": 0.0, "self": 0.0, "lazy": False})
+        voce["total"] += total
+        voce["self"] += self_time
+        voce["lazy"] = voce["lazy"] or lazy
+
+
+def _resolve(name: str, globals_, level: int) -> str:
+    if level == 0:
+        return name
+    package = (globals_ or {}).get("__package__") or ""
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+
+def _timed(load, modulo: str, lazy: bool = False):
+    # Il tempo "self" esclude gli import annidati, come python -X importtime
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(0.0)
+    inizio = time.perf_counter()
+    try:
+        return load()
+    finally:
+        totale = time.perf_counter() - inizio
+        figli = stack.pop()
+        if stack:
+            stack[-1] += totale
+        _record(modulo, totale, totale - figli, lazy)
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    modulo = _resolve(name, globals, level)
+    if modulo in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    return _timed(lambda: _original_import(name, globals, locals, fromlist, level), modulo)
+
+
+def enable_import_profile():
+    """Starts timing the first import of every module (idempotent)."""
+    global _original_import, _profile_started
+    if _original_import is not None:
+        return
+    _profile_started = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def import_profile_enabled() -> bool:
+    return _original_import is not None
+
+
+def import_profile_report(top: int = 20) -> str:
+    """The slowest imports by cumulative time; lazy ones are the modules loaded through lazy_import()."""
+    with _profile_lock:
+        voci = sorted(_profile.items(), key=lambda item: item[1]["total"], reverse=True)
+        somma_self = sum(v["self"] for v in _profile.values())
+    trascorso = 0.0 if _profile_started is None else time.perf_counter() - _profile_started
+    righe = [f"Import profile: {len(voci)} modules, {somma_self:.3f}s spent importing "
+             f"in the first {trascorso:.2f}s",
+             f"{'self [s]':>10} {'cumulative [s]':>15}  module"]
+    for nome, voce in voci[:top]:
+        righe.append(f"{voce['self']:>10.3f} {voce['total']:>15.3f}  {nome}{' (lazy)' if voce['lazy'] else ''}")
+    return "\n".join(righe)
+
+
+class _LazyObject:
+    """
+    Stands for a module (or one of its attributes) until it is first used:
+    attribute access or a call imports it, then every use is forwarded.
+    """
+
+    def __init__(self, module: str, attribute: Optional[str] = None):
+        object.__setattr__(self, "_module", module)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    if import_profile_enabled() and self._module not in sys.modules:
+                        caricato = _timed(lambda: importlib.import_module(self._module), self._module, lazy=True)
+                    else:
+                        caricato = importlib.import_module(self._module)
+                    target = getattr(caricato, self._attribute) if self._attribute else caricato
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        nome = self._module + (f".{self._attribute}" if self._attribute else "")
+        return f"<lazy {nome}{'' if self.loaded else ' (not loaded)'}>"
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> _LazyObject:
+    """
+    lazy_import("presentation.view.vista_prodotti", "VistaProdotti") imports the module
+    the first time the returned object is called or one of its attributes is read.
+    """
+    return _LazyObject(module, attribute)
+
+
+class lazy_instance:
+    """
+    Class attribute that creates an instance of module.class_name on first access:
+        controllerGuest = lazy_instance("presentation.controller.guest_controller", "ControllerGuest")
+    The instance is then stored on the object, so it is created once per object.
+    """
+
+    def __init__(self, module: str, class_name: str):
+        self._class = lazy_import(module, class_name)
+        self._name = class_name
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        creato = self._class()
+        instance.__dict__[self._name] = creato
+        return creato
+
+
+class lazy_repository(lazy_instance):
+    """
+    Controller attribute that creates the repository on first access:
+        product = lazy_repository("persistence.repository_impl.product_repository_impl", "ProductRepositoryImpl")
+    The instance (a singleton of the repository) is then stored on the controller.
+    """
+
+
+if os.environ.get(IMPORT_PROFILE_ENV):
+    enable_import_profile()
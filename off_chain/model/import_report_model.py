@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ImportReportModel:
+    """
+    Outcome of a bulk import of operations, updated batch after batch.
+    Only the first max_errori row errors are kept, the others are just counted.
+    """
+    righe_lette: int = 0
+    righe_inserite: int = 0
+    righe_scartate: int = 0
+    righe_fuori_soglia: int = 0
+    errori: list = field(default_factory=list)
+    errori_omessi: int = 0
+    max_errori: int = 1000
+
+    def aggiungi_errore(self, riga: int, messaggio: str):
+        self.righe_scartate += 1
+        if len(self.errori) < self.max_errori:
+            self.errori.append((riga, messaggio))
+        else:
+            self.errori_omessi += 1
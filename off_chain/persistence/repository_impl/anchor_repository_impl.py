@@ -0,0 +1,90 @@
+from abc import ABC
+
+from configuration.db_manager_setting import DatabaseManagerSetting
+from configuration.log_load_setting import logger
+from domain.repository.anchor_repository import AnchorRepository
+
+
+class AnchorRepositoryImpl(AnchorRepository, ABC):
+    # Class variable that stores the single instance
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AnchorRepositoryImpl, cls).__new__(cls)
+            cls._instance.db_manager_setting = DatabaseManagerSetting()
+            logger.info("BackEnd: Successfully initializing the instance for AnchorRepositoryImpl.")
+        return cls._instance
+
+    def get_operazioni_da_ancorare(self, limit: int) -> list:
+        # Le operazioni sono ancorate in ordine di id: basta partire dall'ultima ancorata.
+        # Dopo un reset della catena tutti i batch precedenti diventano obsoleti insieme, quindi
+        # le prove rimaste sono sempre un prefisso delle operazioni.
+        query = """
+        SELECT Id_operazione, Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione
+        FROM Operazione
+        WHERE Id_operazione > (SELECT COALESCE(MAX(Id_operazione), 0) FROM Prova_ancoraggio)
+        ORDER BY Id_operazione
+        LIMIT ?;
+        """
+        return self.db_manager_setting.fetch_query(query, (limit,))
+
+    def salva_ancoraggio(self, id_batch: int, contratto: str, catena: str, radice: str, tx_hash: str,
+                         prove: list) -> int:
+        def salva(cursor):
+            id_ancoraggio = cursor.execute("""
+                INSERT INTO Ancoraggio (Id_batch, Contratto, Catena, Radice, Tx_hash, Numero_operazioni)
+                VALUES (?, ?, ?, ?, ?, ?);
+            """, (id_batch, contratto, catena, radice, tx_hash, len(prove))).lastrowid
+            cursor.executemany("""
+                INSERT INTO Prova_ancoraggio (Id_operazione, Id_ancoraggio, Foglia, Prova)
+                VALUES (?, ?, ?, ?);
+            """, [(id_operazione, id_ancoraggio, foglia, prova) for id_operazione, foglia, prova in prove])
+            return id_ancoraggio
+
+        try:
+            id_ancoraggio = self.db_manager_setting.execute_unit_of_work(salva)
+        except Exception as e:
+            raise Exception(f"BackEnd: salva_ancoraggio: Error saving batch {id_batch}: {str(e)}")
+        logger.info(f"BackEnd: salva_ancoraggio: Anchored {len(prove)} operations in batch {id_batch} "
+                    f"(anchor {id_ancoraggio}).")
+        return id_ancoraggio
+
+    def get_ancoraggi_validi(self) -> list:
+        query = """
+        SELECT Id_ancoraggio, Id_batch, Contratto, Catena, Radice
+        FROM Ancoraggio
+        WHERE Obsoleto = 0
+        ORDER BY Id_ancoraggio;
+        """
+        return self.db_manager_setting.fetch_query(query)
+
+    def segna_obsoleti(self, id_ancoraggi: list):
+        if not id_ancoraggi:
+            return
+        parametri = [(id_ancoraggio,) for id_ancoraggio in id_ancoraggi]
+
+        def segna(cursor):
+            cursor.executemany("UPDATE Ancoraggio SET Obsoleto = 1 WHERE Id_ancoraggio = ?;", parametri)
+            cursor.executemany("DELETE FROM Prova_ancoraggio WHERE Id_ancoraggio = ?;", parametri)
+
+        try:
+            self.db_manager_setting.execute_unit_of_work(segna)
+        except Exception as e:
+            raise Exception(f"BackEnd: segna_obsoleti: Error marking stale anchors: {str(e)}")
+        logger.info(f"BackEnd: segna_obsoleti: Marked {len(id_ancoraggi)} anchors as stale.")
+
+    def get_prova(self, id_operazione: int):
+        query = """
+        SELECT Ancoraggio.Id_batch, Ancoraggio.Radice, Prova_ancoraggio.Foglia, Prova_ancoraggio.Prova,
+               Operazione.Id_operazione, Operazione.Id_azienda, Operazione.Id_prodotto,
+               Operazione.Data_operazione, Operazione.Consumo_CO2, Operazione.Operazione
+        FROM Prova_ancoraggio
+        JOIN Ancoraggio ON Ancoraggio.Id_ancoraggio = Prova_ancoraggio.Id_ancoraggio
+        JOIN Operazione ON Operazione.Id_operazione = Prova_ancoraggio.Id_operazione
+        WHERE Prova_ancoraggio.Id_operazione = ?;
+        """
+        riga = self.db_manager_setting.fetch_one(query, (id_operazione,))
+        if riga is None:
+            return None
+        return riga[0], riga[1], riga[2], riga[3], tuple(riga[4:])
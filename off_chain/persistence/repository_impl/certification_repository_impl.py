@@ -13,15 +13,10 @@ class CertificationRepositoryImpl(CertificationRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(CertificationRepositoryImpl, cls).__new__(cls)
-            cls._instance.db_manager_setting = DatabaseManagerSetting()
-            logger.info("BackEnd: Successfully initializing the instance for CertificationRepositoryImpl.")
-        return cls._instance
+    # Numero massimo di parametri per query (limite storico di SQLite)
+    _MAX_PARAMETRI = 900
 
-    def get_certifications_by_product_interface(self, prodotto: int) -> list:
-        query = """
+    _QUERY_CERTIFICAZIONI_BY_PRODOTTO = """
         SELECT 
             Certificato.Id_certificato,
             Prodotto.Nome,
@@ -33,21 +28,44 @@ class CertificationRepositoryImpl(CertificationRepository, ABC):
         JOIN Prodotto ON Certificato.Id_prodotto = Prodotto.Id_prodotto
         WHERE Certificato.Id_prodotto = ?;
         """
-        return self.db_manager_setting.fetch_query(query, (prodotto,))
 
-    def get_numero_certificazioni(self, id_azienda: int) -> int:
-        query = """
+    _QUERY_NUMERO_CERTIFICAZIONI = """
         SELECT COUNT(*) FROM Certificato WHERE Id_azienda_certificatore = ?;
         """
-        return self.db_manager_setting.fetch_query(query, (id_azienda,))[0]
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CertificationRepositoryImpl, cls).__new__(cls)
+            cls._instance.db_manager_setting = DatabaseManagerSetting()
+            logger.info("BackEnd: Successfully initializing the instance for CertificationRepositoryImpl.")
+        return cls._instance
+
+    def get_certifications_by_product_interface(self, prodotto: int) -> list:
+        return self.db_manager_setting.fetch_query(self._QUERY_CERTIFICAZIONI_BY_PRODOTTO, (prodotto,))
+
+    def get_numero_certificazioni(self, id_azienda: int) -> int:
+        return self.db_manager_setting.fetch_query(self._QUERY_NUMERO_CERTIFICAZIONI, (id_azienda,))[0]
 
     def is_certificato(self, id_prodotto: int) -> bool:
         query = """
-        SELECT * FROM Certificato WHERE Id_prodotto = ?;
+        SELECT EXISTS (SELECT 1 FROM Certificato WHERE Id_prodotto = ?);
         """
-        if not self.db_manager_setting.fetch_query(query, (id_prodotto,)):
-            return False
-        return True
+        return bool(self.db_manager_setting.fetch_one(query, (id_prodotto,))[0])
+
+    def are_certificati(self, prodotti: [int]) -> set:
+        """
+        Restituisce l'insieme dei prodotti certificati tra quelli indicati, con una query per blocco di id.
+        """
+        certificati = set()
+        prodotti = list(dict.fromkeys(prodotti))
+        for i in range(0, len(prodotti), self._MAX_PARAMETRI):
+            blocco = prodotti[i:i + self._MAX_PARAMETRI]
+            query = f"""
+            SELECT DISTINCT Id_prodotto FROM Certificato
+            WHERE Id_prodotto IN ({", ".join("?" * len(blocco))});
+            """
+            certificati.update(riga[0] for riga in self.db_manager_setting.fetch_query(query, tuple(blocco)))
+        return certificati
 
     def inserisci_certificato(self, prodotto: int, tipo: str, azienda: int, data: datetime):
         query = """
@@ -57,16 +75,4 @@ class CertificationRepositoryImpl(CertificationRepository, ABC):
         self.db_manager_setting.execute_query(query, (prodotto, tipo, azienda, data))
     # Restituisce la certificazione del prodotto selezionato
     def get_certificazione_by_prodotto(self, prodotto):
-        query = """
-        SELECT 
-            Certificato.Id_certificato,
-            Prodotto.Nome,
-            Certificato.Descrizione,
-            Azienda.Nome,
-            Certificato.Data
-        FROM Certificato
-        JOIN Azienda ON Certificato.Id_azienda_certificatore = Azienda.Id_azienda
-        JOIN Prodotto ON Certificato.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Certificato.Id_prodotto = ?;
-        """
-        return self.db_manager_setting.execute_query(query, (prodotto,))
\ No newline at end of file
+        return self.db_manager_setting.execute_query(self._QUERY_CERTIFICAZIONI_BY_PRODOTTO, (prodotto,))
\ No newline at end of file
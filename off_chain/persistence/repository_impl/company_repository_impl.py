@@ -13,6 +13,16 @@ class CompanyRepositoryImpl(CompanyRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
+    _QUERY_RIVENDITORI = """
+        SELECT Id_azienda, Tipo, Indirizzo, Nome 
+        FROM Azienda WHERE Tipo = 'Rivenditore'
+        """
+
+    # Filtri delle liste di aziende, in coda a _QUERY_AZIENDE_CON_SALDO
+    _FILTRO_AZIENDE = "WHERE Azienda.Tipo != 'Certificatore'"
+    _FILTRO_AZIENDE_BY_TIPO = _FILTRO_AZIENDE + " AND Azienda.Tipo = ?"
+    _FILTRO_AZIENDE_BY_NOME = _FILTRO_AZIENDE + " AND Azienda.Nome = ?"
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(CompanyRepositoryImpl, cls).__new__(cls)
@@ -21,117 +31,48 @@ class CompanyRepositoryImpl(CompanyRepository, ABC):
         return cls._instance
 
     def get_lista_rivenditori(self) -> list:
-        query = """
-        SELECT Id_azienda, Tipo, Indirizzo, Nome 
-        FROM Azienda WHERE Tipo = "Rivenditore"
-        """
-        return self.db_manager_setting.fetch_query(query)
+        return self.db_manager_setting.fetch_query(self._QUERY_RIVENDITORI)
 
-    def get_lista_aziende(self) -> list:
-        query = """
-        SELECT Id_azienda, Tipo, Indirizzo, Nome 
-        FROM Azienda WHERE Tipo != "Certificatore"
-        """
-        aziende = self.db_manager_setting.fetch_query(query)
-        lista_con_co2 = []
-        for azienda in aziende:
-            query_co2_consumata = """
-            SELECT SUM(Consumo_CO2) FROM Operazione WHERE Id_azienda = ?;
-            """
-            query_co2_compensata = """
-            SELECT SUM(Co2_compensata) FROM Azioni_compensative WHERE Id_azienda = ?;
-            """
-            if not self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]:
-                co2_consumata = 0
-            else:
-                co2_consumata = self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]
-            if not self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]:
-                co2_compensata = 0
-            else:
-                co2_compensata = self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]
-            lista_con_co2.append((azienda, co2_consumata, co2_compensata))
-        return lista_con_co2
-
-    def get_lista_aziende_ordinata(self) -> list:
-        lista_ordinata = sorted(self.get_lista_aziende(), key=lambda x: (x[2] or 0) - (x[1] or 0),
-                                reverse=True)
-        return lista_ordinata
-
-    def get_lista_aziende_filtrata_tipo(self, tipo: str) -> list:
-        query = """
-        SELECT Id_azienda, Tipo, Indirizzo, Nome 
-        FROM Azienda WHERE Tipo != "Certificatore"
-        AND Tipo = ?
+    # Le aziende con il saldo letto dal registro Saldo_CO2, mantenuto dai trigger del database
+    _QUERY_AZIENDE_CON_SALDO = """
+        SELECT Azienda.Id_azienda, Azienda.Tipo, Azienda.Indirizzo, Azienda.Nome,
+               Saldo_CO2.Co2_consumata, Saldo_CO2.Co2_compensata
+        FROM Azienda
+        JOIN Saldo_CO2 ON Saldo_CO2.Id_azienda = Azienda.Id_azienda
         """
-        aziende = self.db_manager_setting.fetch_query(query, (tipo,))
-        lista_con_co2 = []
-        for azienda in aziende:
-            query_co2_consumata = """
-            SELECT SUM(Consumo_CO2) FROM Operazione WHERE Id_azienda = ?;
-            """
-            query_co2_compensata = """
-            SELECT SUM(Co2_compensata) FROM Azioni_compensative WHERE Id_azienda = ?;
-            """
-            if not self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]:
-                co2_consumata = 0
-            else:
-                co2_consumata = self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]
-            if not self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]:
-                co2_compensata = 0
-            else:
-                co2_compensata = self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]
-            lista_con_co2.append((azienda, co2_consumata, co2_compensata))
-        return lista_con_co2
-
-    def get_azienda_by_nome(self, nome: str) -> list:
-        query = """
-        SELECT Id_azienda, Tipo, Indirizzo, Nome 
-        FROM Azienda WHERE Tipo != "Certificatore"
-        AND Nome = ?
-        """
-        aziende = self.db_manager_setting.fetch_query(query, (nome,))
-        lista_con_co2 = []
-        for azienda in aziende:
-            query_co2_consumata = """
-            SELECT SUM(Consumo_CO2) FROM Operazione WHERE Id_azienda = ?;
-            """
-            query_co2_compensata = """
-            SELECT SUM(Co2_compensata) FROM Azioni_compensative WHERE Id_azienda = ?;
-            """
-            if not self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]:
-                co2_consumata = 0
-            else:
-                co2_consumata = self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]
-            if not self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]:
-                co2_compensata = 0
-            else:
-                co2_compensata = self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]
-            lista_con_co2.append((azienda, co2_consumata, co2_compensata))
-        return lista_con_co2
+
+    @classmethod
+    def _query_aziende_con_saldo(cls, filtro: str = "", ordine: str = "") -> str:
+        return cls._QUERY_AZIENDE_CON_SALDO + filtro + " ORDER BY " + ordine + "Azienda.Id_azienda"
+
+    def _get_aziende_con_saldo(self, filtro: str = "", params: tuple = (), ordine: str = "",
+                               limit: int = None, offset: int = 0) -> list:
+        query = self._query_aziende_con_saldo(filtro, ordine)
+        righe = self.db_manager_setting.fetch_page(query, params, limit, offset)
+        return [(riga[:4], riga[4], riga[5]) for riga in righe]
+
+    def get_lista_aziende(self, limit: int = None, offset: int = 0) -> list:
+        return self._get_aziende_con_saldo(self._FILTRO_AZIENDE, limit=limit, offset=offset)
+
+    def get_lista_aziende_ordinata(self, limit: int = None, offset: int = 0) -> list:
+        return self._get_aziende_con_saldo(
+            self._FILTRO_AZIENDE,
+            ordine="(Saldo_CO2.Co2_compensata - Saldo_CO2.Co2_consumata) DESC, ",
+            limit=limit, offset=offset
+        )
+
+    def get_lista_aziende_filtrata_tipo(self, tipo: str, limit: int = None, offset: int = 0) -> list:
+        return self._get_aziende_con_saldo(
+            self._FILTRO_AZIENDE_BY_TIPO, (tipo,), limit=limit, offset=offset
+        )
+
+    def get_azienda_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
+        return self._get_aziende_con_saldo(
+            self._FILTRO_AZIENDE_BY_NOME, (nome,), limit=limit, offset=offset
+        )
 
     def get_azienda_by_id(self, id_: int) -> list:
-        query = """
-        SELECT Id_azienda, Tipo, Indirizzo, Nome FROM Azienda WHERE Id_azienda = ?;
-        """
-        aziende = self.db_manager_setting.fetch_query(query, (id_,))
-        lista_con_co2 = []
-        for azienda in aziende:
-            query_co2_consumata = """
-            SELECT SUM(Consumo_CO2) FROM Operazione WHERE Id_azienda = ?;
-            """
-            query_co2_compensata = """
-            SELECT SUM(Co2_compensata) FROM Azioni_compensative WHERE Id_azienda = ?;
-            """
-            if not self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]:
-                co2_consumata = 0
-            else:
-                co2_consumata = self.db_manager_setting.fetch_query(query_co2_consumata, (azienda[0],))[0][0]
-            if not self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]:
-                co2_compensata = 0
-            else:
-                co2_compensata = self.db_manager_setting.fetch_query(query_co2_compensata, (azienda[0],))[0][0]
-            lista_con_co2.append((azienda, co2_consumata, co2_compensata))
-        return lista_con_co2
+        return self._get_aziende_con_saldo("WHERE Azienda.Id_azienda = ?", (id_,))
 
     def get_azienda(self, n):
         return self.get_lista_aziende()[n]
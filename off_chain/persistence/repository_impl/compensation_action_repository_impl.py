@@ -9,6 +9,11 @@ class CompensationActionRepositoryImpl(CompensationActionRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
+    _QUERY_AZIONI_PER_DATA = """
+        SELECT * FROM Azioni_compensative
+        WHERE Id_azienda = ? AND Data BETWEEN ? AND ?;
+        """
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(CompensationActionRepositoryImpl, cls).__new__(cls)
@@ -23,11 +28,7 @@ class CompensationActionRepositoryImpl(CompensationActionRepository, ABC):
         return self.db_manager_setting.fetch_query(query, (id_azienda,))
 
     def get_lista_azioni_per_data(self, id_azienda: int, data_start: datetime, data_end: datetime) -> list:
-        query = """
-        SELECT * FROM Azioni_compensative
-        WHERE Id_azienda = ? AND Data BETWEEN ? AND ?;
-        """
-        return self.db_manager_setting.fetch_query(query, (id_azienda, data_start, data_end))
+        return self.db_manager_setting.fetch_query(self._QUERY_AZIONI_PER_DATA, (id_azienda, data_start, data_end))
 
     def get_lista_azioni_ordinata(self, id_azienda: int) -> list:
         query = """
@@ -6,6 +6,7 @@ from domain.exception.database_exceptions import UniqueConstraintError
 from domain.repository.credential_repository import CredentialRepository
 from configuration.db_manager_setting import DatabaseManagerSetting
 from configuration.log_load_setting import logger
+from configuration.password_hash_setting import PasswordHashSetting
 
 """
 class "CredentialRepositoryImpl(CredentialRepository, ABC)"
@@ -47,6 +48,15 @@ class CredentialRepositoryImpl(CredentialRepository, ABC):
                 This message will only appear the first time the instance is created.                
     
     """""
+
+    # Credenziale e azienda di un username, tramite l'indice UNIQUE su Username
+    _QUERY_CREDENZIALE_BY_USERNAME = """
+            SELECT Credenziali.*, Azienda.*
+            FROM Credenziali
+            LEFT JOIN Azienda ON Azienda.Id_credenziali = Credenziali.Id_credenziali
+            WHERE Credenziali.Username = ?
+            """
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(CredentialRepositoryImpl, cls).__new__(cls)
@@ -60,10 +70,32 @@ class CredentialRepositoryImpl(CredentialRepository, ABC):
         if not result:
             logger.warning("The credenziali table is empty or the query returned no results.")
         else:
-            logger.info(f"Credenziali obtained in get_lista_credenziali: {result}")
+            logger.info(f"Credenziali obtained in get_lista_credenziali: {len(result)} rows")
 
         return result
 
+    def get_credenziale_by_username(self, username: str):
+        """
+        Returns the credential of a username together with its company in one query,
+        through the UNIQUE index on Username: (Id_credenziali, Password, totp_secret, riga Azienda).
+        Returns None if the username does not exist.
+        """
+        riga = self.db_manager_setting.fetch_one(self._QUERY_CREDENZIALE_BY_USERNAME, (username,))
+        if not riga:
+            return None
+        azienda = riga[4:] if riga[4] is not None else None
+        return riga[0], riga[2], riga[3], azienda
+
+    def aggiorna_password(self, id_credenziali: int, password_hash: str):
+        query = """
+            UPDATE Credenziali SET Password = ? WHERE Id_credenziali = ?
+            """
+
+        def aggiorna(cursor):
+            cursor.execute(query, (password_hash, id_credenziali))
+
+        self.db_manager_setting.execute_unit_of_work(aggiorna)
+
     def get_azienda_by_id(self, id_: int) -> list:
         query = """
             SELECT * FROM Azienda WHERE Id_azienda = ?
@@ -86,33 +118,29 @@ class CredentialRepositoryImpl(CredentialRepository, ABC):
             if not re.search(r'\W', password):  # Almeno un carattere speciale
                 raise PasswordWeakError("La password deve contenere almeno un carattere speciale (!, @, #, etc.).")
 
-            # Avvia la transazione
-            # self.db_manager_setting.cur.execute("BEGIN TRANSACTION;")
-
-            # Inserimento delle credenziali
+            # Credenziali e azienda vengono inserite nella stessa transazione,
+            # la password viene salvata solo come hash
+            password_hash = PasswordHashSetting.hash_password(password)
             query_credenziali = """
                     INSERT INTO Credenziali (Username, Password, totp_secret)
                     VALUES (?, ?, ?);
                     """
-            try:
-                self.db_manager_setting.execute_query(query_credenziali, (username, password, secret_key))
-            except sqlite3.IntegrityError:
-                raise UniqueConstraintError("Errore: Username già esistente.")
-
-            # Recupero dell'ID delle credenziali appena inserite
-            id_credenziali = self.db_manager_setting.fetch_one("SELECT last_insert_rowid();")[0]
-            if id_credenziali is None:
-                raise Exception("Errore nel recupero dell'ID delle credenziali.")
-
-            # Inserimento dell'azienda con l'ID delle credenziali
             query_azienda = """
                     INSERT INTO Azienda (Id_credenziali, Tipo, Nome, Indirizzo)
                     VALUES (?, ?, ?, ?);
                     """
-            self.db_manager_setting.execute_query(query_azienda, (id_credenziali, tipo, username, indirizzo,))
 
-            # Commit della transazione
-            # self.conn.commit()
+            def inserisci(cursor):
+                try:
+                    id_inserito = cursor.execute(query_credenziali, (username, password_hash, secret_key)).lastrowid
+                except sqlite3.IntegrityError:
+                    return None
+                cursor.execute(query_azienda, (id_inserito, tipo, username, indirizzo,))
+                return id_inserito
+
+            id_credenziali = self.db_manager_setting.execute_unit_of_work(inserisci)
+            if id_credenziali is None:
+                raise UniqueConstraintError("Errore: Username già esistente.")
 
             return id_credenziali  # Può essere utile restituire l'ID
 
@@ -1,4 +1,5 @@
 import datetime
+import sqlite3
 from abc import ABC
 from configuration.db_manager_setting import DatabaseManagerSetting
 from configuration.log_load_setting import logger
@@ -10,66 +11,70 @@ class OperationRepositoryImpl(OperationRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(OperationRepositoryImpl, cls).__new__(cls)
-            cls._instance.db_manager_setting = DatabaseManagerSetting()
-            logger.info("BackEnd: Successfully initializing the instance for OperationRepositoryImpl.")
-        return cls._instance
-
-    def get_operazioni_ordinate_co2(self, azienda: int) -> list:
-        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda ordinate per co2 consumata """
-        query = """
+    # Query delle liste di operazioni di un'azienda (anche verificate da DatabaseMigrations.verifica_piani_query)
+    _QUERY_OPERAZIONI_ORDINATE_CO2 = """
         SELECT Operazione.Id_operazione, Prodotto.Id_prodotto, Prodotto.Nome, Prodotto.Quantita, Operazione.Data_operazione, Operazione.Consumo_CO2, Operazione.Operazione
         FROM Operazione JOIN Prodotto
         ON Operazione.Id_prodotto = Prodotto.Id_prodotto
         WHERE Operazione.Id_azienda = ?
-        ORDER BY Operazione.Consumo_CO2 ASC;
+        ORDER BY Operazione.Consumo_CO2 ASC, Operazione.Id_operazione;
         """
-        return self.db_manager_setting.fetch_query(query, (azienda,))
 
-    def get_operazioni_by_data(self, azienda: int, d1: datetime, d2: datetime) -> list:
-        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda filtrate per data """
-        query = """
+    _QUERY_OPERAZIONI_BY_DATA = """
         SELECT Operazione.Id_operazione, Prodotto.Id_prodotto, Prodotto.Nome, Prodotto.Quantita, Operazione.Data_operazione, Operazione.Consumo_CO2, Operazione.Operazione
         FROM Operazione JOIN Prodotto
         ON Operazione.Id_prodotto = Prodotto.Id_prodotto
         WHERE Operazione.Id_azienda = ?
-        AND Operazione.Data_operazione BETWEEN ? AND ?;
+        AND Operazione.Data_operazione BETWEEN ? AND ?
+        ORDER BY Operazione.Id_operazione;
         """
-        return self.db_manager_setting.fetch_query(query, (azienda, d1, d2))
 
-    def get_operazioni_by_azienda(self, azienda: int) -> list:
-        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda """
-        query = """
+    _QUERY_OPERAZIONI_BY_AZIENDA = """
         SELECT Operazione.Id_operazione, Prodotto.Id_prodotto, Prodotto.Nome, Prodotto.Quantita, 
         Operazione.Data_operazione, Operazione.Consumo_CO2, Operazione.Operazione
         FROM Operazione JOIN Prodotto
         ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Operazione.Id_azienda = ?;
+        WHERE Operazione.Id_azienda = ?
+        ORDER BY Operazione.Id_operazione;
         """
-        return self.db_manager_setting.fetch_query(query, (azienda,))
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(OperationRepositoryImpl, cls).__new__(cls)
+            cls._instance.db_manager_setting = DatabaseManagerSetting()
+            logger.info("BackEnd: Successfully initializing the instance for OperationRepositoryImpl.")
+        return cls._instance
+
+    def get_operazioni_ordinate_co2(self, azienda: int, limit: int = None, offset: int = 0) -> list:
+        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda ordinate per co2 consumata """
+        return self.db_manager_setting.fetch_page(self._QUERY_OPERAZIONI_ORDINATE_CO2, (azienda,), limit, offset)
+
+    def get_operazioni_by_data(self, azienda: int, d1: datetime, d2: datetime, limit: int = None,
+                               offset: int = 0) -> list:
+        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda filtrate per data """
+        return self.db_manager_setting.fetch_page(self._QUERY_OPERAZIONI_BY_DATA, (azienda, d1, d2), limit, offset)
+
+    def get_operazioni_by_azienda(self, azienda: int, limit: int = None, offset: int = 0) -> list:
+        """Restituisce la lista di tutte le operazioni effettuate da una certa azienda """
+        return self.db_manager_setting.fetch_page(self._QUERY_OPERAZIONI_BY_AZIENDA, (azienda,), limit, offset)
 
     def inserisci_operazione_azienda_rivenditore(self, azienda: int, prodotto: int, data: datetime, co2: float,
                                                  evento: str):
         """
         Inserts a new operation for a retailer and updates the product status in a single transaction.
         """
-        query1 = """
-            INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
-            VALUES (?, ?, ?, ?, ?);
-        """
-        params1 = (azienda, prodotto, data, co2, evento)
 
-        query2 = """
-            UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;
-        """
-        params2 = (111, prodotto)
+        def inserisci(cursor):
+            cursor.execute("""
+                INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
+                VALUES (?, ?, ?, ?, ?);
+            """, (azienda, prodotto, data, co2, evento))
+            cursor.execute("""
+                UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;
+            """, (111, prodotto))
 
         try:
-            # Ejecutar ambas consultas dentro de la misma transacción
-            self.db_manager_setting.execute_query(query1, params1)
-            self.db_manager_setting.execute_query(query2, params2)
+            self.db_manager_setting.execute_unit_of_work(inserisci)
         except Exception as e:
             raise Exception(f"BackEnd: inserisci_operazione_azienda_rivenditore: Error inserting retailer operation: {str(e)}")
 
@@ -81,57 +86,39 @@ class OperationRepositoryImpl(OperationRepository, ABC):
 
         if evento == "Trasformazione":
             # In questo caso, il parametro prodotto è l'id del prodotto che seleziono
-            queries = [
-                ("""
-                INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
-                VALUES (?, ?, ?, ?, ?);
-                """, (azienda, prodotto[0], data, co2, evento)),
-
-                ("""
-                UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;
+            def inserisci(cursor):
+                cursor.execute("""
+                    INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
+                    VALUES (?, ?, ?, ?, ?);
+                """, (azienda, prodotto[0], data, co2, evento))
+                cursor.execute("""
+                    UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;
                 """, (101, prodotto[0]))
-            ]
-
-            try:
-                self.db_manager_setting.execute_query(queries, multiple=True)
-            except Exception as e:
-                raise Exception(f"Errore durante l'inserimento: {str(e)}")
 
         else:
             # In questo caso, il parametro prodotto è il nome del prodotto che seleziono.
-            queries = [
-                ("""
-                INSERT INTO Prodotto (Nome, Quantita, Stato) VALUES (?, ?, ?);
+            def inserisci(cursor):
+                cursor.execute("""
+                    INSERT INTO Prodotto (Nome, Quantita, Stato) VALUES (?, ?, ?);
                 """, (prodotto, quantita, 10))
-            ]
+                prodotto_id = cursor.lastrowid  # ID del prodotto inserito, letto nella stessa transazione
 
-            try:
-                self.db_manager_setting.execute_query(queries[0][0], queries[0][1])
-                prodotto_id = self.db_manager_setting.cursor.lastrowid  # Ottieni l'ID del prodotto inserito
-
-                queries.extend([
-                    ("""
+                cursor.execute("""
                     INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
                     VALUES (?, ?, ?, ?, ?);
-                    """, (azienda, prodotto_id, data, co2, evento)),
-
-                    ("""
-                    INSERT INTO Composizione VALUES(?, ?);
-                    """, (prodotto_id, prodotto_id))
-                ])
+                """, (azienda, prodotto_id, data, co2, evento))
+                cursor.executemany(
+                    "INSERT INTO Composizione VALUES(?, ?);",
+                    [(prodotto_id, prodotto_id)] + [(prodotto_id, mp) for mp in materie_prime]
+                )
+                cursor.executemany(
+                    "UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;", [(110, mp) for mp in materie_prime]
+                )
 
-                for mp in materie_prime:
-                    queries.append((
-                        "INSERT INTO Composizione VALUES(?, ?);", (prodotto_id, mp)
-                    ))
-                    queries.append((
-                        "UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;", (110, mp)
-                    ))
-
-                self.db_manager_setting.execute_query(queries, multiple=True)
-
-            except Exception as e:
-                raise Exception(f"Errore durante l'inserimento: {str(e)}")
+        try:
+            self.db_manager_setting.execute_unit_of_work(inserisci)
+        except Exception as e:
+            raise Exception(f"Errore durante l'inserimento: {str(e)}")
 
     def inserisci_operazione_azienda_trasporto(self, azienda: int, prodotto: int, data: datetime, co2: float,
                                                evento: str, nuovo_stato: int):
@@ -139,53 +126,122 @@ class OperationRepositoryImpl(OperationRepository, ABC):
            Inserts a transport operation and updates the product status.
            If the new status is 11 (Retailer), inserts a record in SFS_COMPOSITION.
            """
-        queries = [
+
+        def inserisci(cursor):
             # Insert operation into SFS_OPERATION
-            ("""
+            cursor.execute("""
                     INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
                     VALUES (?, ?, ?, ?, ?);
-                    """, (azienda, prodotto, data, co2, evento)),
+                    """, (azienda, prodotto, data, co2, evento))
 
             # Update product status in SFS_PRODUCT
-            ("""
+            cursor.execute("""
                     UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;
                     """, (nuovo_stato, prodotto))
-        ]
 
-        if nuovo_stato == 11:  # If the destination is a retailer
-            queries.append((
-                """
-                INSERT OR IGNORE INTO Composizione VALUES(?, ?)                    
-                """, (prodotto, prodotto)
-            ))
+            if nuovo_stato == 11:  # If the destination is a retailer
+                cursor.execute("""
+                INSERT OR IGNORE INTO Composizione VALUES(?, ?)
+                """, (prodotto, prodotto))
 
         # Esegui tutte le query in un'unica transazione
-        self.db_manager_setting.execute_query(queries, multiple=True)
+        self.db_manager_setting.execute_unit_of_work(inserisci)
         logger.info(f"Operazione inserita e stato aggiornato con successo per il prodotto {prodotto}.")
 
     def inserisci_operazione_azienda_agricola(self, nome: str, quantita: int, azienda: int, data: datetime, co2: float,
                                               evento: str):
         """
-        Inserts a new agricultural product and logs the operation.
+        Inserts a new agricultural product and logs the operation in a single transaction.
         """
-        # Inserisci il prodotto
-        query_prodotto = """
-        INSERT INTO Prodotto (Nome, Quantita, Stato) VALUES (?, ?, ?);
-        """
-        params_prodotto = (nome, quantita, 0)
 
-        # Esegui l'inserimento del prodotto per ottenere l'ID generato
-        self.db_manager_setting.execute_query(query_prodotto, params_prodotto)
-        prodotto_id = self.db_manager_setting.cursor.lastrowid  # Ottieni l'ID del prodotto appena creato
+        def inserisci(cursor):
+            # Inserisci il prodotto
+            cursor.execute("""
+            INSERT INTO Prodotto (Nome, Quantita, Stato) VALUES (?, ?, ?);
+            """, (nome, quantita, 0))
+            prodotto_id = cursor.lastrowid  # ID del prodotto appena creato, letto nella stessa transazione
 
-        # Inserisci l'operazione
-        query_operazione = """
-        INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione) 
-        VALUES (?, ?, ?, ?, ?);
-        """
-        params_operazione = (azienda, prodotto_id, data, co2, evento)
+            # Inserisci l'operazione
+            cursor.execute("""
+            INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione) 
+            VALUES (?, ?, ?, ?, ?);
+            """, (azienda, prodotto_id, data, co2, evento))
+            return prodotto_id
 
-        # Esegui l'inserimento dell'operazione
-        self.db_manager_setting.execute_query(query_operazione, params_operazione)
+        prodotto_id = self.db_manager_setting.execute_unit_of_work(inserisci)
 
         logger.info(f"Prodotto inserito con ID {prodotto_id} e operazione registrata con successo.")
+
+    def inserisci_operazioni_batch(self, azienda: int, operazioni: list) -> list:
+        """
+        Inserts a block of already validated operations in a single transaction with executemany.
+        Each operation is a dict with the keys evento, data, co2, prodotto (None for a new product),
+        nome, quantita, stato_iniziale, nuovo_stato, materie_prime and composizione.
+        If the block fails, it is retried row by row with a savepoint each,
+        so only the faulty rows are discarded. Returns the list of (posizione, errore).
+        """
+        try:
+            self.db_manager_setting.execute_unit_of_work(
+                lambda cursor: self._scrivi_operazioni(cursor, azienda, operazioni)
+            )
+            return []
+        except Exception as e:
+            logger.warning(f"BackEnd: inserisci_operazioni_batch: Block of {len(operazioni)} rows failed ({e}), "
+                           f"retrying row by row.")
+
+        def scrivi_per_riga(cursor):
+            errori = []
+            for posizione, operazione in enumerate(operazioni):
+                cursor.execute("SAVEPOINT riga;")
+                try:
+                    self._scrivi_operazioni(cursor, azienda, [operazione])
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO riga;")
+                    errori.append((posizione, str(e)))
+                cursor.execute("RELEASE riga;")
+            return errori
+
+        return self.db_manager_setting.execute_unit_of_work(scrivi_per_riga)
+
+    @staticmethod
+    def _scrivi_operazioni(cursor, azienda: int, operazioni: list):
+        """
+        Writes the operations with one executemany per statement.
+        The ids of the new products are allocated in advance inside the write transaction.
+        """
+        nuovi = [operazione for operazione in operazioni if operazione["prodotto"] is None]
+        id_nuovi = iter(())
+        if nuovi:
+            cursor.execute("""
+            SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'Prodotto'), 0),
+                       COALESCE((SELECT MAX(Id_prodotto) FROM Prodotto), 0));
+            """)
+            primo_id = cursor.fetchone()[0] + 1
+            id_nuovi = iter(range(primo_id, primo_id + len(nuovi)))
+
+        prodotti, righe_operazione, stati, composizioni, materie_prime = [], [], [], [], []
+        for operazione in operazioni:
+            id_prodotto = operazione["prodotto"]
+            if id_prodotto is None:
+                id_prodotto = next(id_nuovi)
+                prodotti.append((id_prodotto, operazione["nome"], operazione["quantita"],
+                                 operazione["stato_iniziale"]))
+            righe_operazione.append((azienda, id_prodotto, operazione["data"], operazione["co2"],
+                                     operazione["evento"]))
+            if operazione["nuovo_stato"] is not None:
+                stati.append((operazione["nuovo_stato"], id_prodotto))
+            if operazione["composizione"]:
+                composizioni.append((id_prodotto, id_prodotto))
+            for mp in operazione["materie_prime"]:
+                composizioni.append((id_prodotto, mp))
+                materie_prime.append((110, mp))
+
+        cursor.executemany("INSERT INTO Prodotto (Id_prodotto, Nome, Quantita, Stato) VALUES (?, ?, ?, ?);",
+                           prodotti)
+        cursor.executemany("""
+        INSERT INTO Operazione (Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione)
+        VALUES (?, ?, ?, ?, ?);
+        """, righe_operazione)
+        cursor.executemany("UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;", stati)
+        cursor.executemany("INSERT OR IGNORE INTO Composizione VALUES(?, ?);", composizioni)
+        cursor.executemany("UPDATE Prodotto SET Stato = ? WHERE Id_prodotto = ?;", materie_prime)
@@ -11,6 +11,62 @@ class ProductRepositoryImpl(ProductRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
+    # Numero massimo di parametri per query (limite storico di SQLite)
+    _MAX_PARAMETRI = 900
+
+    # Prodotti sugli scaffali con la CO2 consumata da tutte le operazioni della loro composizione
+    # e il flag di certificazione, calcolato con EXISTS nella stessa query.
+    # Le varianti delle liste aggiungono i propri filtri in coda alla clausola WHERE.
+    _QUERY_PRODOTTI_CON_CO2 = """
+        SELECT
+            Prodotto.Id_prodotto,
+            Prodotto.Nome,
+            Prodotto.Quantita,
+            Prodotto.Stato,
+            Azienda.Nome,
+            COALESCE(SUM(Storico.Consumo_CO2), 0) AS Totale_CO2,
+            EXISTS (
+                SELECT 1 FROM Certificato WHERE Certificato.Id_prodotto = Prodotto.Id_prodotto
+            ) AS Certificato
+        FROM Operazione
+        JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
+        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
+        LEFT JOIN Composizione ON Composizione.Prodotto = Prodotto.Id_prodotto
+        LEFT JOIN Operazione AS Storico ON Storico.Id_prodotto = Composizione.Materia_prima
+        WHERE Operazione.Operazione = 'Messo sugli scaffali'
+        """
+
+    _FILTRO_PRODOTTI_BY_NOME = """
+        AND Prodotto.Nome = ?
+        """
+
+    _FILTRO_PRODOTTI_BY_RIVENDITORE = """
+        AND Operazione.Id_azienda = ?
+        """
+
+    # Nomi per il completamento del filtro: pochi valori distinti invece di tutte le righe
+    _QUERY_NOMI_PRODOTTI = """
+        SELECT DISTINCT Prodotto.Nome
+        FROM Operazione
+        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
+        WHERE Operazione.Operazione = 'Messo sugli scaffali'
+        ORDER BY Prodotto.Nome
+        """
+
+    _QUERY_PRODOTTI_TO_RIVENDITORE = """
+        SELECT Id_prodotto, Nome, Quantita FROM Prodotto WHERE Stato = 11;
+        """
+
+    _QUERY_MATERIE_PRIME = """
+        SELECT Prodotto.Id_prodotto, Prodotto.Nome, Prodotto.Quantita
+        FROM Prodotto
+        JOIN Operazione
+        ON Prodotto.Id_prodotto = Operazione.Id_prodotto
+        WHERE Operazione.Operazione = 'Trasformazione'
+        AND Operazione.Id_azienda = ?
+        ORDER BY Operazione.Data_operazione DESC;
+        """
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ProductRepositoryImpl, cls).__new__(cls)
@@ -18,7 +74,7 @@ class ProductRepositoryImpl(ProductRepository, ABC):
             logger.info("BackEnd: Successfully initializing the instance for ProductRepositoryImpl.")
         return cls._instance
 
-    def get_storico_prodotto(self, prodotto: int) -> list:
+    def get_storico_prodotto(self, prodotto: int, limit: int = None, offset: int = 0) -> list:
         query = """
         SELECT
             Operazione.Id_operazione,
@@ -34,157 +90,125 @@ class ProductRepositoryImpl(ProductRepository, ABC):
             SELECT Materia_prima
             FROM Composizione
             WHERE Prodotto = ?
-        );
+        )
+        ORDER BY Operazione.Id_operazione;
+            """
+        return self.db_manager_setting.fetch_page(query, (prodotto,), limit, offset)
+
+    @staticmethod
+    def _query_co2_consumata(numero_prodotti: int) -> str:
+        return f"""
+            SELECT Composizione.Prodotto, SUM(Operazione.Consumo_CO2)
+            FROM Composizione
+            JOIN Operazione ON Operazione.Id_prodotto = Composizione.Materia_prima
+            WHERE Composizione.Prodotto IN ({", ".join("?" * numero_prodotti)})
+            GROUP BY Composizione.Prodotto;
             """
-        return self.db_manager_setting.fetch_query(query, (prodotto,))
 
     def co2_consumata_prodotti(self, prodotti: [int]) -> list:
-        lista_con_co2 = []
-        for prodotto in prodotti:
-            #repo = ProductRepositoryImpl()
-            storico = self.get_storico_prodotto(prodotto[0])
-            totale_co2 = sum(t[4] for t in storico)
-            lista_con_co2.append((prodotto, totale_co2))
-        return lista_con_co2
-
-    def get_lista_prodotti(self) -> list:
-        query = """
-          SELECT
-                Prodotto.Id_prodotto,
-                Prodotto.Nome,
-                Prodotto.Quantita,
-                Prodotto.Stato,
-                Azienda.Nome
-            FROM Operazione
-            JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-            JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-            WHERE Operazione.Operazione = "Messo sugli scaffali";        
         """
-        return self.co2_consumata_prodotti(self.db_manager_setting.fetch_query(query))
-
-    def get_prodotti_ordinati_co2(self):
-        return sorted(self.get_lista_prodotti(), key=lambda x: x[1])
-
-    def get_prodotti_by_nome(self, nome: str) -> list:
-        query = """
-                SELECT
-                    Prodotto.Id_prodotto,
-                    Prodotto.Nome,
-                    Prodotto.Quantita,
-                    Prodotto.Stato,
-                    Azienda.Nome
-                FROM Operazione
-                JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-                JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-                WHERE Operazione.Operazione = "Messo sugli scaffali"
-                AND Prodotto.Nome = ?;
+        Associa a ogni riga prodotto la CO2 consumata lungo la sua filiera.
+        Il totale viene calcolato per tutti i prodotti con una sola query aggregata.
+        """
+        if not prodotti:
+            return []
+        totali = {}
+        ids = list({prodotto[0] for prodotto in prodotti})
+        for i in range(0, len(ids), self._MAX_PARAMETRI):
+            blocco = ids[i:i + self._MAX_PARAMETRI]
+            totali.update(self.db_manager_setting.fetch_query(self._query_co2_consumata(len(blocco)),
+                                                              tuple(blocco)))
+        return [(prodotto, totali.get(prodotto[0], 0)) for prodotto in prodotti]
+
+    @classmethod
+    def _query_prodotti_con_co2(cls, filtro: str = "", ordina_co2: bool = False) -> str:
+        query = cls._QUERY_PRODOTTI_CON_CO2 + filtro + """
+        GROUP BY Operazione.Id_operazione
+        """
+        if ordina_co2:
+            return query + """
+        ORDER BY Totale_CO2, Operazione.Id_operazione
+        """
+        return query + """
+        ORDER BY Operazione.Id_operazione
         """
-        return self.db_manager_setting.fetch_query(query, (nome,))
 
-    def get_lista_prodotti_by_rivenditore(self, rivenditore: int) -> list:
-        query = """
-        SELECT
-            Prodotto.Id_prodotto,
-            Prodotto.Nome,
-            Prodotto.Quantita,
-            Prodotto.Stato,
-            Azienda.Nome
-        FROM Operazione
-        JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Operazione.Operazione = "Messo sugli scaffali"
-        AND Operazione.Id_azienda = ?;
+    def _get_prodotti_con_co2(self, filtro: str = "", params: tuple = (), ordina_co2: bool = False,
+                              limit: int = None, offset: int = 0) -> list:
+        """
+        Restituisce i prodotti sugli scaffali come lista di (riga prodotto, co2 totale, certificato).
+        Righe, totali e certificazioni arrivano da un'unica query: join raggruppato su Composizione e Operazione.
+        Con limit viene restituita solo la pagina richiesta.
         """
-        return self.db_manager_setting.fetch_query(query, (rivenditore,))
+        righe = self.db_manager_setting.fetch_page(self._query_prodotti_con_co2(filtro, ordina_co2), params,
+                                                   limit, offset)
+        return [(riga[:5], riga[5], bool(riga[6])) for riga in righe]
 
-    def get_prodotti_certificati(self) -> list:
-        query = """
-        SELECT
-            Prodotto.Id_prodotto,
-            Prodotto.Nome,
-            Prodotto.Quantita,
-            Prodotto.Stato,
-            Azienda.Nome
-        FROM Operazione
-        JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Operazione.Operazione = "Messo sugli scaffali"
+    def get_lista_prodotti(self, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2(limit=limit, offset=offset)
+
+    def get_prodotti_ordinati_co2(self, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2(ordina_co2=True, limit=limit, offset=offset)
+
+    def get_prodotti_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2(self._FILTRO_PRODOTTI_BY_NOME, (nome,), limit=limit, offset=offset)
+
+    def get_lista_prodotti_by_rivenditore(self, rivenditore: int, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2(self._FILTRO_PRODOTTI_BY_RIVENDITORE, (rivenditore,),
+                                          limit=limit, offset=offset)
+
+    def get_prodotti_certificati(self, limit: int = None, offset: int = 0) -> list:
+        result = self._get_prodotti_con_co2("""
         AND Operazione.Id_prodotto IN (
             SELECT Id_prodotto FROM Certificato
-        );
-        """
-        #prodotti = self.db_manager_setting.fetch_query(query)
-        #logger.info(f"get_prodotti_certificati - prodotti: {prodotti}")
-        #if not prodotti:
-        #    return []
-        #return ProductRepositoryImpl.co2_consumata_prodotti(prodotti)
-
-        result = self.db_manager_setting.fetch_query(query)
-        if not result:
-            logger.warning("The get_lista_credenziali is empty or the query returned no results.")
-        else:
-            logger.info(f"Obtained in get_lista_credenziali: {result}")
-
-        #return result
-        return self.co2_consumata_prodotti(result)
-
-    def get_prodotti_certificati_by_rivenditore(self, id_rivenditore: int) -> list:
-        query = """
-        SELECT
-            Prodotto.Id_prodotto,
-            Prodotto.Nome,
-            Prodotto.Quantita,
-            Prodotto.Stato,
-            Azienda.Nome
-        FROM Operazione
-        JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Operazione.Operazione = "Messo sugli scaffali"
+        )
+        """, limit=limit, offset=offset)
+        if not result and not offset:
+            logger.warning("The get_prodotti_certificati is empty or the query returned no results.")
+        return result
+
+    def get_prodotti_certificati_by_rivenditore(self, id_rivenditore: int, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2("""
         AND Operazione.Id_prodotto IN (
             SELECT Id_prodotto FROM Certificato
         )
-        AND Operazione.Id_azienda = ?;
-        """
-        return self.co2_consumata_prodotti(
-            self.db_manager_setting.fetch_query(query, (id_rivenditore,)))
+        AND Operazione.Id_azienda = ?
+        """, (id_rivenditore,), limit=limit, offset=offset)
 
-    def get_prodotti_certificati_ordinati_co2(self):
-        return sorted(self.get_prodotti_certificati(), key=lambda x: x[1])
+    def get_prodotti_certificati_ordinati_co2(self, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2("""
+        AND Operazione.Id_prodotto IN (
+            SELECT Id_prodotto FROM Certificato
+        )
+        """, ordina_co2=True, limit=limit, offset=offset)
 
-    def get_prodotti_certificati_by_nome(self, nome: str) -> list:
-        query = """
-        SELECT
-            Prodotto.Id_prodotto,
-            Prodotto.Nome,
-            Prodotto.Quantita,
-            Prodotto.Stato,
-            Azienda.Nome
-        FROM Operazione
-        JOIN Azienda ON Operazione.Id_azienda = Azienda.Id_azienda
-        JOIN Prodotto ON Operazione.Id_prodotto = Prodotto.Id_prodotto
-        WHERE Operazione.Operazione = "Messo sugli scaffali"
+    def get_prodotti_certificati_by_nome(self, nome: str, limit: int = None, offset: int = 0) -> list:
+        return self._get_prodotti_con_co2("""
         AND Operazione.Id_prodotto IN (
             SELECT Id_prodotto FROM Certificato
         )
-        AND Prodotto.Nome = ?;
-        """
-        return self.co2_consumata_prodotti(
-            self.db_manager_setting.fetch_query(query, (nome,)))
+        AND Prodotto.Nome = ?
+        """, (nome,), limit=limit, offset=offset)
+
+    def get_nomi_prodotti(self, limit: int = None) -> list:
+        righe = self.db_manager_setting.fetch_page(self._QUERY_NOMI_PRODOTTI, (), limit, 0)
+        return [riga[0] for riga in righe]
 
     def get_prodotti_to_rivenditore(self) -> list:
-        query = """
-        SELECT Id_prodotto, Nome, Quantita FROM Prodotto WHERE Stato = 11;
-        """
-        return self.db_manager_setting.fetch_query(query)
+        return self.db_manager_setting.fetch_query(self._QUERY_PRODOTTI_TO_RIVENDITORE)
 
     def get_materie_prime(self, azienda: int) -> list:
-        query = """
-        SELECT Prodotto.Id_prodotto, Prodotto.Nome, Prodotto.Quantita
-        FROM Prodotto
-        JOIN Operazione
-        ON Prodotto.Id_prodotto = Operazione.Id_prodotto
-        WHERE Operazione.Operazione = "Trasformazione"
-        AND Operazione.Id_azienda = ?
-        ORDER BY Operazione.Data_operazione DESC;
-        """
-        return self.db_manager_setting.fetch_query(query, (azienda,))
+        return self.db_manager_setting.fetch_query(self._QUERY_MATERIE_PRIME, (azienda,))
+
+    def get_prodotti_by_ids(self, prodotti: [int]) -> dict:
+        trovati = {}
+        prodotti = list(dict.fromkeys(prodotti))
+        for i in range(0, len(prodotti), self._MAX_PARAMETRI):
+            blocco = prodotti[i:i + self._MAX_PARAMETRI]
+            query = f"""
+            SELECT Id_prodotto, Nome, Stato FROM Prodotto
+            WHERE Id_prodotto IN ({", ".join("?" * len(blocco))});
+            """
+            for id_prodotto, nome, stato in self.db_manager_setting.fetch_query(query, tuple(blocco)):
+                trovati[id_prodotto] = (nome, stato)
+        return trovati
@@ -1,3 +1,4 @@
+import threading
 from abc import ABC
 
 from configuration.db_manager_setting import DatabaseManagerSetting
@@ -9,22 +10,60 @@ class ThresholdRepositoryImpl(ThresholdRepository, ABC):
     # Class variable that stores the single instance
     _instance = None
 
+    # Soglia usata quando non esiste una soglia per la coppia (operazione, prodotto)
+    SOGLIA_DEFAULT = 999
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ThresholdRepositoryImpl, cls).__new__(cls)
             cls._instance.db_manager_setting = DatabaseManagerSetting()
+            # Indice in memoria delle soglie, condiviso da tutti i controller tramite il singleton
+            cls._instance._lista_soglie = None
+            cls._instance._indice_soglie = None
+            cls._instance._lock_soglie = threading.Lock()
             logger.info("BackEnd: Successfully initializing the instance for ThresholdRepositoryImpl.")
         return cls._instance
 
-    def get_lista_soglie(self) -> list:
-        query = """
-        SELECT * FROM Soglie;
+    def _carica_soglie(self):
         """
-        return self.db_manager_setting.fetch_query(query)
+        Loads Soglie into the list and the index if needed; must be called holding _lock_soglie.
+        """
+        if self._indice_soglie is None:
+            query = """
+            SELECT * FROM Soglie;
+            """
+            self._lista_soglie = self.db_manager_setting.fetch_query(query)
+            self._indice_soglie = {(soglia[0], soglia[1]): soglia[2] for soglia in self._lista_soglie}
+            logger.info(f"BackEnd: ThresholdRepositoryImpl: Loaded {len(self._lista_soglie)} thresholds.")
+
+    def _get_indice_soglie(self) -> dict:
+        """
+        Returns the index (Operazione, Prodotto) -> Soglia_Massima, loading Soglie on first use.
+        """
+        indice = self._indice_soglie
+        if indice is None:
+            with self._lock_soglie:
+                self._carica_soglie()
+                indice = self._indice_soglie
+        return indice
+
+    def invalida_soglie(self):
+        """
+        Discards the threshold index, the next lookup reloads it from Soglie.
+        """
+        with self._lock_soglie:
+            self._lista_soglie = None
+            self._indice_soglie = None
+
+    def get_lista_soglie(self) -> list:
+        # Letta sotto il lock: un invalida_soglie concorrente non puo' svuotarla tra caricamento e copia
+        with self._lock_soglie:
+            self._carica_soglie()
+            return list(self._lista_soglie)
 
     def get_prodotti_to_azienda_agricola(self):
         query = """
-        SELECT DISTINCT Prodotto FROM Soglie WHERE Tipo = "materia prima";
+        SELECT DISTINCT Prodotto FROM Soglie WHERE Tipo = 'materia prima';
         """
         lista_finale = []
         for i in self.db_manager_setting.fetch_query(query):
@@ -39,7 +78,7 @@ class ThresholdRepositoryImpl(ThresholdRepository, ABC):
         AND Prodotto.Nome IN (
             SELECT Tipo
             FROM Soglie
-            WHERE Tipo = "materia prima"
+            WHERE Tipo = 'materia prima'
         );
         """
         query_to_rivenditore = """
@@ -58,7 +97,7 @@ class ThresholdRepositoryImpl(ThresholdRepository, ABC):
             """
         else:
             query = """
-            SELECT DISTINCT Prodotto FROM Soglie WHERE Tipo = "prodotto finale"
+            SELECT DISTINCT Prodotto FROM Soglie WHERE Tipo = 'prodotto finale'
             """
             lista_finale = []
             for i in self.db_manager_setting.fetch_query(query):
@@ -67,10 +106,19 @@ class ThresholdRepositoryImpl(ThresholdRepository, ABC):
         return self.db_manager_setting.fetch_query(query)
 
     def get_soglia_by_operazione_and_prodotto(self, operazione: str, prodotto: str) -> int:
+        return self._get_indice_soglie().get((operazione, prodotto), self.SOGLIA_DEFAULT)
+
+    def get_scarti_soglia(self, operazioni: list) -> list:
+        indice = self._get_indice_soglie()
+        return [indice.get((operazione, prodotto), self.SOGLIA_DEFAULT) - float(co2)
+                for co2, operazione, prodotto in operazioni]
+
+    def modifica_soglia(self, operazione: str, prodotto: str, soglia: float):
         query = """
-        SELECT Soglia_Massima FROM Soglie WHERE Operazione = ? AND Prodotto = ?;
+        UPDATE Soglie SET Soglia_Massima = ? WHERE Operazione = ? AND Prodotto = ?;
         """
-        if not self.db_manager_setting.fetch_query(query, (operazione, prodotto)):
-            print('non ce')
-            return 999
-        return self.db_manager_setting.fetch_query(query, (operazione, prodotto))[0][0]
+        try:
+            self.db_manager_setting.execute_query(query, (soglia, operazione, prodotto))
+        finally:
+            self.invalida_soglie()
+        logger.info(f"BackEnd: modifica_soglia: Threshold for {operazione} / {prodotto} set to {soglia}.")
@@ -1,26 +1,18 @@
-from configuration.log_load_setting import logger
-from persistence.repository_impl.company_repository_impl import CompanyRepositoryImpl
-from persistence.repository_impl.threshold_repository_impl import ThresholdRepositoryImpl
-from persistence.repository_impl.product_repository_impl import ProductRepositoryImpl
-from persistence.repository_impl.certification_repository_impl import CertificationRepositoryImpl
+from lazy_loader import lazy_repository
 
 
 class ControllerCertificatore:
     """
-    As the instance has been created, in the repository implement layer, to access your methods,
-    we initialize the instances of the classes 'class instances' with:
-            CertificationRepositoryImpl()
-            ProductRepositoryImpl()
-            ThresholdRepositoryImpl()
-            CompanyRepositoryImpl()
+    The repository instances (singletons of the repository implement layer) are created
+    on first access through lazy_repository: a session only builds the repositories it uses.
     """
 
-    def __init__(self):
-        self.certification = CertificationRepositoryImpl()
-        self.product = ProductRepositoryImpl()
-        self.threshold = ThresholdRepositoryImpl()
-        self.company = CompanyRepositoryImpl()
-        logger.info("BackEnd: Successful initialization of 'class instances' for repository implements")
+    certification = lazy_repository("persistence.repository_impl.certification_repository_impl",
+                                    "CertificationRepositoryImpl")
+    product = lazy_repository("persistence.repository_impl.product_repository_impl", "ProductRepositoryImpl")
+    threshold = lazy_repository("persistence.repository_impl.threshold_repository_impl",
+                                "ThresholdRepositoryImpl")
+    company = lazy_repository("persistence.repository_impl.company_repository_impl", "CompanyRepositoryImpl")
 
     # Restituisce il dettaglio del prodotto selezionato dato l'indice n e la lista (filtrata o meno)
     def get_dettaglio_prodotto(self, lista, n):
@@ -41,7 +33,11 @@ class ControllerCertificatore:
 
     # Restituisce tutte le soglie
     def lista_soglie(self):
-        pass
+        return self.threshold.get_lista_soglie()
+
+    # Modifica la soglia massima di un'operazione su un prodotto
+    def modifica_soglia(self, operazione, prodotto, soglia):
+        self.threshold.modifica_soglia(operazione, prodotto, soglia)
 
     # Restituisce il dettaglio della soglia selezionata dato l'indice n
     def get_dettaglio_soglia(self, n):
@@ -62,61 +58,68 @@ class ControllerCertificatore:
         self.certification.inserisci_certificato(id_prodotto, descrizione, id_azienda_certificatore, data)
 
     # Restituisce la lista di tutti i prodotti finali
-    def lista_prodotti(self):
+    def lista_prodotti(self, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista_prodotti = self.product.get_lista_prodotti()
+        lista_prodotti = self.product.get_lista_prodotti(limit=limit, offset=offset)
         return lista_prodotti
 
-    def prodotti_by_nome(self, nome):
+    # Restituisce i nomi dei prodotti finali per il completamento del filtro per nome
+    def lista_nomi_prodotti(self, limit=None):
+        return self.product.get_nomi_prodotti(limit=limit)
+
+    def prodotti_by_nome(self, nome, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        prodotto = self.product.get_prodotti_by_nome(nome)
+        prodotto = self.product.get_prodotti_by_nome(nome, limit=limit, offset=offset)
         return prodotto
 
     # Restituisce la lista dei prodotti di un certo rivenditore r
-    def lista_prodotti_rivenditore(self, r):
+    def lista_prodotti_rivenditore(self, r, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista_prodotti_by_rivenditore = self.product.get_lista_prodotti_by_rivenditore(r)
+        lista_prodotti_by_rivenditore = self.product.get_lista_prodotti_by_rivenditore(r, limit=limit, offset=offset)
         return lista_prodotti_by_rivenditore
 
     # Restituisce la lista dei prodotti ordinati secondo la co2 consumata
-    def lista_prodotti_ordinati_co2(self):
+    def lista_prodotti_ordinati_co2(self, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista_ordinata = self.product.get_prodotti_ordinati_co2()
+        lista_ordinata = self.product.get_prodotti_ordinati_co2(limit=limit, offset=offset)
         return lista_ordinata
 
     # Restituisce la lista dei prodotti certificati
-    def lista_prodotti_certificati(self):
+    def lista_prodotti_certificati(self, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista_prodotti_certificati = self.product.get_prodotti_certificati()
+        lista_prodotti_certificati = self.product.get_prodotti_certificati(limit=limit, offset=offset)
         return lista_prodotti_certificati
 
-    def lista_prodotti_certificati_rivenditore(self, r):
+    def lista_prodotti_certificati_rivenditore(self, r, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_by_rivenditore(r)
+        lista = self.product.get_prodotti_certificati_by_rivenditore(r, limit=limit, offset=offset)
         return lista
 
-    def lista_prodotti_certificati_ordinata(self):
+    def lista_prodotti_certificati_ordinata(self, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_ordinati_co2()
+        lista = self.product.get_prodotti_certificati_ordinati_co2(limit=limit, offset=offset)
         return lista
 
-    def lista_prodotti_certificati_by_nome(self, nome):
+    def lista_prodotti_certificati_by_nome(self, nome, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_by_nome(nome)
+        lista = self.product.get_prodotti_certificati_by_nome(nome, limit=limit, offset=offset)
         return lista
 
     def is_certificato(self, id_prodotto):
-        # repo = CertificationRepositoryImpl()
-        return " certificato" """self.product.is_certificato(id_prodotto)"""
+        return self.certification.is_certificato(id_prodotto)
 
     # Restituisce la lista delle operazioni per la produzione del prodotto selezionato
-    def lista_operazioni_prodotto(self, id_prodotto):
+    def lista_operazioni_prodotto(self, id_prodotto, limit=None, offset=0):
         # repo = ProductRepositoryImpl()
-        lista_operazioni = self.product.get_storico_prodotto(id_prodotto)
+        lista_operazioni = self.product.get_storico_prodotto(id_prodotto, limit=limit, offset=offset)
         return lista_operazioni
 
     # Restituisce lo scarto dalla soglia di riferimento
     def scarto_soglia(self, co2, operazione, prodotto):
         # repo = ThresholdRepositoryImpl()
-        soglia = self.product.get_soglia_by_operazione_and_prodotto(operazione, prodotto)
+        soglia = self.threshold.get_soglia_by_operazione_and_prodotto(operazione, prodotto)
         return soglia - float(co2)
+
+    # Restituisce lo scarto dalla soglia per ogni (co2, operazione, prodotto) della lista
+    def scarti_soglia(self, operazioni):
+        return self.threshold.get_scarti_soglia(operazioni)
@@ -1,31 +1,27 @@
+import csv
+import json
+import os
+
 from configuration.log_load_setting import logger
-from persistence.repository_impl.company_repository_impl import CompanyRepositoryImpl
-from persistence.repository_impl.threshold_repository_impl import ThresholdRepositoryImpl
-from persistence.repository_impl.compensation_action_repository_impl import CompensationActionRepositoryImpl
-from persistence.repository_impl.operation_repository_impl import OperationRepositoryImpl
-from persistence.repository_impl.product_repository_impl import ProductRepositoryImpl
-from configuration.log_load_setting import logger
-from persistence.repository_impl.composition_repository_impl import CompositionRepositoryImpl
+from lazy_loader import lazy_repository
 from model.company_model import CompanyModel
+from model.import_report_model import ImportReportModel
 
 
 class ControllerAzienda:
     """
-    As the instance has been created, in the repository implement layer, to access your methods, 
-    we initialize the instances of the classes 'class instances' with:
-            OperationRepositoryImpl()
-            ProductRepositoryImpl()
-            ThresholdRepositoryImpl()
-            CompanyRepositoryImpl()
+    The repository instances (singletons of the repository implement layer) are created
+    on first access through lazy_repository: a session only builds the repositories it uses.
     """
 
-    def __init__(self):
-        self.operation = OperationRepositoryImpl()
-        self.compensation_action = CompensationActionRepositoryImpl()
-        self.product = ProductRepositoryImpl()
-        self.threshold = ThresholdRepositoryImpl()
-        self.company = CompanyRepositoryImpl()
-        logger.info("BackEnd: Successful initialization of 'class instances' for repository implements")
+    operation = lazy_repository("persistence.repository_impl.operation_repository_impl",
+                                "OperationRepositoryImpl")
+    compensation_action = lazy_repository("persistence.repository_impl.compensation_action_repository_impl",
+                                          "CompensationActionRepositoryImpl")
+    product = lazy_repository("persistence.repository_impl.product_repository_impl", "ProductRepositoryImpl")
+    threshold = lazy_repository("persistence.repository_impl.threshold_repository_impl",
+                                "ThresholdRepositoryImpl")
+    company = lazy_repository("persistence.repository_impl.company_repository_impl", "CompanyRepositoryImpl")
 
     # Restituisce tutte le soglie
 
@@ -80,20 +76,20 @@ class ControllerAzienda:
         self.company.inserisci_azione(data, azienda, co2_compensata, nome_azione)
 
     # Restituisce la lista di tutte le operazioni della sua azienda
-    def lista_operazioni(self, azienda):
+    def lista_operazioni(self, azienda, limit=None, offset=0):
         # repo = OperationRepositoryImpl()
-        lista_operazioni = self.operation.get_operazioni_by_azienda(azienda)
+        lista_operazioni = self.operation.get_operazioni_by_azienda(azienda, limit=limit, offset=offset)
         return lista_operazioni
 
     # Restituisce la lista delle sue operazioni filtrate per data
-    def lista_operazioni_per_data(self, azienda, d1, d2):
+    def lista_operazioni_per_data(self, azienda, d1, d2, limit=None, offset=0):
         # repo = OperationRepositoryImpl()
-        lista_operazioni = self.company.get_operazioni_by_data(azienda, d1, d2)
+        lista_operazioni = self.operation.get_operazioni_by_data(azienda, d1, d2, limit=limit, offset=offset)
         return lista_operazioni
 
-    def lista_operazioni_ordinata_co2(self, azienda):
+    def lista_operazioni_ordinata_co2(self, azienda, limit=None, offset=0):
         # repo = OperationRepositoryImpl()
-        lista_operazioni = self.company.get_operazioni_ordinate_co2(azienda)
+        lista_operazioni = self.operation.get_operazioni_ordinate_co2(azienda, limit=limit, offset=offset)
         return lista_operazioni
 
     # Restituisce il dettaglio dell'operazione selezionata dato l'indice n e la lista (filtrata o meno)
@@ -135,6 +131,175 @@ class ControllerAzienda:
                 azienda, prodotto, data, co2, evento
             )
 
+    # Operazioni consentite per tipo di azienda, la prima e' quella predefinita nell'import
+    _OPERAZIONI_PER_TIPO = {
+        "Agricola": ["Produzione"],
+        "Trasportatore": ["Trasporto"],
+        "Trasformatore": ["Trasformazione", "Produzione"],
+        "Rivenditore": ["Messo sugli scaffali"],
+    }
+    _STATO_PER_DESTINAZIONE = {"Azienda di trasformazione": 1, "Rivenditore finale": 11}
+
+    # Importa in blocco le operazioni della sua azienda da un file CSV o NDJSON (un oggetto JSON per riga)
+    def importa_operazioni(self, percorso, tipo_azienda, azienda, dimensione_blocco=500, callback=None):
+        """
+        Streams the file in blocks of dimensione_blocco rows, so memory does not grow with the file size.
+        Each row is validated against Soglie and its products are resolved once per block;
+        the valid rows of a block are then inserted in one transaction.
+        callback, if given, receives the ImportReportModel after every block.
+
+        Columns: prodotto (nome for new products, Id_prodotto otherwise), data, co2,
+        evento (optional), quantita, destinazione or nuovo_stato (Trasportatore),
+        materie_prime (Id_prodotto separated by ';', Produzione of a Trasformatore).
+        """
+        if tipo_azienda not in self._OPERAZIONI_PER_TIPO:
+            raise Exception(f"Tipo azienda non valido per l'import: {tipo_azienda}")
+        report = ImportReportModel()
+        lista_soglie = self.threshold.get_lista_soglie()
+        soglie = {(soglia[0], soglia[1]): soglia[2] for soglia in lista_soglie}
+        # Nomi ammessi per i nuovi prodotti, come nelle combo box di inserimento
+        tipo_nuovi = "materia prima" if tipo_azienda == "Agricola" else "prodotto finale"
+        nomi_ammessi = {soglia[1] for soglia in lista_soglie if soglia[3] == tipo_nuovi}
+
+        for blocco in self._leggi_blocchi(percorso, dimensione_blocco):
+            self._importa_blocco(blocco, tipo_azienda, azienda, soglie, nomi_ammessi, report)
+            if callback:
+                callback(report)
+
+        logger.info(f"BackEnd: importa_operazioni: {report.righe_inserite} rows imported, "
+                    f"{report.righe_scartate} discarded from {percorso}")
+        return report
+
+    @staticmethod
+    def _leggi_blocchi(percorso, dimensione_blocco):
+        """
+        Yields lists of (numero_riga, riga) read lazily from the file.
+        """
+        with open(percorso, "r", encoding="utf-8", newline="") as file:
+            if os.path.splitext(percorso)[1].lower() == ".csv":
+                righe = ((numero, riga) for numero, riga in enumerate(csv.DictReader(file), start=2))
+            else:
+                righe = ((numero, ControllerAzienda._leggi_riga_json(riga))
+                         for numero, riga in enumerate(file, start=1) if riga.strip())
+
+            blocco = []
+            for numero, riga in righe:
+                blocco.append((numero, riga))
+                if len(blocco) >= dimensione_blocco:
+                    yield blocco
+                    blocco = []
+            if blocco:
+                yield blocco
+
+    @staticmethod
+    def _leggi_riga_json(riga):
+        """
+        Parses one NDJSON line; a malformed line is returned as its JSONDecodeError,
+        so that it is reported with its row number instead of stopping the import.
+        """
+        try:
+            return json.loads(riga)
+        except json.JSONDecodeError as e:
+            return e
+
+    def _importa_blocco(self, blocco, tipo_azienda, azienda, soglie, nomi_ammessi, report):
+        # Le righe che non sono un oggetto (JSON malformato, liste, numeri) vengono scartate subito
+        righe_valide = []
+        for numero, riga in blocco:
+            if isinstance(riga, dict):
+                righe_valide.append((numero, riga))
+                continue
+            report.righe_lette += 1
+            if isinstance(riga, json.JSONDecodeError):
+                report.aggiungi_errore(numero, f"JSON non valido: {riga.msg} (colonna {riga.colno})")
+            else:
+                report.aggiungi_errore(numero, f"Riga non valida: atteso un oggetto JSON, trovato "
+                                               f"{type(riga).__name__}")
+        blocco = righe_valide
+
+        riferimenti = []
+        for _, riga in blocco:
+            riferimenti.append(riga.get("prodotto"))
+            riferimenti.extend(str(riga.get("materie_prime") or "").split(";"))
+        prodotti = self.product.get_prodotti_by_ids(
+            [int(valore) for valore in riferimenti if str(valore).strip().isdigit()]
+        )
+
+        operazioni, numeri_riga = [], []
+        for numero, riga in blocco:
+            report.righe_lette += 1
+            try:
+                operazione, nome = self._normalizza_operazione(riga, tipo_azienda, prodotti)
+            except (ValueError, TypeError, KeyError) as e:
+                report.aggiungi_errore(numero, f"Riga non valida: {e}")
+                continue
+            if operazione["prodotto"] is None and nome not in nomi_ammessi:
+                report.aggiungi_errore(numero, f"Prodotto {nome} non previsto dalle soglie")
+                continue
+            # Senza soglia specifica vale lo stesso default di get_soglia_by_operazione_and_prodotto
+            if operazione["co2"] > soglie.get((operazione["evento"], nome), 999):
+                report.righe_fuori_soglia += 1
+            operazioni.append(operazione)
+            numeri_riga.append(numero)
+
+        if not operazioni:
+            return
+        errori = self.operation.inserisci_operazioni_batch(azienda, operazioni)
+        for posizione, errore in errori:
+            report.aggiungi_errore(numeri_riga[posizione], errore)
+        report.righe_inserite += len(operazioni) - len(errori)
+
+    def _normalizza_operazione(self, riga, tipo_azienda, prodotti):
+        """
+        Converts a raw row into the dict expected by inserisci_operazioni_batch.
+        Returns (operazione, nome del prodotto) or raises ValueError.
+        """
+        evento = str(riga.get("evento") or self._OPERAZIONI_PER_TIPO[tipo_azienda][0]).strip()
+        if evento not in self._OPERAZIONI_PER_TIPO[tipo_azienda]:
+            raise ValueError(f"operazione {evento} non consentita a un'azienda {tipo_azienda}")
+        co2 = float(riga["co2"])
+        if co2 < 0:
+            raise ValueError("co2 negativa")
+        data = str(riga.get("data") or "").strip()
+        if not data:
+            raise ValueError("data mancante")
+
+        operazione = {"evento": evento, "data": data, "co2": co2, "prodotto": None, "nome": None,
+                      "quantita": None, "stato_iniziale": None, "nuovo_stato": None,
+                      "materie_prime": [], "composizione": False}
+
+        if evento == "Produzione":
+            # Nuovo prodotto: materia prima (Agricola) o prodotto finale (Trasformatore)
+            nome = str(riga.get("prodotto") or "").strip()
+            quantita = float(riga["quantita"])
+            if not nome or quantita <= 0:
+                raise ValueError("prodotto o quantita mancanti")
+            operazione.update(nome=nome, quantita=quantita, stato_iniziale=0)
+            if tipo_azienda == "Trasformatore":
+                materie_prime = [int(mp) for mp in str(riga.get("materie_prime") or "").split(";") if mp.strip()]
+                mancanti = [mp for mp in materie_prime if mp not in prodotti]
+                if not materie_prime or mancanti:
+                    raise ValueError(f"materie prime mancanti o inesistenti: {mancanti}")
+                operazione.update(stato_iniziale=10, materie_prime=materie_prime, composizione=True)
+            return operazione, nome
+
+        id_prodotto = int(riga["prodotto"])
+        if id_prodotto not in prodotti:
+            raise ValueError(f"prodotto {id_prodotto} inesistente")
+        operazione["prodotto"] = id_prodotto
+        if tipo_azienda == "Trasportatore":
+            destinazione = riga.get("destinazione")
+            nuovo_stato = self._STATO_PER_DESTINAZIONE.get(destinazione) if destinazione \
+                else int(riga.get("nuovo_stato") or 0)
+            if nuovo_stato is None:
+                raise ValueError(f"destinazione {destinazione} non valida")
+            operazione.update(nuovo_stato=nuovo_stato, composizione=nuovo_stato == 11)
+        elif tipo_azienda == "Trasformatore":
+            operazione["nuovo_stato"] = 101
+        else:
+            operazione["nuovo_stato"] = 111
+        return operazione, prodotti[id_prodotto][0]
+
     # Restituisce le opzioni per la combo box del dialog per la composizione
     def get_prodotti_to_composizione(self, id_azienda):
         # repo = CompositionRepositoryImpl()
@@ -147,6 +312,10 @@ class ControllerAzienda:
         soglia = self.threshold.get_soglia_by_operazione_and_prodotto(operazione, prodotto)
         return soglia - float(co2)
 
+    # Restituisce lo scarto dalla soglia per ogni (co2, operazione, prodotto) della lista
+    def scarti_soglia(self, operazioni):
+        return self.threshold.get_scarti_soglia(operazioni)
+
     def get_emissions(self, company_id: int):
         return self.company.get_company_emission(company_id)
 
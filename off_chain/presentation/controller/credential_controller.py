@@ -1,5 +1,6 @@
 import pyotp
 from configuration.log_load_setting import logger
+from configuration.password_hash_setting import PasswordHashSetting
 from domain.exception.authentication_exceptions import PasswordTooShortError, PasswordWeakError
 from domain.exception.database_exceptions import UniqueConstraintError, DatabaseError
 from persistence.repository_impl.credential_repository_impl import CredentialRepositoryImpl
@@ -7,6 +8,9 @@ from persistence.repository_impl.credential_repository_impl import CredentialRep
 
 class ControllerAutenticazione:
 
+    # Hash usato per i login con username inesistente
+    _HASH_FITTIZIO = None
+
     def __init__(self):
         self.credential = CredentialRepositoryImpl()
         logger.info("BackEnd: Successful initialization of 'class instances' for repository implements")
@@ -35,37 +39,46 @@ class ControllerAutenticazione:
 
     # Effettua il login
     def login(self, username, password, otp_code=None):
+        """
+        Verifica username, password e codice OTP; restituisce la riga dell'azienda o None.
+        L'hash della password e' volutamente lento: va chiamato fuori dal thread della GUI.
+        """
         try:
-            # repo = CredentialRepositoryImpl()
-            credenziali = self.credential.get_lista_credenziali()
-            logger.info(f"Username inserito: {username}, Password inserita: {password}")
-            logger.info(f"Credenziali recuperate: {credenziali}")
-            print(f"Credenziali recuperate: {credenziali}")
+            # Una sola riga letta tramite l'indice UNIQUE su Username, azienda compresa
+            credenziale = self.credential.get_credenziale_by_username(username)
         except Exception as e:
             logger.warning(f"Errore durante il recupero delle credenziali: {str(e)}")
-            return
+            return None
 
-        if (username, password) not in [(t[1], t[2]) for t in credenziali]:
+        if credenziale is None:
+            # Username inesistente: l'hash viene calcolato comunque, cosi' il tempo di risposta non lo rivela
+            PasswordHashSetting.verify_password(password, self._hash_fittizio())
+            logger.info("Login failed: unknown username.")
             return None
-        else:
-            # Cerca le credenziali dell'utente
-            for credenziale in credenziali:
-                if credenziale[1] == username and credenziale[2] == password:
-                    id_ = credenziale[0]
 
-                    # Recupera l'azienda dell'utente
+        id_credenziali, password_salvata, secret_key, azienda = credenziale
+        if not PasswordHashSetting.verify_password(password, password_salvata):
+            logger.info(f"Login failed: wrong password for credential {id_credenziali}.")
+            return None
 
-                    # azienda = CredentialRepositoryImpl.get_azienda_by_id(id_)
-                    azienda = self.credential.get_azienda_by_id(id_)
+        # Verifica il codice OTP (se presente)
+        if otp_code:
+            totp = pyotp.TOTP(secret_key)
+            if not totp.verify(otp_code):  # Verifica se l'OTP è corretto
+                logger.info(f"Login failed: wrong OTP code for credential {id_credenziali}.")
+                return None  # Se l'OTP non è valido, ritorna None
 
-                    # Recupera la chiave segreta OTP per questo utente
-                    secret_key = credenziale[3]  # Supponiamo che la chiave segreta OTP sia nel campo 3 dell'azienda
+        # Password in chiaro o con parametri vecchi: viene salvata con l'hash attuale
+        if PasswordHashSetting.needs_rehash(password_salvata):
+            try:
+                self.credential.aggiorna_password(id_credenziali, PasswordHashSetting.hash_password(password))
+                logger.info(f"Password of credential {id_credenziali} upgraded to the current hash.")
+            except Exception as e:
+                logger.warning(f"Errore durante l'aggiornamento della password: {str(e)}")
 
-                    # Verifica il codice OTP (se presente)
-                    if otp_code:
-                        totp = pyotp.TOTP(secret_key)
-                        if not totp.verify(otp_code):  # Verifica se l'OTP è corretto
-                            print('errore')
-                            return None  # Se l'OTP non è valido, ritorna None
+        return azienda  # Se le credenziali e l'OTP sono corretti, ritorna l'azienda dell'utente
 
-                    return azienda[0]  # Se le credenziali e l'OTP sono corretti, ritorna l'azienda dell'utente
+    def _hash_fittizio(self):
+        if ControllerAutenticazione._HASH_FITTIZIO is None:
+            ControllerAutenticazione._HASH_FITTIZIO = PasswordHashSetting.hash_password("")
+        return ControllerAutenticazione._HASH_FITTIZIO
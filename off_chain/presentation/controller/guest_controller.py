@@ -1,27 +1,19 @@
 from configuration.log_load_setting import logger
-from persistence.repository_impl.company_repository_impl import CompanyRepositoryImpl
-from persistence.repository_impl.threshold_repository_impl import ThresholdRepositoryImpl
-from persistence.repository_impl.product_repository_impl import ProductRepositoryImpl
-from persistence.repository_impl.certification_repository_impl import CertificationRepositoryImpl
+from lazy_loader import lazy_repository
 
 
 class ControllerGuest:
     """
-    As the instance has been created, in the repository implement layer, to access your methods,
-    we initialize the instances of the classes 'class instances' with:
-            CertificationRepositoryImpl()
-            ProductRepositoryImpl()
-            ThresholdRepositoryImpl()
-            CompanyRepositoryImpl()
+    The repository instances (singletons of the repository implement layer) are created
+    on first access through lazy_repository: a session only builds the repositories it uses.
     """
 
-    def __init__(self):
-        self.certification = CertificationRepositoryImpl()
-        self.product = ProductRepositoryImpl()
-        self.threshold = ThresholdRepositoryImpl()
-        self.company = CompanyRepositoryImpl()
-        logger.info(
-            "BackEnd: Successful initialization of 'class instances' for repository implements")
+    certification = lazy_repository("persistence.repository_impl.certification_repository_impl",
+                                    "CertificationRepositoryImpl")
+    product = lazy_repository("persistence.repository_impl.product_repository_impl", "ProductRepositoryImpl")
+    threshold = lazy_repository("persistence.repository_impl.threshold_repository_impl",
+                                "ThresholdRepositoryImpl")
+    company = lazy_repository("persistence.repository_impl.company_repository_impl", "CompanyRepositoryImpl")
 
     def lista_rivenditori(self):
         # repo1 = CompanyRepositoryImpl()
@@ -29,33 +21,33 @@ class ControllerGuest:
         return rivenditori
 
     # Restituisce la lista di tutte le aziende
-    def lista_aziende(self):
+    def lista_aziende(self, limit=None, offset=0):
         # repo2 = CompanyRepositoryImpl()
-        lista_aziende = self.company.get_lista_aziende()
+        lista_aziende = self.company.get_lista_aziende(limit=limit, offset=offset)
         return lista_aziende
 
     # Restituisce la lista di tutte le aziende filtrate per tipo
-    def lista_aziende_filtro_tipo(self, tipo):
+    def lista_aziende_filtro_tipo(self, tipo, limit=None, offset=0):
         # repo3 = CompanyRepositoryImpl()
-        lista_aziende = self.company.get_lista_aziende_filtrata_tipo(tipo)
+        lista_aziende = self.company.get_lista_aziende_filtrata_tipo(tipo, limit=limit, offset=offset)
         return lista_aziende
 
     # Restituisce la lista di tutte le aziende filtrate per nome (unica azienda)
-    def azienda_by_nome(self, nome):
+    def azienda_by_nome(self, nome, limit=None, offset=0):
         # repo4 = CompanyRepositoryImpl()
-        azienda = self.company.get_azienda_by_nome(nome)
+        azienda = self.company.get_azienda_by_nome(nome, limit=limit, offset=offset)
         return azienda
 
     # Restituisce la lista di tutte le aziende ordinata per saldo co2
-    def lista_aziende_ordinata_co2(self):
+    def lista_aziende_ordinata_co2(self, limit=None, offset=0):
         # repo5 = CompanyRepositoryImpl()
-        lista_ordinata = self.company.get_lista_aziende_ordinata()
+        lista_ordinata = self.company.get_lista_aziende_ordinata(limit=limit, offset=offset)
         return lista_ordinata
 
     # Restituisce la lista di tutti i prodotti finali
-    def lista_prodotti(self):
+    def lista_prodotti(self, limit=None, offset=0):
         # repo6 = ProductRepositoryImpl()
-        lista_prodotti = self.product.get_lista_prodotti()
+        lista_prodotti = self.product.get_lista_prodotti(limit=limit, offset=offset)
         return lista_prodotti
 
     def is_certificato(self, id_prodotto):
@@ -69,49 +61,53 @@ class ControllerGuest:
             return None  # O gestire l'errore in un altro modo, come ritornare un messaggio d'errore
 
     # Restituisce la lista dei prodotti certificati
-    def lista_prodotti_certificati(self):
+    def lista_prodotti_certificati(self, limit=None, offset=0):
         # repo8 = ProductRepositoryImpl()
-        lista_prodotti_certificati = self.product.get_prodotti_certificati()
+        lista_prodotti_certificati = self.product.get_prodotti_certificati(limit=limit, offset=offset)
         return lista_prodotti_certificati
 
-    def prodotti_by_nome(self, nome):
+    # Restituisce i nomi dei prodotti finali per il completamento del filtro per nome
+    def lista_nomi_prodotti(self, limit=None):
+        return self.product.get_nomi_prodotti(limit=limit)
+
+    def prodotti_by_nome(self, nome, limit=None, offset=0):
         # repo9 = ProductRepositoryImpl()
-        prodotto = self.product.get_prodotti_by_nome(nome)
+        prodotto = self.product.get_prodotti_by_nome(nome, limit=limit, offset=offset)
         return prodotto
 
     # Restituisce la lista dei prodotti di un certo rivenditore r
 
-    def lista_prodotti_rivenditore(self, r):
+    def lista_prodotti_rivenditore(self, r, limit=None, offset=0):
         # repo10 = ProductRepositoryImpl()
-        lista_prodotti_by_rivenditore = self.product.get_lista_prodotti_by_rivenditore(r)
+        lista_prodotti_by_rivenditore = self.product.get_lista_prodotti_by_rivenditore(r, limit=limit, offset=offset)
         return lista_prodotti_by_rivenditore
 
     # Restituisce la lista dei prodotti ordinati secondo la co2 consumata
-    def lista_prodotti_ordinati_co2(self):
+    def lista_prodotti_ordinati_co2(self, limit=None, offset=0):
         # repo11 = ProductRepositoryImpl()
-        lista_ordinata = self.product.get_prodotti_ordinati_co2()
+        lista_ordinata = self.product.get_prodotti_ordinati_co2(limit=limit, offset=offset)
         return lista_ordinata
 
-    def lista_prodotti_certificati_rivenditore(self, r):
+    def lista_prodotti_certificati_rivenditore(self, r, limit=None, offset=0):
         # repo12 = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_by_rivenditore(r)
+        lista = self.product.get_prodotti_certificati_by_rivenditore(r, limit=limit, offset=offset)
         return lista
 
-    def lista_prodotti_certificati_ordinata(self):
+    def lista_prodotti_certificati_ordinata(self, limit=None, offset=0):
         # repo13 = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_ordinati_co2()
+        lista = self.product.get_prodotti_certificati_ordinati_co2(limit=limit, offset=offset)
         return lista
 
-    def lista_prodotti_certificati_by_nome(self, nome):
+    def lista_prodotti_certificati_by_nome(self, nome, limit=None, offset=0):
         # repo14 = ProductRepositoryImpl()
-        lista = self.product.get_prodotti_certificati_by_nome(nome)
+        lista = self.product.get_prodotti_certificati_by_nome(nome, limit=limit, offset=offset)
         return lista
 
     # Restituisce la lista delle operazioni per la produzione del prodotto selezionato
 
-    def lista_operazioni_prodotto(self, id_prodotto):
+    def lista_operazioni_prodotto(self, id_prodotto, limit=None, offset=0):
         # repo15 = ProductRepositoryImpl()
-        lista_operazioni = self.product.get_storico_prodotto(id_prodotto)
+        lista_operazioni = self.product.get_storico_prodotto(id_prodotto, limit=limit, offset=offset)
         return lista_operazioni
 
     def certificazione_by_prodotto(self, id_prodotto):
@@ -134,3 +130,7 @@ class ControllerGuest:
         # repo17 = ThresholdRepositoryImpl()
         soglia = self.threshold.get_soglia_by_operazione_and_prodotto(operazione, prodotto)
         return soglia - float(co2)
+
+    # Restituisce lo scarto dalla soglia per ogni (co2, operazione, prodotto) della lista
+    def scarti_soglia(self, operazioni):
+        return self.threshold.get_scarti_soglia(operazioni)
@@ -3,11 +3,14 @@ from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QGridLayout, QPushButton, QMessageBox
 from presentation.controller.company_controller import ControllerAzienda
 from presentation.view import funzioni_utili
-from presentation.view.vista_stato_azienda import VistaStatoAzienda
-from presentation.view.vista_azioni_compensative import VistaAzioniCompensative
-from presentation.view.vista_operazioni import VistaOperazioni
-from presentation.view.vista_soglie import VistaSoglie
-from presentation.view.vista_sviluppatori import VistaSviluppatori
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+VistaStatoAzienda = lazy_import("presentation.view.vista_stato_azienda", "VistaStatoAzienda")
+VistaAzioniCompensative = lazy_import("presentation.view.vista_azioni_compensative", "VistaAzioniCompensative")
+VistaOperazioni = lazy_import("presentation.view.vista_operazioni", "VistaOperazioni")
+VistaSoglie = lazy_import("presentation.view.vista_soglie", "VistaSoglie")
+VistaSviluppatori = lazy_import("presentation.view.vista_sviluppatori", "VistaSviluppatori")
 
 
 class HomePage(QMainWindow):
@@ -4,10 +4,13 @@ from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QGridLayo
 
 from presentation.controller.certification_controller import ControllerCertificatore
 from presentation.view import funzioni_utili
-from presentation.view.vista_stato_azienda import VistaStatoAzienda
-from presentation.view.vista_prodotti import VistaProdotti
-from presentation.view.vista_soglie import VistaSoglie
-from presentation.view.vista_sviluppatori import VistaSviluppatori
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+VistaStatoAzienda = lazy_import("presentation.view.vista_stato_azienda", "VistaStatoAzienda")
+VistaProdotti = lazy_import("presentation.view.vista_prodotti", "VistaProdotti")
+VistaSoglie = lazy_import("presentation.view.vista_soglie", "VistaSoglie")
+VistaSviluppatori = lazy_import("presentation.view.vista_sviluppatori", "VistaSviluppatori")
 
 
 class HomePageCertificatore(QMainWindow):
@@ -4,9 +4,12 @@ from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QGridLayo
 
 from presentation.controller.guest_controller import ControllerGuest
 from presentation.view import funzioni_utili
-from presentation.view.vista_aziende import VistaAziende
-from presentation.view.vista_prodotti import VistaProdotti
-from presentation.view.vista_sviluppatori import VistaSviluppatori
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+VistaAziende = lazy_import("presentation.view.vista_aziende", "VistaAziende")
+VistaProdotti = lazy_import("presentation.view.vista_prodotti", "VistaProdotti")
+VistaSviluppatori = lazy_import("presentation.view.vista_sviluppatori", "VistaSviluppatori")
 
 
 class HomePageGuest(QMainWindow):
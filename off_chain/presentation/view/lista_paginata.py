@@ -0,0 +1,70 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QVariant
+from PyQt5.QtGui import QFont
+
+
+class ModelloListaPaginata(QAbstractListModel):
+    """
+    List model that loads rows one page at a time while the view scrolls
+    (canFetchMore/fetchMore) and builds the displayed text only when a row is painted.
+
+    carica_pagina(limit, offset) returns the rows of a page from the controller,
+    formatta(riga) returns the text shown for a row.
+    """
+
+    DIMENSIONE_PAGINA = 200
+
+    def __init__(self, carica_pagina, formatta, dimensione_pagina=DIMENSIONE_PAGINA, parent=None):
+        super().__init__(parent)
+        self._carica_pagina = carica_pagina
+        self._formatta = formatta
+        self._dimensione_pagina = dimensione_pagina
+        self._righe = []
+        self._finita = False
+        self._font = QFont("Times Roman", 11)
+
+        # La prima pagina viene letta subito, cosi' la vista sa se la lista e' vuota
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._righe)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._righe):
+            return QVariant()
+        if role == Qt.DisplayRole:
+            return self._formatta(self._righe[index.row()])
+        if role == Qt.FontRole:
+            return self._font
+        return QVariant()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._finita
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._finita:
+            return
+        pagina = self._carica_pagina(self._dimensione_pagina, len(self._righe)) or []
+        if len(pagina) < self._dimensione_pagina:
+            self._finita = True
+        if not pagina:
+            return
+        inizio = len(self._righe)
+        self.beginInsertRows(QModelIndex(), inizio, inizio + len(pagina) - 1)
+        self._righe.extend(pagina)
+        self.endInsertRows()
+
+    def riga(self, n):
+        """
+        Returns the raw row n, as returned by the controller.
+        """
+        return self._righe[n]
+
+    def is_vuota(self):
+        return not self._righe
@@ -1,15 +1,37 @@
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QPixmap, QIcon, QFont
 from PyQt5.QtWidgets import QWidget, QFormLayout, QHBoxLayout, QMainWindow, QAction, QCheckBox, QStackedWidget, \
     QComboBox
 from presentation.controller.credential_controller import ControllerAutenticazione
 from presentation.view import funzioni_utili
-from presentation.view.home_page_aziende import HomePage
-from presentation.view.home_page_certificatore import HomePageCertificatore
-from presentation.view.home_page_guest import HomePageGuest
 
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
 import pyotp
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+HomePage = lazy_import("presentation.view.home_page_aziende", "HomePage")
+HomePageCertificatore = lazy_import("presentation.view.home_page_certificatore", "HomePageCertificatore")
+HomePageGuest = lazy_import("presentation.view.home_page_guest", "HomePageGuest")
+
+''''
+Runs the login outside the GUI thread: the password hash is deliberately slow
+'''
+
+
+class LoginWorker(QThread):
+    completato = pyqtSignal(object)
+
+    def __init__(self, controller, username, password, otp_code):
+        super().__init__()
+        self.controller = controller
+        self.username = username
+        self.password = password
+        self.otp_code = otp_code
+
+    def run(self):
+        self.completato.emit(self.controller.login(self.username, self.password, self.otp_code))
+
 
 ''''
 Class for authentication view main
@@ -28,6 +50,7 @@ class VistaAccedi(QMainWindow):
         self.home_certificatore = None
         self.home_page = None
         self.home_guest = None
+        self.login_worker = None
         self.setWindowIcon(QIcon("presentation\\resources\\logo_centro.png"))
 
         # Elementi di layout
@@ -255,8 +278,16 @@ class VistaAccedi(QMainWindow):
         password = self.password_input.text()
         otp_code = self.otp_input.text()
 
-        # Verifica le credenziali dell'utente
-        utente = self.controller.login(username, password, otp_code)
+        # Verifica le credenziali dell'utente in un thread separato, la finestra resta reattiva
+        self.login_button.setEnabled(False)
+        if self.login_worker:
+            self.login_worker.wait()  # il thread del login precedente ha gia' emesso il risultato
+        self.login_worker = LoginWorker(self.controller, username, password, otp_code)
+        self.login_worker.completato.connect(self.login_completato)
+        self.login_worker.start()
+
+    def login_completato(self, utente):
+        self.login_button.setEnabled(True)
 
         if not utente:
             QMessageBox.warning(self, "SupplyChain", "Credenziali o codice OTP errati!")
@@ -1,10 +1,11 @@
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem, QIcon
+from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QListView, QHBoxLayout, QPushButton, QMenu, \
     QDialog, QComboBox, QDialogButtonBox, QMessageBox, QInputDialog
 
 from presentation.controller.guest_controller import ControllerGuest
 from presentation.view import funzioni_utili
+from presentation.view.lista_paginata import ModelloListaPaginata
 
 
 class VistaAziende(QMainWindow):
@@ -91,55 +92,43 @@ class VistaAziende(QMainWindow):
 
         funzioni_utili.center(self)
 
+    @staticmethod
+    def formatta_azienda(f):
+        saldo = f[2] - f[1]
+        if saldo < 0:
+            saldo = f"({-saldo})"
+        return f"Nome Azienda: {f[0][3]}\nSaldo CO2: {saldo}"
+
+    def crea_modello(self, carica_pagina):
+        # Le pagine vengono lette dal controller man mano che la lista scorre
+        return ModelloListaPaginata(carica_pagina, self.formatta_azienda)
+
     def genera_lista(self):
         self.nome_filtro = ''
         self.tipo_filtro = ''
         self.ordinata = False
-        model = QStandardItemModel()
-        for f in self.controller.lista_aziende():
-            saldo = f[2] - f[1]
-            if saldo < 0:
-                saldo = f"({-saldo})"
-            item = QStandardItem(f"Nome Azienda: {f[0][3]}\nSaldo CO2: {saldo}")
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello(self.controller.lista_aziende))
 
     def genera_lista_filtrata_tipo(self, tipo):
-        lista_by_tipo = self.controller.lista_aziende_filtro_tipo(tipo)
-        if len(lista_by_tipo) == 0:
+        model = self.crea_modello(
+            lambda limit, offset: self.controller.lista_aziende_filtro_tipo(tipo, limit=limit, offset=offset)
+        )
+        if model.is_vuota():
             QMessageBox.information(
                 self, 'SupplyChain', f'Non ci sono aziende del seguente tipo: {tipo}')
             self.genera_lista()
         else:
-            model = QStandardItemModel()
-            for f in lista_by_tipo:
-                saldo = f[2] - f[1]
-                if saldo < 0:
-                    saldo = f"({-saldo})"
-                item = QStandardItem(f"Nome Azienda: {f[0][3]}\nSaldo CO2: {saldo}")
-                item.setEditable(False)
-                item.setFont(QFont("Times Roman", 11))
-                model.appendRow(item)
             self.list_view.setModel(model)
 
     def genera_lista_filtrata_nome(self, nome):
-        lista_by_nome = self.controller.azienda_by_nome(nome)
-        if len(lista_by_nome) == 0:
+        model = self.crea_modello(
+            lambda limit, offset: self.controller.azienda_by_nome(nome, limit=limit, offset=offset)
+        )
+        if model.is_vuota():
             QMessageBox.information(
                 self, 'SupplyChain', f'Non ci sono aziende con il seguente nome: {nome}')
             self.genera_lista()
         else:
-            model = QStandardItemModel()
-            for f in lista_by_nome:
-                saldo = f[2] - f[1]
-                if saldo < 0:
-                    saldo = f"({-saldo})"
-                item = QStandardItem(f"Nome Azienda: {f[0][3]}\nSaldo CO2: {saldo}")
-                item.setEditable(False)
-                item.setFont(QFont("Times Roman", 11))
-                model.appendRow(item)
             self.list_view.setModel(model)
 
     def on_button_filtro_tipo_clicked(self):
@@ -200,41 +189,17 @@ class VistaAziende(QMainWindow):
         self.ordinata = True
         self.nome_filtro = ''
         self.tipo_filtro = ''
-        lista_ordinata = self.controller.lista_aziende_ordinata_co2()
-        model = QStandardItemModel()
-        for f in lista_ordinata:
-            saldo = f[2] - f[1]
-            if saldo < 0:
-                saldo = f"({-saldo})"
-            item = QStandardItem(f"Nome Azienda: {f[0][3]}\nSaldo CO2: {saldo}")
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello(self.controller.lista_aziende_ordinata_co2))
 
     def on_button_reset_clicked(self):
         self.genera_lista()
 
     def info(self):
-        global azienda
         selected_index = self.list_view.selectedIndexes()
 
         if selected_index:
             selected_item = selected_index[0].row()  # Ottieni l'indice dell'elemento selezionato
-            if self.tipo_filtro == '' and self.nome_filtro == '' and not self.ordinata:
-                azienda = self.controller.lista_aziende()[selected_item]
-            else:
-                if not self.ordinata:
-                    if self.nome_filtro == '':
-                        azienda = self.controller.lista_aziende_filtro_tipo(self.tipo_filtro)[
-                            selected_item
-                        ]
-                    elif self.tipo_filtro == '':
-                        azienda = self.controller.azienda_by_nome(self.nome_filtro)[
-                            selected_item
-                        ]
-                else:
-                    azienda = self.controller.lista_aziende_ordinata_co2()[selected_item]
+            azienda = self.list_view.model().riga(selected_item)
 
             saldo = azienda[2] - azienda[1]
             if saldo < 0:
@@ -5,7 +5,10 @@ from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QListView
 
 from presentation.controller.company_controller import ControllerAzienda
 from presentation.view import funzioni_utili
-from presentation.view.inserisci_azione import VistaInserisciAzione
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+VistaInserisciAzione = lazy_import("presentation.view.inserisci_azione", "VistaInserisciAzione")
 
 
 class VistaAzioniCompensative(QMainWindow):
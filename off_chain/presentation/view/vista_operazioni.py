@@ -1,16 +1,15 @@
 from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem, QIcon
+from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QListView, QHBoxLayout, QPushButton, QMenu, \
     QDialog, QDialogButtonBox, QMessageBox, QDateEdit
 
 from presentation.view import funzioni_utili
-from presentation.view.inserisci_operazione import VistaInserisciOperazione
-from presentation.controller.company_controller import ControllerAzienda
-from presentation.controller.certification_controller import ControllerCertificatore
-from presentation.controller.credential_controller import ControllerAutenticazione
-from presentation.controller.guest_controller import ControllerGuest
+from presentation.view.lista_paginata import ModelloListaPaginata
 
-from configuration.log_load_setting import logger
+from lazy_loader import lazy_import, lazy_instance
+
+# Caricati al primo utilizzo della vista
+VistaInserisciOperazione = lazy_import("presentation.view.inserisci_operazione", "VistaInserisciOperazione")
 
 
 
@@ -33,26 +32,24 @@ def stringa_giusta(f, is_storico, scarto):
             f"Scarto CO2 consumata: {scarto}")
 
 class VistaOperazioni(QMainWindow):
+    # Controller creati al primo accesso, non all'apertura della vista
+    controllerCertificatore = lazy_instance("presentation.controller.certification_controller",
+                                            "ControllerCertificatore")
+    controllerAzienda = lazy_instance("presentation.controller.company_controller", "ControllerAzienda")
+    controllerAutenticazione = lazy_instance("presentation.controller.credential_controller",
+                                             "ControllerAutenticazione")
+    controllerGuest = lazy_instance("presentation.controller.guest_controller", "ControllerGuest")
+
     def __init__(self, controller, azienda=(), is_storico=False, prodotto=()):
         super().__init__()
 
         # self.callback = callback
         self.controller = controller
-        self.controllerCertificatore = ControllerCertificatore()
-        self.controllerAzienda = ControllerAzienda()
-        self.controllerAutenticazione = ControllerAutenticazione()
-        self.controllerGuest = ControllerGuest()
         self.inserisci_operazione = None
         self.azienda = azienda
         self.is_storico = is_storico
         self.prodotto = prodotto
 
-        # Bisogna cambiare le stringhe nelle list view
-        if not is_storico:
-            self.lista_operazioni = self.controller.lista_operazioni(self.azienda[0])
-        else:
-            self.lista_operazioni = self.controller.lista_operazioni_prodotto(self.prodotto[0][0])
-
         self.data_inizio_filtro = ''
         self.data_fine_filtro = ''
         self.ordinata = False
@@ -129,56 +126,60 @@ class VistaOperazioni(QMainWindow):
         self.inserisci_operazione = VistaInserisciOperazione(self.genera_lista, self.azienda)
         self.inserisci_operazione.show()
 
-    def lista_giusta(self, is_storico, ordinata=False, d1=None, d2=None):
+    def lista_giusta(self, is_storico, ordinata=False, d1=None, d2=None, limit=None, offset=0):
+        pagina = {"limit": limit, "offset": offset}
         if is_storico:
-            return self.controller.lista_operazioni_prodotto(self.prodotto[0][0])
+            return self.controller.lista_operazioni_prodotto(self.prodotto[0][0], **pagina)
         else:
             if not ordinata and not d1 and not d2:
-                return self.controller.lista_operazioni(self.azienda[0])
+                return self.controller.lista_operazioni(self.azienda[0], **pagina)
             if ordinata and not d1 and not d2:
-                return self.controller.lista_operazioni_ordinata_co2(self.azienda[0])
+                return self.controller.lista_operazioni_ordinata_co2(self.azienda[0], **pagina)
             if not ordinata and d1 and d2:
-                return self.controller.lista_operazioni_per_data(self.azienda[0], d1, d2)
+                return self.controller.lista_operazioni_per_data(self.azienda[0], d1, d2, **pagina)
+
+    def chiave_soglia(self, f):
+        # (co2, operazione, prodotto) della riga, come atteso da scarti_soglia
+        if self.is_storico:
+            return f[4], f[5], f[2]
+        return f[5], f[6], f[2]
+
+    def carica_pagina(self, ordinata, d1, d2, limit, offset):
+        """
+        Reads a page of operations and their distance from the threshold with one scarti_soglia call.
+        Returns a list of (operazione, scarto).
+        """
+        operazioni = self.lista_giusta(self.is_storico, ordinata=ordinata, d1=d1, d2=d2,
+                                       limit=limit, offset=offset) or []
+        scarti = self.controller.scarti_soglia([self.chiave_soglia(f) for f in operazioni])
+        return list(zip(operazioni, scarti))
+
+    def formatta_operazione(self, riga):
+        operazione, scarto = riga
+        return stringa_giusta(operazione, self.is_storico, scarto)
+
+    def crea_modello(self, ordinata=False, d1=None, d2=None):
+        # Le pagine vengono lette dal controller man mano che la lista scorre
+        return ModelloListaPaginata(
+            lambda limit, offset: self.carica_pagina(ordinata, d1, d2, limit, offset),
+            self.formatta_operazione
+        )
 
     def genera_lista(self):
         self.data_inizio_filtro = ''
         self.data_fine_filtro = ''
         self.ordinata = False
-        model = QStandardItemModel()
-        for f in self.lista_giusta(self.is_storico):
-            print(f"Elemento f: {f}, tipo: {type(f)}")
-            if not isinstance(f, (list, tuple)):
-                logger.error(f"Elemento non valido: {f}")
-                continue  # Saltar este elemento
-            if self.is_storico:
-                scarto = self.controller.scarto_soglia(f[4], f[5], f[2])
-            else:
-                scarto = self.controller.scarto_soglia(f[5], f[6], f[2])
-            item = QStandardItem(stringa_giusta(f, self.is_storico, scarto))
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello())
 
     def genera_lista_filtrata_data(self, data_inizio, data_fine):
         # data_inizio = datetime.strptime(data_inizio, "%d/%m/%Y")
         # data_fine = datetime.strptime(data_fine, "%d/%m/%Y")
-        lista_by_data = self.lista_giusta(self.is_storico, d1=data_inizio, d2=data_fine)
-        if len(lista_by_data) == 0:
+        model = self.crea_modello(d1=data_inizio, d2=data_fine)
+        if model.is_vuota():
             QMessageBox.information(
                 self, 'SupplyChain', f'Non ci sono operazioni nel periodo indicato!')
             self.genera_lista()
         else:
-            model = QStandardItemModel()
-            for f in lista_by_data:
-                if self.is_storico:
-                    scarto = self.controller.scarto_soglia(f[4], f[5], f[2])
-                else:
-                    scarto = self.controller.scarto_soglia(f[5], f[6], f[2])
-                item = QStandardItem(stringa_giusta(f, self.is_storico, scarto))
-                item.setEditable(False)
-                item.setFont(QFont("Times Roman", 11))
-                model.appendRow(item)
             self.list_view.setModel(model)
 
     def on_button_filtro_data_clicked(self):
@@ -229,42 +230,18 @@ class VistaOperazioni(QMainWindow):
         self.ordinata = True
         self.data_inizio_filtro = ''
         self.data_fine_filtro = ''
-        lista_ordinata = self.lista_giusta(self.is_storico, ordinata=True)
-        model = QStandardItemModel()
-        for f in lista_ordinata:
-            if self.is_storico:
-                scarto = self.controller.scarto_soglia(f[4], f[5], f[2])
-            else:
-                scarto = self.controller.scarto_soglia(f[5], f[6], f[2])
-            item = QStandardItem(stringa_giusta(f, self.is_storico, scarto))
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello(ordinata=True))
 
     def on_button_reset_clicked(self):
         self.genera_lista()
 
     def info(self):
-        global operazione
         selected_index = self.list_view.selectedIndexes()
 
         if selected_index:
             selected_item = selected_index[0].row()  # Ottieni l'indice dell'elemento selezionato
-            if self.data_fine_filtro == '' and self.data_inizio_filtro == '' and not self.ordinata:
-                operazione = self.lista_giusta(self.is_storico)[selected_item]
-            else:
-                if not self.ordinata:
-                    operazione = self.lista_giusta(
-                        self.is_storico, d1=self.data_inizio_filtro, d2=self.data_fine_filtro
-                    )[selected_item]
-                else:
-                    operazione = self.lista_giusta(self.is_storico, ordinata=True)[selected_item]
-
-            if self.is_storico:
-                scarto = self.controller.scarto_soglia(operazione[4], operazione[5], operazione[2])
-            else:
-                scarto = self.controller.scarto_soglia(operazione[5], operazione[6], operazione[2])
+            operazione, scarto = self.list_view.model().riga(selected_item)
+
             QMessageBox.information(self, "SupplyChain",
                                     stringa_giusta(operazione, self.is_storico, scarto))
 
@@ -1,15 +1,22 @@
 from datetime import date
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem, QIcon
+from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QListView, QHBoxLayout, QPushButton, QMenu, \
     QMessageBox, QInputDialog, QDialog, QComboBox, QDialogButtonBox, QLineEdit, QCompleter
 
 from presentation.view import funzioni_utili
-from presentation.view.vista_operazioni import VistaOperazioni
+from presentation.view.lista_paginata import ModelloListaPaginata
+from lazy_loader import lazy_import
+
+# Caricate alla prima apertura della vista
+VistaOperazioni = lazy_import("presentation.view.vista_operazioni", "VistaOperazioni")
 
 
 class VistaProdotti(QMainWindow):
+    # Nomi distinti caricati al massimo nel completamento del filtro per nome
+    MAX_NOMI_COMPLETER = 1000
+
     def __init__(self, controller, certificatore=None, filtro_certificazioni=False):
         super().__init__()
 
@@ -95,118 +102,74 @@ class VistaProdotti(QMainWindow):
 
         funzioni_utili.center(self)
 
-    def lista_giusta(self, filtro_certificazioni, nome=None, rivenditore=None, ordinata=None):
+    def lista_giusta(self, filtro_certificazioni, nome=None, rivenditore=None, ordinata=None, limit=None, offset=0):
+        pagina = {"limit": limit, "offset": offset}
         if not filtro_certificazioni:
             if not nome and not rivenditore and not ordinata:
-                return self.controller.lista_prodotti()
+                return self.controller.lista_prodotti(**pagina)
             elif nome:
-                return self.controller.prodotti_by_nome(nome)
+                return self.controller.prodotti_by_nome(nome, **pagina)
             elif rivenditore:
-                return self.controller.lista_prodotti_rivenditore(rivenditore)
+                return self.controller.lista_prodotti_rivenditore(rivenditore, **pagina)
             elif ordinata:
-                return self.controller.lista_prodotti_ordinati_co2()
+                return self.controller.lista_prodotti_ordinati_co2(**pagina)
         else:
             if not nome and not rivenditore and not ordinata:
-                return self.controller.lista_prodotti_certificati()
+                return self.controller.lista_prodotti_certificati(**pagina)
             elif nome:
-                return self.controller.lista_prodotti_certificati_by_nome(nome)
+                return self.controller.lista_prodotti_certificati_by_nome(nome, **pagina)
             elif rivenditore:
-                return self.controller.lista_prodotti_certificati_rivenditore(rivenditore)
+                return self.controller.lista_prodotti_certificati_rivenditore(rivenditore, **pagina)
             elif ordinata:
-                return self.controller.lista_prodotti_certificati_ordinata()
+                return self.controller.lista_prodotti_certificati_ordinata(**pagina)
+
+    def formatta_prodotto(self, f):
+        # Il flag di certificazione arriva con la riga, nessuna query per prodotto
+        stella = " ★" if f[2] else ""
+        return (f"ID: {f[0][0]}{stella}\n"
+                f"Nome: {f[0][1]}\n"
+                f"Rivenditore: {f[0][4]}\n"
+                f"CO2 consumata per la produzione: {f[1]}")
+
+    def crea_modello(self, nome=None, rivenditore=None, ordinata=None):
+        # Le pagine vengono lette dal controller man mano che la lista scorre
+        return ModelloListaPaginata(
+            lambda limit, offset: self.lista_giusta(
+                self.filtro_certificazioni, nome=nome, rivenditore=rivenditore, ordinata=ordinata,
+                limit=limit, offset=offset
+            ),
+            self.formatta_prodotto
+        )
 
     def genera_lista(self):
         self.nome_filtro = ''
         self.rivenditore_filtro = 0
         self.ordinata = False
-        model = QStandardItemModel()
-        for f in self.lista_giusta(self.filtro_certificazioni):
-            item = QStandardItem(f"ID: {f[0][0]}\n"
-                                 f"Nome: {f[0][1]}\n"
-                                 f"Rivenditore: {f[0][4]}\n"
-                                 f"CO2 consumata per la produzione: {f[1]}")
-            if self.controller.is_certificato(f[0][0]):
-                item.setText(f"ID: {f[0][0]} ★\n"
-                             f"Nome: {f[0][1]}\n"
-                             f"Rivenditore: {f[0][4]}\n"
-                             f"CO2 consumata per la produzione: {f[1]}")
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello())
 
     def genera_lista_filtrata_nome(self, nome):
-        lista_by_nome = self.lista_giusta(
-            self.filtro_certificazioni, nome=nome
-        )
-        if len(lista_by_nome) == 0:
+        model = self.crea_modello(nome=nome)
+        if model.is_vuota():
             QMessageBox.information(
                 self, 'SupplyChain', f'Non ci sono prodotti con il seguente nome: {nome}')
             self.genera_lista()
         else:
-            model = QStandardItemModel()
-            for f in lista_by_nome:
-                item = QStandardItem(f"ID: {f[0][0]}\n"
-                                     f"Nome: {f[0][1]}\n"
-                                     f"Rivenditore: {f[0][4]}\n"
-                                     f"CO2 consumata per la produzione: {f[1]}")
-                if self.controller.is_certificato(f[0][0]):
-                    item.setText(f"ID: {f[0][0]} ★\n"
-                                 f"Nome: {f[0][1]}\n"
-                                 f"Rivenditore: {f[0][4]}\n"
-                                 f"CO2 consumata per la produzione: {f[1]}")
-                item.setEditable(False)
-                item.setFont(QFont("Times Roman", 11))
-                model.appendRow(item)
             self.list_view.setModel(model)
 
     def genera_lista_filtrata_rivenditore(self, r):
-        lista_by_rivenditore = self.lista_giusta(
-            self.filtro_certificazioni, rivenditore=r
-        )
-        if len(lista_by_rivenditore) == 0:
+        model = self.crea_modello(rivenditore=r)
+        if model.is_vuota():
             QMessageBox.information(
                 self, 'SupplyChain', f'Non ci sono prodotti con il seguente rivenditore: {r}')
             self.genera_lista()
         else:
-            model = QStandardItemModel()
-            for f in lista_by_rivenditore:
-                item = QStandardItem(f"ID: {f[0][0]}\n"
-                                     f"Nome: {f[0][1]}\n"
-                                     f"Rivenditore: {f[0][4]}\n"
-                                     f"CO2 consumata per la produzione: {f[1]}")
-                if self.controller.is_certificato(f[0][0]):
-                    item.setText(f"ID: {f[0][0]} ★\n"
-                                 f"Nome: {f[0][1]}\n"
-                                 f"Rivenditore: {f[0][4]}\n"
-                                 f"CO2 consumata per la produzione: {f[1]}")
-                item.setEditable(False)
-                item.setFont(QFont("Times Roman", 11))
-                model.appendRow(item)
             self.list_view.setModel(model)
 
     def on_button_ordina_clicked(self):
         self.ordinata = True
         self.nome_filtro = ''
         self.rivenditore_filtro = 0
-        lista_ordinata = self.lista_giusta(
-            self.filtro_certificazioni, ordinata=True
-        )
-        model = QStandardItemModel()
-        for f in lista_ordinata:
-            item = QStandardItem(f"ID: {f[0][0]}\n"
-                                 f"Nome: {f[0][1]}\n"
-                                 f"Rivenditore: {f[0][4]}\n"
-                                 f"CO2 consumata per la produzione: {f[1]}")
-            if self.controller.is_certificato(f[0][0]):
-                item.setText(f"ID: {f[0][0]} ★\n"
-                             f"Nome: {f[0][1]}\n"
-                             f"Rivenditore: {f[0][4]}\n"
-                             f"CO2 consumata per la produzione: {f[1]}")
-            item.setEditable(False)
-            item.setFont(QFont("Times Roman", 11))
-            model.appendRow(item)
-        self.list_view.setModel(model)
+        self.list_view.setModel(self.crea_modello(ordinata=True))
 
     def on_button_filtro_rivenditore_clicked(self):
         # Crea un QDialog personalizzato
@@ -258,7 +221,7 @@ class VistaProdotti(QMainWindow):
 
         # Crea una QComboBox e aggiungi le opzioni
         line_edit = QLineEdit(dialog)
-        options = [prodotto[0][1] for prodotto in self.controller.lista_prodotti()]
+        options = self.controller.lista_nomi_prodotti(limit=self.MAX_NOMI_COMPLETER)
         completer = QCompleter(options)
         completer.setCaseSensitivity(False)
         completer.setFilterMode(Qt.MatchContains)
@@ -295,35 +258,11 @@ class VistaProdotti(QMainWindow):
         self.info('certifica')
 
     def info(self, info=''):
-        global prodotto
         selected_index = self.list_view.selectedIndexes()
 
         if selected_index:
             selected_item = selected_index[0].row()  # Ottieni l'indice dell'elemento selezionato
-            if not self.ordinata and self.nome_filtro == '' and self.rivenditore_filtro == 0:
-                prodotto = self.lista_giusta(
-                    self.filtro_certificazioni
-                )[selected_item]
-            else:
-                if not self.ordinata:
-                    if self.nome_filtro == '':
-                        prodotto = self.lista_giusta(
-                            self.filtro_certificazioni,
-                            rivenditore=self.rivenditore_filtro
-                        )[
-                            selected_item
-                        ]
-                    elif self.rivenditore_filtro == 0:
-                        prodotto = self.lista_giusta(
-                            self.filtro_certificazioni,
-                            nome=self.nome_filtro
-                        )[
-                            selected_item
-                        ]
-                else:
-                    prodotto = self.lista_giusta(
-                        self.filtro_certificazioni, ordinata=True
-                    )[selected_item]
+            prodotto = self.list_view.model().riga(selected_item)
 
             if info == '':
                 QMessageBox.information(self, "SupplyChain",
@@ -3,6 +3,8 @@ from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem, QIcon
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QLabel, QListView, QHBoxLayout,
                              QPushButton, QMessageBox, QDialog, QDialogButtonBox, QComboBox)
 
+from presentation.controller.certification_controller import ControllerCertificatore
+from presentation.controller.company_controller import ControllerAzienda
 from presentation.view import funzioni_utili
 
 
@@ -13,16 +15,9 @@ class VistaSoglie(QMainWindow):
         # self.callback = callback
         self.certificatore = certificatore
 
-        self.lista_prova = [
-            ("Produzione", "Pomodori", 50),  # Soglia massima di CO₂: 50
-            ("Produzione", "Olio d'oliva", 40),
-            ("Trasformazione", "Passata di pomodoro", 30),
-            ("Trasformazione", "Pane", 25),
-            ("Trasporto", "Pomodori", 60),
-            ("Trasporto", "Patate", 55),
-            ("Messa su scaffali", "Passata di pomodoro", 20),
-            ("Messa su scaffali", "Patatine fritte confezionate", 15),
-        ]
+        # Le soglie arrivano dall'indice condiviso del ThresholdRepositoryImpl
+        self.controller = ControllerCertificatore() if certificatore else ControllerAzienda()
+        self.lista_soglie = []
 
         # Elementi di layout
         self.list_view = QListView()
@@ -67,8 +62,9 @@ class VistaSoglie(QMainWindow):
         funzioni_utili.center(self)
 
     def genera_lista(self):
+        self.lista_soglie = self.controller.lista_soglie()
         model = QStandardItemModel()
-        for f in self.lista_prova:
+        for f in self.lista_soglie:
             item = QStandardItem(f"Operazione: {f[0]}\n"
                                  f"Prodotto: {f[1]}\n"
                                  f"Soglia CO2: {f[2]}")
@@ -82,7 +78,7 @@ class VistaSoglie(QMainWindow):
 
         if selected_index:
             selected_item = selected_index[0].row()
-            soglia = self.lista_prova[selected_item]
+            soglia = self.lista_soglie[selected_item]
 
             # Crea un QDialog personalizzato
             dialog = QDialog(self)
@@ -111,7 +107,11 @@ class VistaSoglie(QMainWindow):
                 if selected_option.strip() == "":
                     QMessageBox.warning(dialog, 'Errore', 'Devi selezionare qualcosa!')
                 else:
-                    self.lista_prova[selected_item] = (soglia[0], soglia[1], int(selected_option))
+                    try:
+                        self.controller.modifica_soglia(soglia[0], soglia[1], int(selected_option))
+                    except Exception as e:
+                        QMessageBox.warning(dialog, 'Errore', f"Impossibile modificare la soglia: {e}")
+                        return
                     self.genera_lista()
                     dialog.accept()
                     QMessageBox.information(self, "Nessuna selezione",
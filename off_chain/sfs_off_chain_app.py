@@ -1,41 +1,15 @@
 import sys
-import time
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtWidgets import QApplication, QSplashScreen
-
-from configuration.log_load_setting import logger
-from database.db_migrations import DatabaseMigrations
-from presentation.view.vista_accedi import VistaAccedi
-
-
-def setup_database():
-
-    try:
-        DatabaseMigrations.run_migrations()
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        sys.exit(1)  # Stops the application if there is a critical error
+# Per primo: con SFS_IMPORT_PROFILE=1 cronometra anche gli import che seguono
+import lazy_loader
+from gui_manager import setup_gui
 
 
 if __name__ == "__main__":
-    # Configure the database before starting the graphical interface
-    setup_database()
-    # Starting the PyQt application
-    app = QApplication(sys.argv)
-    logger.info("Frontend: Starting the PyQt application...")
-
-    # Show Splash Screen
-    splash = QSplashScreen(QPixmap("presentation/resources/logo_splash.png"), Qt.WindowStaysOnTopHint)
-    splash.show()
-
-    time.sleep(1)
-    finestra = VistaAccedi()
-    finestra.show()
-    splash.finish(finestra)
+    # Database, viste e blockchain partono in parallelo (gui_manager.build_startup):
+    # la finestra di login compare appena database e viste sono pronti
+    app, finestra = setup_gui()
     sys.exit(app.exec())
 
     # Close the database connection when the app closes
     # app.aboutToQuit.connect(DatabaseConnectionSetting.close_connection)
-
@@ -0,0 +1,202 @@
+# startup_orchestrator.py - Application startup as a dependency graph of stages run in parallel.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_FINISHED = (DONE, FAILED, SKIPPED)
+
+
+class StartupStageError(Exception):
+    """Raised by result() for a stage that failed or was skipped because a dependency failed."""
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable[[], Any], depends: List[str], description: str):
+        self.name = name
+        self.func = func
+        self.depends = depends
+        self.description = description
+        self.state = PENDING
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.started = None
+        self.finished = None
+        self.callbacks: List[Callable[[bool, Any], None]] = []
+
+
+class StartupOrchestrator:
+    """
+    Runs the startup stages on a thread pool, each one as soon as all its dependencies are done.
+    A stage whose dependency fails is skipped. Start offset and duration of every stage are logged,
+    and a summary is logged when the last stage finishes.
+
+    Callers wait only for the stages they need (wait(["database"])) and register
+    on_complete callbacks for the others; callbacks run on the worker thread of the stage.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, max_workers: int = 4):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self._stages: Dict[str, _Stage] = {}
+        self._condition = threading.Condition()
+        self._executor = None
+        self._started = None
+
+    def add(self, name: str, func: Callable[[], Any], depends: Iterable[str] = (),
+            description: Optional[str] = None):
+        """Adds a stage; func() runs once all the stages in depends are done."""
+        if self._executor is not None:
+            raise RuntimeError("Stages must be added before start()")
+        if name in self._stages:
+            raise ValueError(f"Duplicate startup stage '{name}'")
+        self._stages[name] = _Stage(name, func, list(depends), description or name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def _check_graph(self):
+        for stage in self._stages.values():
+            for dipendenza in stage.depends:
+                if dipendenza not in self._stages:
+                    raise ValueError(f"Startup stage '{stage.name}' depends on unknown stage '{dipendenza}'")
+        visitati, in_corso = set(), set()
+
+        def visita(nome):
+            if nome in in_corso:
+                raise ValueError(f"Startup stages have a dependency cycle through '{nome}'")
+            if nome not in visitati:
+                in_corso.add(nome)
+                for dipendenza in self._stages[nome].depends:
+                    visita(dipendenza)
+                in_corso.discard(nome)
+                visitati.add(nome)
+
+        for nome in self._stages:
+            visita(nome)
+
+    def start(self):
+        """Starts every stage without dependencies; returns immediately."""
+        self._check_graph()
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Startup")
+        with self._condition:
+            pronti = [stage for stage in self._stages.values() if not stage.depends]
+            for stage in pronti:
+                stage.state = RUNNING
+        for stage in pronti:
+            self._executor.submit(self._run, stage)
+        return self
+
+    def _run(self, stage: _Stage):
+        stage.started = time.perf_counter()
+        try:
+            risultato, errore = stage.func(), None
+        except BaseException as e:
+            # Anche SystemExit: uno stage non deve chiudere l'applicazione dal suo thread
+            risultato, errore = None, e
+        self._finish(stage, DONE if errore is None else FAILED, risultato, errore)
+
+    def _finish(self, stage: _Stage, state: str, risultato=None, errore=None):
+        stage.finished = time.perf_counter()
+        if state == DONE:
+            self.logger.info(f"Startup: stage '{stage.name}' done in {stage.finished - stage.started:.2f}s "
+                             f"(started at +{stage.started - self._started:.2f}s)")
+        elif state == FAILED:
+            self.logger.error(f"Startup: stage '{stage.name}' failed after {stage.finished - stage.started:.2f}s: "
+                              f"{errore}")
+        else:
+            self.logger.warning(f"Startup: stage '{stage.name}' skipped, a dependency did not complete")
+
+        da_avviare, da_saltare = [], []
+        with self._condition:
+            stage.state, stage.result, stage.error = state, risultato, errore
+            for altro in self._stages.values():
+                if altro.state != PENDING or stage.name not in altro.depends:
+                    continue
+                stati = [self._stages[d].state for d in altro.depends]
+                if any(s in (FAILED, SKIPPED) for s in stati):
+                    # Segnato come avviato: diventa SKIPPED nella sua _finish
+                    altro.state = RUNNING
+                    da_saltare.append(altro)
+                elif all(s == DONE for s in stati):
+                    altro.state = RUNNING
+                    da_avviare.append(altro)
+            callbacks = list(stage.callbacks)
+            finito = all(s.state in _FINISHED for s in self._stages.values())
+            self._condition.notify_all()
+
+        for altro in da_avviare:
+            self._executor.submit(self._run, altro)
+        self._notify(stage, callbacks)
+        for altro in da_saltare:
+            altro.started = stage.finished
+            self._finish(altro, SKIPPED, errore=StartupStageError(f"Dependency '{stage.name}' did not complete"))
+        if finito:
+            self._log_summary()
+
+    def _notify(self, stage: _Stage, callbacks):
+        for callback in callbacks:
+            try:
+                callback(stage.state == DONE, stage.result if stage.state == DONE else stage.error)
+            except Exception as e:
+                self.logger.error(f"Startup: callback of stage '{stage.name}' failed: {e}")
+
+    def _log_summary(self):
+        totale = max(s.finished for s in self._stages.values()) - self._started
+        dettagli = ", ".join(f"{s.name} {s.state} {s.finished - s.started:.2f}s"
+                             for s in sorted(self._stages.values(), key=lambda s: s.started))
+        self.logger.info(f"Startup: all stages finished in {totale:.2f}s ({dettagli})")
+        self._executor.shutdown(wait=False)
+
+    def on_complete(self, name: str, callback: Callable[[bool, Any], None]):
+        """
+        callback(ok, result or error) runs when the stage finishes (immediately if it has already).
+        """
+        stage = self._stages[name]
+        with self._condition:
+            if stage.state not in _FINISHED:
+                stage.callbacks.append(callback)
+                return
+        self._notify(stage, [callback])
+
+    def wait(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """Waits until the given stages (all by default) are finished; False on timeout."""
+        stages = [self._stages[n] for n in names] if names is not None else list(self._stages.values())
+        with self._condition:
+            return self._condition.wait_for(lambda: all(s.state in _FINISHED for s in stages), timeout)
+
+    def state(self, name: str) -> str:
+        return self._stages[name].state
+
+    def succeeded(self, name: str) -> bool:
+        return self._stages[name].state == DONE
+
+    def result(self, name: str) -> Any:
+        """Result of a finished stage; raises StartupStageError if it failed or was skipped."""
+        stage = self._stages[name]
+        if stage.state != DONE:
+            raise StartupStageError(f"Startup stage '{name}' is {stage.state}: {stage.error}")
+        return stage.result
+
+    def status_message(self) -> str:
+        """Descriptions of the running stages, for the splash screen."""
+        with self._condition:
+            in_corso = [s.description for s in self._stages.values() if s.state == RUNNING]
+        return " | ".join(in_corso)
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        """{stage: {"state", "start", "duration"}} with start relative to start()."""
+        with self._condition:
+            return {s.name: {"state": s.state,
+                             "start": None if s.started is None else s.started - self._started,
+                             "duration": None if s.finished is None else s.finished - s.started}
+                    for s in self._stages.values()}
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# I moduli off-chain si importano dalla cartella off_chain, come fa sfs_off_chain_app.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
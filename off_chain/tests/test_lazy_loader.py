@@ -0,0 +1,35 @@
+import sys
+
+from lazy_loader import lazy_import, lazy_instance
+
+
+def test_lazy_import_loads_the_module_on_first_use():
+    sys.modules.pop("colorsys", None)
+    rgb_to_hsv = lazy_import("colorsys", "rgb_to_hsv")
+
+    assert not rgb_to_hsv.loaded
+    assert "colorsys" not in sys.modules
+    assert rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert rgb_to_hsv.loaded
+
+
+class Creato:
+    istanze = 0
+
+    def __init__(self):
+        Creato.istanze += 1
+
+
+class Vista:
+    controller = lazy_instance(__name__, "Creato")
+
+
+def test_lazy_instance_is_created_on_first_access_once_per_object():
+    Creato.istanze = 0
+    vista, altra = Vista(), Vista()
+    assert Creato.istanze == 0
+
+    assert vista.controller is vista.controller
+    assert Creato.istanze == 1
+    assert altra.controller is not vista.controller
+    assert Creato.istanze == 2
@@ -0,0 +1,98 @@
+import sys
+import threading
+
+import pytest
+
+from startup_orchestrator import DONE, FAILED, SKIPPED, StartupOrchestrator, StartupStageError
+
+
+def test_stages_run_after_their_dependencies_and_in_parallel():
+    orchestrator = StartupOrchestrator()
+    ordine = []
+    barriera = threading.Barrier(2, timeout=5)
+
+    def stage(nome, parallelo=False):
+        def run():
+            if parallelo:
+                # I due stage indipendenti devono essere in esecuzione insieme
+                barriera.wait()
+            ordine.append(nome)
+            return nome
+        return run
+
+    orchestrator.add("database", stage("database", parallelo=True))
+    orchestrator.add("hardhat", stage("hardhat", parallelo=True))
+    orchestrator.add("contracts", stage("contracts"), depends=["hardhat"])
+    orchestrator.add("anchoring", stage("anchoring"), depends=["contracts", "database"])
+    orchestrator.start()
+
+    assert orchestrator.wait(timeout=5)
+    assert ordine.index("contracts") > ordine.index("hardhat")
+    assert ordine[-1] == "anchoring"
+    assert orchestrator.result("anchoring") == "anchoring"
+
+
+def test_a_failed_stage_skips_everything_that_depends_on_it():
+    orchestrator = StartupOrchestrator()
+    risultati = {}
+
+    def fallisce():
+        raise RuntimeError("node not started")
+
+    orchestrator.add("hardhat", fallisce)
+    orchestrator.add("contracts", lambda: "deployed", depends=["hardhat"])
+    orchestrator.add("blockchain", lambda: "ready", depends=["contracts"])
+    orchestrator.add("database", lambda: "migrated")
+    orchestrator.on_complete("blockchain", lambda ok, risultato: risultati.update(blockchain=(ok, risultato)))
+    orchestrator.start()
+
+    assert orchestrator.wait(timeout=5)
+    assert orchestrator.state("hardhat") == FAILED
+    assert orchestrator.state("contracts") == SKIPPED
+    assert orchestrator.state("blockchain") == SKIPPED
+    assert orchestrator.state("database") == DONE
+    assert risultati["blockchain"][0] is False
+    with pytest.raises(StartupStageError):
+        orchestrator.result("contracts")
+
+
+def test_on_complete_runs_at_once_for_a_finished_stage():
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("database", lambda: 42)
+    orchestrator.start()
+    orchestrator.wait(timeout=5)
+
+    chiamate = []
+    orchestrator.on_complete("database", lambda ok, risultato: chiamate.append((ok, risultato)))
+    assert chiamate == [(True, 42)]
+
+
+def test_system_exit_in_a_stage_does_not_stop_the_application():
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("views", lambda: sys.exit(1))
+    orchestrator.start()
+
+    assert orchestrator.wait(timeout=5)
+    assert orchestrator.state("views") == FAILED
+
+
+def test_a_dependency_cycle_is_refused_before_starting():
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("a", lambda: None, depends=["c"])
+    orchestrator.add("b", lambda: None, depends=["a"])
+    orchestrator.add("c", lambda: None, depends=["b"])
+
+    with pytest.raises(ValueError, match="cycle"):
+        orchestrator.start()
+
+
+def test_unknown_and_duplicate_stages_are_refused():
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("contracts", lambda: None, depends=["hardhat"])
+    with pytest.raises(ValueError, match="unknown stage 'hardhat'"):
+        orchestrator.start()
+
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("database", lambda: None)
+    with pytest.raises(ValueError):
+        orchestrator.add("database", lambda: None)
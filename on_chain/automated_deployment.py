@@ -1,44 +1,23 @@
-import subprocess
 import json
 import time
 import os
-import requests
 import sys
 
 # Import logger from off_chain configuration
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from off_chain.configuration.log_load_setting import logger
+from on_chain.deployment_cache import deploy_contracts as deploy_contracts_cached
+from on_chain.hardhat_supervisor import get_supervisor
 
 # Constants
 HARDHAT_NODE_URL = "http://127.0.0.1:8545"
 LOG_PREFIX_HARDHAT = "[HARDHAT] "
 
 def start_hardhat_node():
-    """Start the Hardhat node and wait for it to be ready"""
+    """Start the Hardhat node through the shared supervisor and wait for it to be ready"""
     try:
-        # Get the project root directory
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        on_chain_dir = os.path.join(project_root, "on_chain")
-        
-        logger.info(f"{LOG_PREFIX_HARDHAT}Starting Hardhat node...")
-        
-        # Use shell=True on Windows to avoid console window popup
-        shell_param = True if sys.platform == 'win32' else False
-        
-        # Start the Hardhat node
-        node_process = subprocess.Popen(
-            "npx hardhat node",
-            shell=shell_param,
-            cwd=on_chain_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node process started")
-        
-        # Wait for the node to be ready
-        if not wait_for_hardhat_node():
+        supervisor = get_supervisor(node_url=HARDHAT_NODE_URL, logger=logger)
+        if not supervisor.start():
             logger.error(f"{LOG_PREFIX_HARDHAT}Failed to start Hardhat node")
             return False
             
@@ -50,47 +29,16 @@ def start_hardhat_node():
         return False
 
 
-def wait_for_hardhat_node(max_attempts=30, delay=1):
-    """Wait for Hardhat node to be available."""
-    logger.info(f"{LOG_PREFIX_HARDHAT}Waiting for Hardhat node to be ready...")
-    
-    for attempt in range(max_attempts):
-        try:
-            response = requests.post(
-                HARDHAT_NODE_URL,
-                json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                timeout=2
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node is ready (attempt {attempt + 1}/{max_attempts})")
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        
-        logger.info(f"{LOG_PREFIX_HARDHAT}Waiting for Hardhat node... ({attempt + 1}/{max_attempts})")
-        time.sleep(delay)
-    
-    logger.error(f"{LOG_PREFIX_HARDHAT}Hardhat node did not start after {max_attempts} attempts")
-    return False   
-
 def deploy_contracts_with_hardhat():
     """Deploy contracts using Hardhat"""
     try:
-        # Get the project root directory
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        on_chain_dir = os.path.join(project_root, "on_chain")
-        
         logger.info(f"{LOG_PREFIX_HARDHAT}Deploying contracts with Hardhat...")
         
-        # Run the Hardhat deployment script
-        result = subprocess.run(
-            "npx hardhat run scripts/deploy.js --network localhost",
-            shell=True if sys.platform == 'win32' else False,
-            cwd=on_chain_dir,
-            capture_output=True,
-            text=True
-        )
+        # Run the Hardhat deployment script only for the contracts missing or changed
+        result = deploy_contracts_cached(HARDHAT_NODE_URL)
+        if result is None:
+            logger.info(f"{LOG_PREFIX_HARDHAT}Contracts already deployed, deployment skipped")
+            return True
         
         if result.returncode != 0:
             error_message = f"Contract deployment failed: {result.stderr}"
@@ -0,0 +1,178 @@
+# bridge_client.py - Long-lived ethers.js bridge process spoken to with newline-delimited JSON-RPC.
+
+import atexit
+import itertools
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, List, Optional
+
+
+class BridgeError(Exception):
+    """Error returned by the bridge or raised when the bridge process is not available."""
+
+
+class EthersBridgeClient:
+    """
+    Supervises one `node ethers_bridge.js --server` process and sends it JSON-RPC requests,
+    one JSON object per line on stdin, one response per line on stdout.
+    Every request has its own id, so concurrent calls from several threads are pipelined
+    on the same process. If the process dies it is restarted, with a growing delay
+    between consecutive restarts; the calls in flight fail with BridgeError.
+    """
+
+    def __init__(self, bridge_path: Path, cwd: Optional[Path] = None, timeout: float = 120.0,
+                 max_restart_delay: float = 10.0):
+        self.bridge_path = Path(bridge_path)
+        self.cwd = Path(cwd) if cwd else self.bridge_path.parent
+        self.timeout = timeout
+        self.max_restart_delay = max_restart_delay
+
+        self._process = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()        # stato del processo e richieste in attesa
+        self._write_lock = threading.Lock()  # una riga alla volta su stdin
+        self._closed = False
+        self._restarts = 0
+        self._last_start = 0.0
+        self._restart_at = None  # istante del prossimo riavvio dopo un crash
+        atexit.register(self.close)
+
+    def start(self):
+        """Starts the bridge process if it is not running."""
+        self._ensure_process()
+
+    def _ensure_process(self):
+        """
+        Returns the running bridge process, starting it if needed. The restart delay is
+        computed under _lock but waited outside it, so other threads are not blocked meanwhile.
+        """
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise BridgeError("Bridge client is closed")
+                if self._process is not None and self._process.poll() is None:
+                    return self._process
+                adesso = time.monotonic()
+                if self._process is not None and self._restart_at is None:
+                    # Riavvio dopo un crash: attesa crescente se il processo muore subito
+                    self._restarts += 1
+                    if adesso - self._last_start < self.max_restart_delay:
+                        ritardo = min(0.5 * 2 ** (self._restarts - 1), self.max_restart_delay)
+                    else:
+                        self._restarts = 1
+                        ritardo = 0.0
+                    self._restart_at = adesso + ritardo
+                attesa = 0.0 if self._restart_at is None else self._restart_at - adesso
+                if attesa <= 0:
+                    if self._process is not None:
+                        print(f"[ETHERS.JS] Restarting bridge process (restart {self._restarts})")
+                    return self._start_process()
+            time.sleep(attesa)
+
+    def _start_process(self):
+        # Chiamato con _lock acquisito
+        self._restart_at = None
+        self._process = subprocess.Popen(
+            ["node", str(self.bridge_path), "--server"],
+            cwd=str(self.cwd),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self._last_start = time.monotonic()
+        threading.Thread(target=self._read_responses, args=(self._process,), name="EthersBridgeReader",
+                         daemon=True).start()
+        threading.Thread(target=self._read_errors, args=(self._process,), name="EthersBridgeStderr",
+                         daemon=True).start()
+        return self._process
+
+    def _read_responses(self, process):
+        for line in process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[ETHERS.JS] {line}")
+                continue
+            with self._lock:
+                _, future = self._pending.pop(message.get("id"), (None, None))
+            if future is None:
+                continue
+            if "error" in message:
+                future.set_exception(BridgeError(message["error"].get("message", "Bridge error")))
+            else:
+                future.set_result(message.get("result"))
+
+        # stdout chiuso: il processo e' terminato, le richieste in volo non avranno risposta
+        process.wait()
+        with self._lock:
+            orfane = [request_id for request_id, (owner, _) in self._pending.items() if owner is process]
+            pending = [self._pending.pop(request_id)[1] for request_id in orfane]
+            crashed = process is self._process and not self._closed
+        for future in pending:
+            future.set_exception(BridgeError(f"Bridge process exited with code {process.returncode}"))
+        if crashed:
+            try:
+                self.start()
+            except Exception as e:
+                print(f"[ETHERS.JS] Unable to restart bridge process: {e}")
+
+    @staticmethod
+    def _read_errors(process):
+        for line in process.stderr:
+            if line.strip():
+                print(f"[ETHERS.JS] {line.rstrip()}")
+
+    def submit(self, method: str, params: Optional[List[Any]] = None) -> Future:
+        """Sends a request without waiting and returns the Future of its result."""
+        future = Future()
+        while True:
+            process = self._ensure_process()
+            with self._lock:
+                # Se il processo e' gia' morto la sua pulizia potrebbe essere passata: si riprova
+                if process is self._process and process.poll() is None:
+                    request_id = next(self._ids)
+                    self._pending[request_id] = (process, future)
+                    break
+        line = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or []})
+        try:
+            with self._write_lock:
+                process.stdin.write(line + "\n")
+                process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            with self._lock:
+                ancora_in_attesa = self._pending.pop(request_id, None) is not None
+            if ancora_in_attesa:
+                future.set_exception(BridgeError(f"Unable to write to bridge process: {e}"))
+        return future
+
+    def call(self, method: str, params: Optional[List[Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Sends a request and waits for its result."""
+        future = self.submit(method, params)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            raise BridgeError(f"Bridge call {method} timed out")
+
+    def close(self):
+        """Stops the bridge process: closing stdin makes it exit."""
+        with self._lock:
+            self._closed = True
+            process, self._process = self._process, None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
@@ -0,0 +1,172 @@
+# co2_projection.py - Local mirror of the SupplyChainCO2 lots, transformations and transports, with a diff
+# against the off-chain Prodotto/Operazione/Composizione tables.
+
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:
+    from on_chain.web3_transport import PROJECT_DIR
+except ImportError:
+    from web3_transport import PROJECT_DIR
+
+OFF_CHAIN_DB_PATH = PROJECT_DIR.parent / "off_chain" / "database" / "sfs_chain_database.db"
+
+CONTRACT_NAME = "SupplyChainCO2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Lotto_chain (
+    Id_lotto INTEGER PRIMARY KEY,
+    Nome_prodotto TEXT,
+    Produttore TEXT NOT NULL,
+    Co2 REAL NOT NULL,
+    Blocco INTEGER NOT NULL,
+    Log_index INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Trasformazione_chain (
+    Blocco INTEGER NOT NULL,
+    Log_index INTEGER NOT NULL,
+    Da_lotto INTEGER NOT NULL,
+    A_lotto INTEGER NOT NULL,
+    Trasformatore TEXT NOT NULL,
+    Co2 REAL NOT NULL,
+    PRIMARY KEY (Blocco, Log_index)
+);
+CREATE TABLE IF NOT EXISTS Trasporto_chain (
+    Blocco INTEGER NOT NULL,
+    Log_index INTEGER NOT NULL,
+    Id_lotto INTEGER NOT NULL,
+    Trasportatore TEXT NOT NULL,
+    Co2 REAL NOT NULL,
+    Partenza TEXT,
+    Arrivo TEXT,
+    PRIMARY KEY (Blocco, Log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_trasformazione_chain_a_lotto ON Trasformazione_chain (A_lotto);
+CREATE INDEX IF NOT EXISTS idx_trasporto_chain_lotto ON Trasporto_chain (Id_lotto);
+"""
+
+# CO2 di ogni lotto on-chain: quella del lotto piu' quella dei suoi trasporti
+_CO2_LOTTI = """
+SELECT Lotto_chain.Id_lotto, Lotto_chain.Nome_prodotto,
+       Lotto_chain.Co2 + COALESCE((SELECT SUM(Co2) FROM Trasporto_chain
+                                   WHERE Trasporto_chain.Id_lotto = Lotto_chain.Id_lotto), 0) AS Co2
+FROM Lotto_chain
+"""
+
+_CO2_PRODOTTI = """
+SELECT Prodotto.Id_prodotto, Prodotto.Nome,
+       COALESCE((SELECT SUM(Consumo_CO2) FROM off_chain.Operazione
+                 WHERE Operazione.Id_prodotto = Prodotto.Id_prodotto), 0) AS Co2
+FROM off_chain.Prodotto AS Prodotto
+"""
+
+
+class SupplyChainCO2Projection:
+    """
+    Applies the decoded SupplyChainCO2 events to the mirror tables Lotto_chain,
+    Trasformazione_chain and Trasporto_chain, in the database of the EventIndexer and
+    in the same transaction as its checkpoint.
+    Every row is keyed on the (block, log index) of its event, or on the lot id,
+    so a replayed event changes nothing. When the indexer finds that the chain was reset
+    (a restarted Hardhat node) it calls reset(), which empties the three tables.
+
+    A lot is matched with the off-chain product having the same id.
+    """
+
+    def __init__(self, indexer, off_chain_db_path: Path = OFF_CHAIN_DB_PATH):
+        self.indexer = indexer
+        self.off_chain_db_path = Path(off_chain_db_path)
+        indexer.add_projection(self.apply, schema=_SCHEMA, reset=self.reset)
+
+    @staticmethod
+    def reset(cursor):
+        cursor.execute("DELETE FROM Lotto_chain;")
+        cursor.execute("DELETE FROM Trasformazione_chain;")
+        cursor.execute("DELETE FROM Trasporto_chain;")
+
+    @staticmethod
+    def apply(cursor, events: List[Dict[str, Any]]):
+        lotti, trasformazioni, trasporti = [], [], []
+        for event in events:
+            if event["contract"] != CONTRACT_NAME:
+                continue
+            args, chiave = event["args"], (event["blockNumber"], event["logIndex"])
+            if event["event"] == "LotCreated":
+                lotti.append((args["lotId"], args["productName"], args["producer"], float(args["co2Produced"]))
+                             + chiave)
+            elif event["event"] == "TransformationLogged":
+                # La trasformazione crea un nuovo lotto: l'evento non ne riporta il nome
+                lotti.append((args["toLotId"], None, args["transformer"], float(args["co2Emitted"])) + chiave)
+                trasformazioni.append(chiave + (args["fromLotId"], args["toLotId"], args["transformer"],
+                                                float(args["co2Emitted"])))
+            elif event["event"] == "TransportLogged":
+                trasporti.append(chiave + (args["lotId"], args["transporter"], float(args["co2Emitted"]),
+                                           args["from"], args["to"]))
+
+        cursor.executemany("""
+        INSERT OR IGNORE INTO Lotto_chain (Id_lotto, Nome_prodotto, Produttore, Co2, Blocco, Log_index)
+        VALUES (?, ?, ?, ?, ?, ?);
+        """, lotti)
+        cursor.executemany("""
+        INSERT OR IGNORE INTO Trasformazione_chain (Blocco, Log_index, Da_lotto, A_lotto, Trasformatore, Co2)
+        VALUES (?, ?, ?, ?, ?, ?);
+        """, trasformazioni)
+        cursor.executemany("""
+        INSERT OR IGNORE INTO Trasporto_chain (Blocco, Log_index, Id_lotto, Trasportatore, Co2, Partenza, Arrivo)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+        """, trasporti)
+
+    def diff(self, tolerance: float = 0.5) -> Dict[str, list]:
+        """
+        Compares the mirror with the off-chain store, entirely in SQLite (no RPC reads):
+        - missing_on_chain: products without a lot, as (Id_prodotto, Nome)
+        - missing_off_chain: lots without a product, as (Id_lotto, Nome_prodotto)
+        - name_mismatch: (id, off-chain name, on-chain name)
+        - co2_mismatch: (id, off-chain CO2, on-chain CO2) when they differ by more than tolerance
+        - composition_mismatch: (product, raw material, "off_chain" or "on_chain")
+          for links present on one side only
+        """
+        connection = sqlite3.connect(f"file:{self.indexer.db_path}?mode=ro", uri=True)
+        try:
+            connection.execute("ATTACH DATABASE ? AS off_chain;", (f"file:{self.off_chain_db_path}?mode=ro",))
+            risultato = {
+                "missing_on_chain": connection.execute(f"""
+                SELECT Id_prodotto, Nome FROM ({_CO2_PRODOTTI})
+                WHERE Id_prodotto NOT IN (SELECT Id_lotto FROM Lotto_chain)
+                ORDER BY Id_prodotto;
+                """).fetchall(),
+                "missing_off_chain": connection.execute("""
+                SELECT Id_lotto, Nome_prodotto FROM Lotto_chain
+                WHERE Id_lotto NOT IN (SELECT Id_prodotto FROM off_chain.Prodotto)
+                ORDER BY Id_lotto;
+                """).fetchall(),
+                "name_mismatch": connection.execute(f"""
+                SELECT p.Id_prodotto, p.Nome, l.Nome_prodotto
+                FROM ({_CO2_PRODOTTI}) AS p JOIN Lotto_chain AS l ON l.Id_lotto = p.Id_prodotto
+                WHERE l.Nome_prodotto IS NOT NULL AND l.Nome_prodotto <> p.Nome
+                ORDER BY p.Id_prodotto;
+                """).fetchall(),
+                "co2_mismatch": connection.execute(f"""
+                SELECT p.Id_prodotto, p.Co2, l.Co2
+                FROM ({_CO2_PRODOTTI}) AS p JOIN ({_CO2_LOTTI}) AS l ON l.Id_lotto = p.Id_prodotto
+                WHERE ABS(p.Co2 - l.Co2) > ?
+                ORDER BY p.Id_prodotto;
+                """, (tolerance,)).fetchall(),
+                "composition_mismatch": connection.execute("""
+                SELECT Prodotto, Materia_prima, 'off_chain' FROM off_chain.Composizione
+                WHERE Prodotto <> Materia_prima
+                  AND Prodotto IN (SELECT Id_lotto FROM Lotto_chain)
+                  AND NOT EXISTS (SELECT 1 FROM Trasformazione_chain AS t
+                                  WHERE t.A_lotto = Composizione.Prodotto AND t.Da_lotto = Composizione.Materia_prima)
+                UNION ALL
+                SELECT A_lotto, Da_lotto, 'on_chain' FROM Trasformazione_chain AS t
+                WHERE t.A_lotto IN (SELECT Id_prodotto FROM off_chain.Prodotto)
+                  AND NOT EXISTS (SELECT 1 FROM off_chain.Composizione AS c
+                                  WHERE c.Prodotto = t.A_lotto AND c.Materia_prima = t.Da_lotto)
+                ORDER BY 1, 2;
+                """).fetchall()
+            }
+        finally:
+            connection.close()
+        return risultato
@@ -0,0 +1,46 @@
+// SPDX-License-Identifier: MIT
+// block.timestamp is used only for logging, not for decision making
+
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+
+/**
+ * @title Operation Anchor
+ * @dev Ancora sulla catena solo la radice Merkle di ogni blocco di operazioni off-chain.
+ * Le prove di inclusione restano off-chain: ogni operazione si verifica con verifyOperation.
+ */
+contract OperationAnchor is Ownable {
+    struct Batch {
+        bytes32 root;
+        uint256 count;
+        uint256 timestamp;
+        address submitter;
+    }
+
+    uint256 public batchCounter;
+    mapping(uint256 => Batch) public batches;
+    mapping(bytes32 => uint256) public batchOfRoot;
+
+    event BatchAnchored(uint256 indexed batchId, bytes32 indexed root, uint256 count, address submitter);
+
+    constructor() Ownable(msg.sender) {}
+
+    function anchorBatch(bytes32 root, uint256 count) public onlyOwner returns (uint256) {
+        require(root != bytes32(0), "Empty root");
+        require(count > 0, "Empty batch");
+        require(batchOfRoot[root] == 0, "Root already anchored");
+        batchCounter++;
+        batches[batchCounter] = Batch(root, count, block.timestamp, msg.sender);
+        batchOfRoot[root] = batchCounter;
+        emit BatchAnchored(batchCounter, root, count, msg.sender);
+        return batchCounter;
+    }
+
+    // Le foglie sono hash di hash della codifica canonica, le coppie sono ordinate (MerkleProof di OpenZeppelin)
+    function verifyOperation(uint256 batchId, bytes32 leaf, bytes32[] calldata proof) public view returns (bool) {
+        bytes32 root = batches[batchId].root;
+        return root != bytes32(0) && MerkleProof.verifyCalldata(proof, root, leaf);
+    }
+}
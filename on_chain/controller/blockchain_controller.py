@@ -1,10 +1,18 @@
 import os
-import time
 import json
 from colorama import init
 from blockchain_facede import BlockchainDeployController
 from web3 import Web3
 
+try:
+    from on_chain.web3_transport import batch_eth_call, create_session
+    from on_chain.transaction_pipeline import TransactionPipeline
+    from on_chain.event_indexer import EventIndexer
+except ImportError:
+    from web3_transport import batch_eth_call, create_session
+    from transaction_pipeline import TransactionPipeline
+    from event_indexer import EventIndexer
+
 class ActionController:
     """
     ActionController interacts with the Ethereum blockchain through methods defined in the contract.
@@ -22,7 +30,11 @@ class ActionController:
             # Check if the HTTP provider is reachable
 
             self.http_provider='http://ganache:8545'
-            self.w3 = Web3(Web3.HTTPProvider(http_provider))
+            self.node_url = http_provider
+            # Sessione keep-alive condivisa dalle letture batch
+            self.session = create_session()
+            self.w3 = Web3(Web3.HTTPProvider(http_provider, session=self.session))
+            self.pipeline = None
             if not self.w3.is_connected():
                 raise ConnectionError("Unable to connect to the Ethereum network.")
             self.load_contract()
@@ -93,6 +105,35 @@ class ActionController:
             
             raise e
 
+    def read_data_batch(self, calls):
+        """
+        Reads many contract functions with a single JSON-RPC batch of eth_call,
+        decoding all the results together: one round trip instead of one per call.
+
+        Args:
+            calls (list): (function_name, args) pairs, args being a list of arguments.
+
+        Returns:
+            The list of results, in the same order as calls.
+        """
+        try:
+            return batch_eth_call(
+                self.w3, self.session, self.node_url,
+                [(self.contract, function_name, args) for function_name, args in calls]
+            )
+        except Exception as e:
+            #logger.error(f"Error reading data in batch: {str(e)}")
+            raise e
+
+    def _get_pipeline(self):
+        """
+        Returns the transaction pipeline (local nonces, send queue, async receipts),
+        created on first use.
+        """
+        if self.pipeline is None:
+            self.pipeline = TransactionPipeline(self.w3, self.session, self.node_url)
+        return self.pipeline
+
     def write_data(self, function_name, from_address, *args, gas=2000000, gas_price=None, nonce=None):
         """
         Writes data to a contract's function.
@@ -103,18 +144,21 @@ class ActionController:
             *args: Arguments required by the function.
             gas (int): The gas limit for the transaction.
             gas_price (int): The gas price for the transaction.
-            nonce (int): The nonce for the transaction.
+            nonce (int): The nonce for the transaction (taken from the local nonce manager if omitted).
 
         Returns:
             The transaction receipt object.
         """
         if not from_address:
             raise ValueError("Invalid 'from_address' provided. It must be a non-empty string representing an Ethereum address.")
+        if nonce is None:
+            return self.write_data_async(function_name, from_address, *args, gas=gas, gas_price=gas_price).result()
+
         tx_parameters = {
             'from': from_address,
             'gas': gas,
             'gasPrice': gas_price or self.w3.eth.gas_price,
-            'nonce': nonce or self.w3.eth.get_transaction_count(from_address)
+            'nonce': nonce
         }
         try:
             function = getattr(self.contract.functions, function_name)(*args)
@@ -128,16 +172,53 @@ class ActionController:
             #log_error(f"Error executing {function_name} from {from_address}. Error: {str(e)}")
             raise e
 
+    def write_data_async(self, function_name, from_address, *args, gas=2000000, gas_price=None):
+        """
+        Queues a transaction on a contract's function without waiting for it to be mined.
+
+        Args:
+            function_name (str): The function name to call on the contract.
+            from_address (str): The Ethereum address to send the transaction from.
+            *args: Arguments required by the function.
+            gas (int): The gas limit for the transaction.
+            gas_price (int): The gas price for the transaction (cached node value if omitted).
+
+        Returns:
+            A Future resolved with the transaction receipt object.
+        """
+        if not from_address:
+            raise ValueError("Invalid 'from_address' provided. It must be a non-empty string representing an Ethereum address.")
+        return self._get_pipeline().submit(self.contract, function_name, list(args), from_address,
+                                           gas=gas, gas_price=gas_price)
+
+    def write_data_batch(self, calls, from_address, gas=2000000):
+        """
+        Sends many transactions back to back and waits for all their receipts:
+        throughput is bounded by the node, not by one receipt round trip per transaction.
+
+        Args:
+            calls (list): (function_name, args) pairs, args being a list of arguments.
+            from_address (str): The Ethereum address to send the transactions from.
+            gas (int): The gas limit of each transaction.
+
+        Returns:
+            The list of transaction receipts, in the same order as calls.
+        """
+        futures = [self.write_data_async(function_name, from_address, *args, gas=gas)
+                   for function_name, args in calls]
+        return [future.result() for future in futures]
+
     def listen_to_event(self):
         """
-        Listens to a specific event from the smart contract indefinitely.
+        Listens to the ActionLogged events of the smart contract indefinitely.
+        Events are indexed from the last checkpoint (past events included, none twice)
+        and then followed with sub-second polling.
         """
-        event_filter = self.contract.events.ActionLogged.create_filter(fromBlock='latest')
-        while True:
-            entries = event_filter.get_new_entries()
-            for event in entries:
-                self.handle_action_logged(event)
-            time.sleep(10)
+        indexer = EventIndexer(self.w3, self.session, self.node_url, {"Contract": self.contract},
+                               name="ActionController")
+        indexer.subscribe(lambda events: [self.handle_action_logged(event) for event in events
+                                          if event["event"] == "ActionLogged"])
+        indexer.run()
 
     def handle_action_logged(self, event):
         """
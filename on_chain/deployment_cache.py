@@ -0,0 +1,189 @@
+# deployment_cache.py - Deployment manifest: on start only the contracts missing on the node or changed are deployed.
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+try:
+    from on_chain.web3_transport import (ARTIFACTS_DIR, CONTRACT_ADDRESSES_FILE, HARDHAT_NODE_URL, PROJECT_DIR,
+                                         Web3TransportError, batch_request, create_session)
+except ImportError:
+    from web3_transport import (ARTIFACTS_DIR, CONTRACT_ADDRESSES_FILE, HARDHAT_NODE_URL, PROJECT_DIR,
+                                Web3TransportError, batch_request, create_session)
+
+MANIFEST_FILE = PROJECT_DIR / "deployment_manifest.json"
+SOURCES_DIR = PROJECT_DIR / "contracts"
+
+# Contratti distribuiti da scripts/deploy.js, nello stesso ordine
+CONTRACTS = [
+    "UserRegistry", "ProductRegistry", "OperationRegistry", "QualityControl", "SustainabilityMetrics",
+    "CO2Token", "ProductRequest", "SupplyChainCO2", "OperationAnchor", "SupplyChain"
+]
+
+# SupplyChain viene inizializzato con gli indirizzi di questi contratti: se cambiano va ridistribuito
+DEPENDENCIES = {"SupplyChain": ["UserRegistry", "ProductRequest", "OperationRegistry"]}
+
+# Variabile letta da deploy.js: elenco dei contratti da distribuire (gli altri restano agli indirizzi salvati)
+DEPLOY_ENV = "SFS_DEPLOY_CONTRACTS"
+
+DEPLOY_COMMAND = ["npx", "hardhat", "run", "scripts/deploy.js", "--network", "localhost"]
+
+
+def contract_fingerprint(contract_name: str) -> Optional[str]:
+    """
+    sha256 of the creation bytecode of the Hardhat artifact and, when present, of the Solidity source
+    (a source edited after the last compilation changes the fingerprint too).
+    None when neither exists, so the contract is always deployed.
+    """
+    digest = hashlib.sha256()
+    trovato = False
+    artifact_path = ARTIFACTS_DIR / f"{contract_name}.sol" / f"{contract_name}.json"
+    if artifact_path.exists():
+        with open(artifact_path, "r") as f:
+            digest.update(json.load(f).get("bytecode", "").encode())
+        trovato = True
+    source_path = SOURCES_DIR / f"{contract_name}.sol"
+    if source_path.exists():
+        digest.update(source_path.read_bytes())
+        trovato = True
+    return digest.hexdigest() if trovato else None
+
+
+def _code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class DeploymentCache:
+    """
+    Manifest of the deployed contracts, one entry per chain id:
+    {"chains": {chain id: {contract: {"address", "fingerprint", "codeHash"}}}}.
+
+    contracts_to_deploy() compares it with the artifacts and with the code at each recorded
+    address (one batch of eth_getCode): a contract is deployed again only if it is missing
+    on the node, its code differs or its artifact has changed.
+    """
+
+    def __init__(self, node_url: str = HARDHAT_NODE_URL, session: Optional[requests.Session] = None,
+                 manifest_file: Path = MANIFEST_FILE, contract_addresses_file: Path = CONTRACT_ADDRESSES_FILE):
+        self.node_url = node_url
+        self.session = session or create_session(pool_size=1)
+        self.manifest_file = Path(manifest_file)
+        self.contract_addresses_file = Path(contract_addresses_file)
+
+    def _load_json(self, path: Path) -> Dict:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def chain_id(self) -> str:
+        risposta = batch_request(self.session, self.node_url, [("eth_chainId", [])], timeout=5)[0]
+        if "error" in risposta:
+            raise Web3TransportError(f"eth_chainId failed: {risposta['error']}")
+        return str(int(risposta["result"], 16))
+
+    def _get_codes(self, addresses: List[str]) -> List[str]:
+        risposte = batch_request(self.session, self.node_url,
+                                 [("eth_getCode", [address, "latest"]) for address in addresses], timeout=10)
+        return [r.get("result") or "0x" for r in risposte]
+
+    def contracts_to_deploy(self) -> List[str]:
+        """Contracts to deploy, in deployment order; empty on a warm start."""
+        registrati = self._load_json(self.manifest_file).get("chains", {}).get(self.chain_id(), {})
+        indirizzi = self._load_json(self.contract_addresses_file).get("contracts", {})
+
+        da_distribuire, da_controllare = set(), []
+        for nome in CONTRACTS:
+            voce = registrati.get(nome)
+            impronta = contract_fingerprint(nome)
+            if (voce is None or impronta is None or voce.get("fingerprint") != impronta
+                    or indirizzi.get(nome, {}).get("address") != voce.get("address")):
+                da_distribuire.add(nome)
+            else:
+                da_controllare.append(nome)
+
+        if da_controllare:
+            codici = self._get_codes([registrati[nome]["address"] for nome in da_controllare])
+            for nome, codice in zip(da_controllare, codici):
+                if codice == "0x" or _code_hash(codice) != registrati[nome].get("codeHash"):
+                    da_distribuire.add(nome)
+
+        cambiato = True
+        while cambiato:
+            cambiato = False
+            for nome, dipendenze in DEPENDENCIES.items():
+                if nome not in da_distribuire and da_distribuire.intersection(dipendenze):
+                    da_distribuire.add(nome)
+                    cambiato = True
+        return [nome for nome in CONTRACTS if nome in da_distribuire]
+
+    def record_deployment(self):
+        """Writes the manifest entry of the current chain from contract_addresses.json and the deployed code."""
+        indirizzi = self._load_json(self.contract_addresses_file).get("contracts", {})
+        nomi = [nome for nome in CONTRACTS if indirizzi.get(nome, {}).get("address")]
+        codici = self._get_codes([indirizzi[nome]["address"] for nome in nomi])
+
+        manifest = self._load_json(self.manifest_file)
+        manifest.setdefault("chains", {})[self.chain_id()] = {
+            nome: {"address": indirizzi[nome]["address"], "fingerprint": contract_fingerprint(nome),
+                   "codeHash": _code_hash(codice)}
+            for nome, codice in zip(nomi, codici) if codice != "0x"
+        }
+        # Scrittura atomica: un manifest troncato farebbe ridistribuire tutto
+        temporaneo = self.manifest_file.with_suffix(".tmp")
+        with open(temporaneo, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporaneo, self.manifest_file)
+
+    def _backup_addresses(self):
+        if self.contract_addresses_file.exists():
+            backup_timestamp = time.strftime("%Y%m%d_%H%M%S")
+            backup_file = self.contract_addresses_file.with_name(f"contract_addresses_backup_{backup_timestamp}.json")
+            shutil.copy2(self.contract_addresses_file, backup_file)
+
+    def deploy(self, force: bool = False) -> Optional[subprocess.CompletedProcess]:
+        """
+        Runs scripts/deploy.js for the contracts returned by contracts_to_deploy() (all with force)
+        and records them in the manifest. Returns None when nothing had to be deployed,
+        otherwise the completed Hardhat process (check its returncode).
+        """
+        contratti = list(CONTRACTS) if force else self.contracts_to_deploy()
+        if not contratti:
+            return None
+
+        # Gli indirizzi precedenti vengono salvati solo quando cambiano davvero
+        self._backup_addresses()
+        env = dict(os.environ)
+        env[DEPLOY_ENV] = ",".join(contratti)
+        result = subprocess.run(
+            DEPLOY_COMMAND,
+            shell=sys.platform == 'win32',
+            cwd=str(PROJECT_DIR),
+            capture_output=True,
+            text=True,
+            env=env
+        )
+        if result.returncode == 0:
+            self.record_deployment()
+        return result
+
+    def close(self):
+        self.session.close()
+
+
+def deploy_contracts(node_url: str = HARDHAT_NODE_URL, force: bool = False) -> Optional[subprocess.CompletedProcess]:
+    """Deploys only the missing or changed contracts (see DeploymentCache.deploy)."""
+    cache = DeploymentCache(node_url)
+    try:
+        return cache.deploy(force=force)
+    finally:
+        cache.close()
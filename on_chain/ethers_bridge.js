@@ -10,32 +10,59 @@
         // Connect to provider
         const provider = new ethers.JsonRpcProvider('http://127.0.0.1:8545');
 
+        // Wallet, signer and contracts are created once and reused by every call of the process
+        let walletPromise = null;
+        let signerPromise = null;
+        const contracts = {};
+        const signedContracts = {};
+
         // Get wallet from provider
         async function getWallet() {
-            const accounts = await provider.listAccounts();
-            return accounts[0];
+            if (!walletPromise) {
+                // listAccounts restituisce dei signer (ethers v6): serve l'indirizzo
+                walletPromise = provider.listAccounts()
+                    .then(accounts => accounts[0].address)
+                    .catch(error => {
+                        walletPromise = null;
+                        throw error;
+                    });
+            }
+            return walletPromise;
         }
 
         // Get contract instance
         function getContract(contractName) {
-            const contractInfo = contractData.contracts[contractName];
-            return new ethers.Contract(
-                contractInfo.address,
-                contractInfo.abi,
-                provider
-            );
+            if (!contracts[contractName]) {
+                const contractInfo = contractData.contracts[contractName];
+                contracts[contractName] = new ethers.Contract(
+                    contractInfo.address,
+                    contractInfo.abi,
+                    provider
+                );
+            }
+            return contracts[contractName];
         }
 
         // Get contract with signer
         async function getSignedContract(contractName) {
-            const wallet = await getWallet();
-            const signer = await provider.getSigner(wallet);
-            const contractInfo = contractData.contracts[contractName];
-            return new ethers.Contract(
-                contractInfo.address,
-                contractInfo.abi,
-                signer
-            );
+            if (!signedContracts[contractName]) {
+                if (!signerPromise) {
+                    signerPromise = getWallet()
+                        .then(wallet => provider.getSigner(wallet))
+                        .catch(error => {
+                            signerPromise = null;
+                            throw error;
+                        });
+                }
+                const signer = await signerPromise;
+                const contractInfo = contractData.contracts[contractName];
+                signedContracts[contractName] = new ethers.Contract(
+                    contractInfo.address,
+                    contractInfo.abi,
+                    signer
+                );
+            }
+            return signedContracts[contractName];
         }
 
         // Bridge functions
@@ -141,6 +168,52 @@
             }
         }
 
+        // Server mode: newline-delimited JSON-RPC 2.0 on stdin/stdout.
+        // Requests are handled concurrently, each response carries the id of its request.
+        function serve() {
+            const readline = require('readline');
+            const input = readline.createInterface({ input: process.stdin, terminal: false });
+
+            function reply(message) {
+                process.stdout.write(JSON.stringify(message) + '\n');
+            }
+
+            async function handle(line) {
+                let request;
+                try {
+                    request = JSON.parse(line);
+                } catch (error) {
+                    reply({ jsonrpc: '2.0', id: null, error: { code: -32700, message: 'Parse error' } });
+                    return;
+                }
+                const id = request.id === undefined ? null : request.id;
+                const functionName = request.method;
+                if (functionName === 'ping') {
+                    reply({ jsonrpc: '2.0', id, result: 'pong' });
+                    return;
+                }
+                if (typeof global[functionName] !== 'function') {
+                    reply({ jsonrpc: '2.0', id, error: { code: -32601, message: `Function ${functionName} not found` } });
+                    return;
+                }
+                try {
+                    const result = await global[functionName](...(request.params || []));
+                    reply({ jsonrpc: '2.0', id, result: result === undefined ? null : result });
+                } catch (error) {
+                    console.error('Error executing function:', error);
+                    reply({ jsonrpc: '2.0', id, error: { code: -32000, message: String(error && error.message || error) } });
+                }
+            }
+
+            input.on('line', line => {
+                if (line.trim()) {
+                    handle(line);
+                }
+            });
+            // stdin chiuso dal processo Python: il bridge termina
+            input.on('close', () => process.exit(0));
+        }
+
         // Export functions to global scope
         global.getDefaultAccount = getDefaultAccount;
         global.registerUser = registerUser;
@@ -148,5 +221,9 @@
         global.createProduct = createProduct;
         global.getProduct = getProduct;
 
-        main();
+        if (process.argv[2] === '--server') {
+            serve();
+        } else {
+            main();
+        }
         
\ No newline at end of file
@@ -0,0 +1,379 @@
+# event_indexer.py - Checkpointed indexer of the contract events (chunked eth_getLogs backfill, then tailing).
+
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+try:
+    from on_chain.web3_transport import PROJECT_DIR, Web3TransportError, abi_type, batch_request
+except ImportError:
+    from web3_transport import PROJECT_DIR, Web3TransportError, abi_type, batch_request
+
+INDEX_DB_PATH = PROJECT_DIR / "event_index.db"
+
+default_logger = logging.getLogger(__name__)
+
+# Versione dello schema in PRAGMA user_version: l'indice e' una copia della catena, se cambia si ricostruisce
+_SCHEMA_VERSION = 1
+
+# Catena e Hash_blocco identificano la catena del checkpoint: il nodo Hardhat vive in memoria
+# e a ogni riavvio riparte dal blocco 0 con gli stessi numeri di blocco
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Checkpoint (
+    Nome TEXT PRIMARY KEY,
+    Ultimo_blocco INTEGER NOT NULL,
+    Catena TEXT NOT NULL,
+    Hash_blocco TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Evento (
+    Blocco INTEGER NOT NULL,
+    Log_index INTEGER NOT NULL,
+    Tx_hash TEXT NOT NULL,
+    Contratto TEXT NOT NULL,
+    Evento TEXT NOT NULL,
+    Argomenti TEXT NOT NULL,
+    PRIMARY KEY (Blocco, Log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_evento_contratto_evento ON Evento (Contratto, Evento);
+"""
+
+
+def _json_value(value):
+    """Decoded ABI value in a JSON-friendly form (bytes as 0x hex, tuples as lists)."""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+class EventIndexer:
+    """
+    Indexes the events of a set of contracts into SQLite.
+
+    On start it backfills from the last checkpoint to the current head with eth_getLogs
+    over block ranges of chunk_size blocks, fetched in parallel; then it tails the chain,
+    polling the block number every poll_interval seconds.
+    Events and checkpoint are written in the same transaction, so a restart resumes
+    from the next block without reprocessing anything.
+    The checkpoint also stores the chain id and the hash of its block: when the head is below
+    the checkpoint or that block has another hash, the chain was reset (a restarted Hardhat node),
+    so the index is cleared, the projections are reset and indexing starts again from from_block.
+
+    contracts is a dict {contract name: web3 contract object}.
+    Projections (add_projection) receive (cursor, events) inside that transaction,
+    listeners (subscribe) receive the events after the commit.
+    """
+
+    def __init__(self, w3, session: requests.Session, node_url: str, contracts: Dict[str, Any],
+                 db_path: Path = INDEX_DB_PATH, name: str = "default", from_block: int = 0,
+                 chunk_size: int = 2000, workers: int = 4, poll_interval: float = 0.2,
+                 confirmations: int = 0, logger: Optional[logging.Logger] = None):
+        self.w3 = w3
+        self.session = session
+        self.node_url = node_url
+        self.db_path = Path(db_path)
+        self.name = name
+        self.from_block = from_block
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.logger = logger or default_logger
+
+        self._addresses = [contract.address for contract in contracts.values()]
+        self._events = self._build_event_map(contracts)
+        self._projections: List[Callable] = []
+        self._resets: List[Callable] = []
+        self._listeners: List[Callable] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Autocommit: le transazioni sono aperte esplicitamente in _store
+        self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL;")
+        if self._connection.execute("PRAGMA user_version;").fetchone()[0] < _SCHEMA_VERSION:
+            self._connection.executescript("DROP TABLE IF EXISTS Checkpoint; DROP TABLE IF EXISTS Evento;")
+        self._connection.executescript(_SCHEMA)
+        self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION};")
+        self._lock = threading.Lock()
+
+    def _build_event_map(self, contracts: Dict[str, Any]) -> Dict[tuple, tuple]:
+        """(address, topic0) -> (contract name, event ABI)."""
+        eventi = {}
+        for contract_name, contract in contracts.items():
+            for item in contract.abi:
+                if item.get("type") != "event" or item.get("anonymous"):
+                    continue
+                firma = f"{item['name']}({','.join(abi_type(p) for p in item.get('inputs', []))})"
+                topic = "0x" + bytes(self.w3.keccak(text=firma)).hex()
+                eventi[(contract.address.lower(), topic)] = (contract_name, item)
+        return eventi
+
+    def add_projection(self, projection: Callable, schema: Optional[str] = None, replay: bool = True,
+                       reset: Optional[Callable] = None):
+        """
+        projection(cursor, events) runs in the same transaction that stores events and checkpoint.
+        schema is an optional SQL script creating the tables the projection writes to.
+        reset(cursor) empties those tables; it runs when the chain is reset, in the transaction
+        that clears the index.
+        With replay the events already indexed are applied first (after reset, if given, so the
+        projection is rebuilt from the index); without reset the projection must tolerate
+        events it has already seen.
+        """
+        with self._lock:
+            if schema:
+                self._connection.executescript(schema)
+            if replay:
+                eventi = self._select_events()
+                cursor = self._connection.cursor()
+                try:
+                    cursor.execute("BEGIN IMMEDIATE;")
+                    if reset is not None:
+                        reset(cursor)
+                    projection(cursor, eventi)
+                    cursor.execute("COMMIT;")
+                except Exception:
+                    cursor.execute("ROLLBACK;")
+                    raise
+                finally:
+                    cursor.close()
+            self._projections.append(projection)
+            if reset is not None:
+                self._resets.append(reset)
+
+    def subscribe(self, listener: Callable):
+        """listener(events) is called after every committed block range."""
+        self._listeners.append(listener)
+
+    @property
+    def checkpoint(self) -> int:
+        """Last indexed block (from_block - 1 if nothing has been indexed yet)."""
+        with self._lock:
+            riga = self._connection.execute(
+                "SELECT Ultimo_blocco FROM Checkpoint WHERE Nome = ?;", (self.name,)
+            ).fetchone()
+        return riga[0] if riga else self.from_block - 1
+
+    def _decode(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        topics = log.get("topics") or []
+        if not topics:
+            return None
+        trovato = self._events.get((log["address"].lower(), topics[0].lower()))
+        if trovato is None:
+            return None
+        contract_name, event_abi = trovato
+
+        inputs = event_abi.get("inputs", [])
+        indicizzati = [p for p in inputs if p.get("indexed")]
+        non_indicizzati = [p for p in inputs if not p.get("indexed")]
+        valori_dati = iter(self.w3.codec.decode([abi_type(p) for p in non_indicizzati],
+                                                bytes.fromhex(log["data"][2:])))
+        valori_topic = {}
+        for param, topic in zip(indicizzati, topics[1:]):
+            tipo = abi_type(param)
+            # Tipi dinamici indicizzati: nel topic c'e' solo il loro hash
+            if tipo in ("string", "bytes") or tipo.endswith("]") or tipo.startswith("("):
+                valori_topic[id(param)] = topic
+            else:
+                valori_topic[id(param)] = self.w3.codec.decode([tipo], bytes.fromhex(topic[2:]))[0]
+
+        args = {}
+        for posizione, param in enumerate(inputs):
+            valore = valori_topic.get(id(param)) if param.get("indexed") else next(valori_dati)
+            if param["type"] == "address" and isinstance(valore, str) and len(valore) == 42:
+                valore = self.w3.to_checksum_address(valore)
+            args[param.get("name") or f"arg{posizione}"] = _json_value(valore)
+
+        return {
+            "contract": contract_name,
+            "event": event_abi["name"],
+            "args": args,
+            "address": self.w3.to_checksum_address(log["address"]),
+            "blockNumber": int(log["blockNumber"], 16),
+            "logIndex": int(log["logIndex"], 16),
+            "transactionHash": log["transactionHash"]
+        }
+
+    def _get_logs(self, da: int, a: int) -> List[Dict[str, Any]]:
+        """Logs of [da, a]; a range refused by the node is split in two."""
+        filtro = {"fromBlock": hex(da), "toBlock": hex(a), "address": self._addresses}
+        risposta = batch_request(self.session, self.node_url, [("eth_getLogs", [filtro])])[0]
+        if "error" in risposta:
+            if da == a:
+                raise Web3TransportError(f"eth_getLogs failed for block {da}: {risposta['error']}")
+            meta = (da + a) // 2
+            return self._get_logs(da, meta) + self._get_logs(meta + 1, a)
+        return risposta["result"] or []
+
+    def _chain_state(self, blocchi: List[int]) -> tuple:
+        """(chain id, [hash of each block]) with one batch request; None for a block the node does not have."""
+        risposte = batch_request(self.session, self.node_url,
+                                 [("eth_chainId", [])] + [("eth_getBlockByNumber", [hex(b), False]) for b in blocchi])
+        if "error" in risposte[0]:
+            raise Web3TransportError(f"eth_chainId failed: {risposte[0]['error']}")
+        return (str(int(risposte[0]["result"], 16)),
+                [(risposta.get("result") or {}).get("hash") for risposta in risposte[1:]])
+
+    def _check_reset(self, testa: int) -> bool:
+        """Clears the index if the chain of the checkpoint is gone; True if it did."""
+        with self._lock:
+            riga = self._connection.execute(
+                "SELECT Ultimo_blocco, Catena, Hash_blocco FROM Checkpoint WHERE Nome = ?;", (self.name,)
+            ).fetchone()
+        if riga is None:
+            return False
+        ultimo, catena, hash_blocco = riga
+        if ultimo <= testa:
+            catena_attuale, (hash_attuale,) = self._chain_state([ultimo])
+            if catena_attuale == catena and hash_attuale == hash_blocco:
+                return False
+        self.logger.warning(f"[INDEXER] Chain reset detected (checkpoint at block {ultimo}, head at {testa}): "
+                            f"indexing again from block {self.from_block}")
+        self.reset()
+        return True
+
+    def reset(self):
+        """
+        Forgets the indexed chain: events and every checkpoint of the database are deleted
+        (they all describe the same chain) and the projections are reset, in one transaction.
+        """
+        with self._lock:
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE;")
+                cursor.execute("DELETE FROM Evento;")
+                cursor.execute("DELETE FROM Checkpoint;")
+                for reset in self._resets:
+                    reset(cursor)
+                cursor.execute("COMMIT;")
+            except Exception:
+                cursor.execute("ROLLBACK;")
+                raise
+            finally:
+                cursor.close()
+
+    def _store(self, a: int, logs: List[Dict[str, Any]], catena: str, hash_blocco: str) -> List[Dict[str, Any]]:
+        """
+        Stores the events of the range ending at block a and moves the checkpoint, atomically;
+        catena and hash_blocco (chain id and hash of block a) identify the chain of the checkpoint.
+        """
+        eventi = [evento for evento in map(self._decode, logs) if evento is not None]
+        eventi.sort(key=lambda e: (e["blockNumber"], e["logIndex"]))
+        with self._lock:
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE;")
+                cursor.executemany("""
+                INSERT OR IGNORE INTO Evento (Blocco, Log_index, Tx_hash, Contratto, Evento, Argomenti)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """, [(e["blockNumber"], e["logIndex"], e["transactionHash"], e["contract"], e["event"],
+                       json.dumps(e["args"])) for e in eventi])
+                for projection in self._projections:
+                    projection(cursor, eventi)
+                cursor.execute("""
+                INSERT INTO Checkpoint (Nome, Ultimo_blocco, Catena, Hash_blocco) VALUES (?, ?, ?, ?)
+                ON CONFLICT(Nome) DO UPDATE SET Ultimo_blocco = excluded.Ultimo_blocco,
+                    Catena = excluded.Catena, Hash_blocco = excluded.Hash_blocco;
+                """, (self.name, a, catena, hash_blocco))
+                cursor.execute("COMMIT;")
+            except Exception:
+                cursor.execute("ROLLBACK;")
+                raise
+            finally:
+                cursor.close()
+        for listener in self._listeners:
+            try:
+                listener(eventi)
+            except Exception as e:
+                self.logger.error(f"[INDEXER] Listener error: {e}")
+        return eventi
+
+    def _head(self) -> int:
+        return max(self.w3.eth.block_number - self.confirmations, -1)
+
+    def sync(self) -> int:
+        """
+        Indexes from the checkpoint up to the current head, after checking that the chain
+        of the checkpoint is still there (see reset()).
+        Ranges are fetched in parallel and committed in block order. Returns the number of events stored.
+        """
+        totale = 0
+        testa = self._head()
+        self._check_reset(testa)
+        inizio = self.checkpoint + 1
+        if inizio > testa:
+            return 0
+        intervalli = [(da, min(da + self.chunk_size - 1, testa))
+                      for da in range(inizio, testa + 1, self.chunk_size)]
+        if len(intervalli) == 1:
+            da, a = intervalli[0]
+            logs = self._get_logs(da, a)
+            catena, (hash_blocco,) = self._chain_state([a])
+            return len(self._store(a, logs, catena, hash_blocco))
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="EventIndexerBackfill") as executor:
+            # Finestre di 'workers' intervalli: il checkpoint avanza sempre in ordine
+            for i in range(0, len(intervalli), self.workers):
+                finestra = intervalli[i:i + self.workers]
+                risultati = list(executor.map(lambda r: self._get_logs(*r), finestra))
+                catena, hashes = self._chain_state([a for _, a in finestra])
+                for (_, a), logs, hash_blocco in zip(finestra, risultati, hashes):
+                    totale += len(self._store(a, logs, catena, hash_blocco))
+                if self._stop.is_set():
+                    break
+        return totale
+
+    def run(self):
+        """Backfills, then tails the chain until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                self.logger.warning(f"[INDEXER] Error indexing events: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Runs the indexer on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="EventIndexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _select_events(self, contract: Optional[str] = None, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT Blocco, Log_index, Tx_hash, Contratto, Evento, Argomenti FROM Evento"
+        filtri, params = [], []
+        if contract:
+            filtri.append("Contratto = ?")
+            params.append(contract)
+        if event:
+            filtri.append("Evento = ?")
+            params.append(event)
+        if filtri:
+            query += " WHERE " + " AND ".join(filtri)
+        query += " ORDER BY Blocco, Log_index;"
+        righe = self._connection.execute(query, params).fetchall()
+        return [{"blockNumber": b, "logIndex": li, "transactionHash": tx, "contract": c, "event": e,
+                 "args": json.loads(args)} for b, li, tx, c, e, args in righe]
+
+    def events(self, contract: Optional[str] = None, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Indexed events, optionally filtered by contract and event name, in chain order."""
+        with self._lock:
+            return self._select_events(contract, event)
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._connection.close()
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 # hardhat_deployment.py - Manages Hardhat node and contract deployment
 
-import os
 import json
 import time
-import signal
-import subprocess
-import sys
-import requests
 from pathlib import Path
 import logging
 
+try:
+    from on_chain.deployment_cache import deploy_contracts as deploy_contracts_cached
+    from on_chain.hardhat_supervisor import HardhatSupervisor
+except ImportError:
+    from deployment_cache import deploy_contracts as deploy_contracts_cached
+    from hardhat_supervisor import HardhatSupervisor
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,62 +24,21 @@ CONTRACT_ADDRESSES_FILE = PROJECT_DIR / "contract_addresses.json"
 
 class HardhatManager:
     def __init__(self):
-        self.node_process = None
-        self.is_node_running = False
+        self.supervisor = HardhatSupervisor(HARDHAT_NODE_URL, cwd=PROJECT_DIR, logger=logger)
+        # Il nodo Hardhat tiene la catena in memoria: dopo un riavvio i contratti vanno ridistribuiti
+        self.supervisor.on_restart(self.deploy_contracts)
     
-    def start_node(self):
-        """Start a Hardhat node in a separate process."""
-        try:
-            logger.info("Starting Hardhat node...")
-            # Use shell=True on Windows to avoid console window popup
-            shell_param = True if sys.platform == 'win32' else False
-            
-            self.node_process = subprocess.Popen(
-                "npx hardhat node",
-                shell=shell_param,
-                cwd=str(PROJECT_DIR),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Wait for node to start
-            self._wait_for_node()
-            
-            if self.is_node_running:
-                logger.info("Hardhat node started successfully")
-                return True
-            else:
-                logger.error("Failed to start Hardhat node")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error starting Hardhat node: {e}")
-            return False
+    @property
+    def is_node_running(self):
+        return self.supervisor.is_ready
     
-    def _wait_for_node(self, max_attempts=10, delay=1):
-        """Wait for Hardhat node to be available."""
-        logger.info("Waiting for Hardhat node to be ready...")
-        
-        for attempt in range(max_attempts):
-            try:
-                response = requests.post(
-                    HARDHAT_NODE_URL,
-                    json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                    timeout=2
-                )
-                
-                if response.status_code == 200:
-                    self.is_node_running = True
-                    logger.info(f"Hardhat node is ready (attempt {attempt + 1}/{max_attempts})")
-                    return
-            except requests.exceptions.RequestException:
-                pass
-            
-            logger.info(f"Waiting for Hardhat node... ({attempt + 1}/{max_attempts})")
-            time.sleep(delay)
-        
-        logger.error(f"Hardhat node did not start after {max_attempts} attempts")
+    def start_node(self):
+        """Start a Hardhat node through the supervisor and wait until it is ready."""
+        if self.supervisor.start():
+            logger.info("Hardhat node started successfully")
+            return True
+        logger.error("Failed to start Hardhat node")
+        return False
     
     def deploy_contracts(self):
         """Deploy contracts using Hardhat script."""
@@ -87,13 +48,10 @@ class HardhatManager:
         
         try:
             logger.info("Deploying contracts...")
-            deploy_process = subprocess.run(
-                "npx hardhat run scripts/deploy.js --network localhost",
-                shell=True,
-                cwd=str(PROJECT_DIR),
-                capture_output=True,
-                text=True
-            )
+            deploy_process = deploy_contracts_cached(HARDHAT_NODE_URL)
+            if deploy_process is None:
+                logger.info("Contracts already deployed, deployment skipped")
+                return True
             
             if deploy_process.returncode == 0:
                 logger.info("Contracts deployed successfully")
@@ -109,18 +67,7 @@ class HardhatManager:
     
     def stop_node(self):
         """Stop the Hardhat node process."""
-        if self.node_process:
-            logger.info("Stopping Hardhat node...")
-            
-            # Different process termination based on platform
-            if sys.platform == 'win32':
-                subprocess.run(f"taskkill /F /PID {self.node_process.pid} /T", shell=True)
-            else:
-                os.killpg(os.getpgid(self.node_process.pid), signal.SIGTERM)
-            
-            self.node_process = None
-            self.is_node_running = False
-            logger.info("Hardhat node stopped")
+        self.supervisor.stop()
     
     def get_contract_data(self):
         """Read deployed contract data from file."""
@@ -0,0 +1,391 @@
+# hardhat_supervisor.py - One supervisor for the Hardhat node: start, readiness, health checks, restart, shutdown.
+
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+try:
+    from on_chain.web3_transport import HARDHAT_NODE_URL, PROJECT_DIR, create_session
+except ImportError:
+    from web3_transport import HARDHAT_NODE_URL, PROJECT_DIR, create_session
+
+NODE_COMMAND = ["npx", "hardhat", "node"]
+
+# Riga stampata da "hardhat node" quando il server JSON-RPC accetta connessioni
+READY_BANNER = re.compile(r"Started HTTP and WebSocket JSON-RPC server at")
+
+LOG_PREFIX_HARDHAT = "[HARDHAT] "
+
+default_logger = logging.getLogger(__name__)
+
+
+class NodeOutput:
+    """
+    Last max_lines lines written by the node on each stream (stdout, stderr), in fixed-size
+    ring buffers, so a chatty stdout never pushes the errors out; optionally the lines are
+    also appended to a rotating log file (max_bytes per file, backup_count old files).
+    Memory and disk use stay bounded however long the node runs.
+    """
+
+    def __init__(self, max_lines: int = 1000, log_file: Optional[Path] = None,
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        self.max_lines = max_lines
+        self.log_file = Path(log_file) if log_file else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.total_lines = 0
+        self._streams: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_size = 0
+        if self.log_file is not None:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def append(self, stream: str, line: str):
+        line = line.rstrip("\r\n")
+        with self._lock:
+            righe = self._streams.get(stream)
+            if righe is None:
+                righe = self._streams[stream] = deque(maxlen=self.max_lines)
+            self.total_lines += 1
+            righe.append((self.total_lines, line))
+            if self.log_file is not None:
+                self._write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{stream}] {line}\n")
+
+    def _write(self, testo: str):
+        # Scrittura bufferizzata: il file viene svuotato alla rotazione e alla chiusura
+        try:
+            if self._file is None:
+                self._file = open(self.log_file, "a", encoding="utf-8")
+                self._file_size = self._file.tell()
+            if self._file_size + len(testo) > self.max_bytes > 0:
+                self._rotate()
+            self._file.write(testo)
+            self._file_size += len(testo)
+        except OSError:
+            # Il log su file e' solo una copia: un errore del disco non deve fermare lo svuotamento
+            self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            vecchio = self.log_file.with_name(f"{self.log_file.name}.{i}")
+            if vecchio.exists():
+                os.replace(vecchio, self.log_file.with_name(f"{self.log_file.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.log_file, self.log_file.with_name(f"{self.log_file.name}.1"))
+        self._file = open(self.log_file, "w", encoding="utf-8")
+        self._file_size = 0
+
+    def tail(self, n: int = 50, stream: Optional[str] = None) -> List[str]:
+        """Last n lines, oldest first; stream ("stdout" or "stderr") keeps only that stream."""
+        if n <= 0:
+            return []
+        with self._lock:
+            if stream is not None:
+                return [riga for _, riga in list(self._streams.get(stream, ()))[-n:]]
+            righe = [(numero, f"[{nome}] {riga}") for nome, buffer in self._streams.items()
+                     for numero, riga in list(buffer)[-n:]]
+        righe.sort()
+        return [riga for _, riga in righe[-n:]]
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class HardhatSupervisor:
+    """
+    Starts "npx hardhat node" and supervises it.
+
+    Readiness is signalled by the listening banner on the node's stdout, so wait_ready()
+    returns as soon as the node is up; an eth_blockNumber probe with exponential backoff
+    (probe_delay doubling up to max_probe_delay) covers a banner that never shows up.
+    After start, a health thread probes the node every health_interval seconds and restarts
+    it (at most max_restarts times) when the process dies or health_failures probes in a row fail;
+    the on_restart callbacks run once the restarted node is ready (e.g. to redeploy the contracts,
+    since the Hardhat chain lives in memory).
+    A node already answering on node_url is adopted: it is health-checked but never started or stopped.
+
+    Both output streams are drained by background threads for the whole life of the node,
+    so it never blocks on a full pipe: the lines go to a NodeOutput of output_lines lines
+    (tail() for diagnostics) and, with log_file, to a rotating log file.
+    """
+
+    def __init__(self, node_url: str = HARDHAT_NODE_URL, cwd: Path = PROJECT_DIR,
+                 command: Optional[List[str]] = None, startup_timeout: float = 60.0,
+                 probe_delay: float = 0.05, max_probe_delay: float = 1.0, health_interval: float = 5.0,
+                 health_failures: int = 3, max_restarts: int = 3, logger: Optional[logging.Logger] = None,
+                 output_lines: int = 1000, log_file: Optional[Path] = None,
+                 log_max_bytes: int = 5 * 1024 * 1024, log_backup_count: int = 3):
+        self.node_url = node_url
+        self.cwd = Path(cwd)
+        self.command = list(command or NODE_COMMAND)
+        self.startup_timeout = startup_timeout
+        self.probe_delay = probe_delay
+        self.max_probe_delay = max_probe_delay
+        self.health_interval = health_interval
+        self.health_failures = health_failures
+        self.max_restarts = max_restarts
+        self.logger = logger or default_logger
+        self.output = NodeOutput(output_lines, log_file, log_max_bytes, log_backup_count)
+
+        self.process: Optional[subprocess.Popen] = None
+        self.external = False
+        self.restarts = 0
+        self._on_restart: List[Callable[[], None]] = []
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.RLock()
+        self._readers: List[threading.Thread] = []
+        self._health_thread = None
+        self._session = create_session(pool_size=1)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def on_restart(self, callback: Callable[[], None]):
+        """callback() runs after every automatic restart, once the new node is ready."""
+        self._on_restart.append(callback)
+
+    def probe(self, timeout: float = 2.0) -> bool:
+        """True if the node answers eth_blockNumber."""
+        try:
+            response = self._session.post(
+                self.node_url,
+                json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
+                timeout=timeout
+            )
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def _spawn(self):
+        self._ready.clear()
+        # Gruppo di processi separato: lo stop termina anche i figli di npx
+        if sys.platform == 'win32':
+            opzioni = {"shell": True, "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            opzioni = {"start_new_session": True}
+        self.process = subprocess.Popen(
+            self.command,
+            cwd=str(self.cwd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            **opzioni
+        )
+        self._readers = [
+            threading.Thread(target=self._read_stream, args=(self.process.stdout, "stdout"),
+                             name="HardhatStdout", daemon=True),
+            threading.Thread(target=self._read_stream, args=(self.process.stderr, "stderr"),
+                             name="HardhatStderr", daemon=True)
+        ]
+        for reader in self._readers:
+            reader.start()
+        self.logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node process started with PID: {self.process.pid}")
+
+    def _read_stream(self, stream, name: str):
+        """Drains the stream into the output buffer until the process closes it, watching stdout for the banner."""
+        try:
+            for line in iter(stream.readline, ""):
+                self.output.append(name, line)
+                if name == "stdout" and not self._ready.is_set() and READY_BANNER.search(line):
+                    self._ready.set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def start(self) -> bool:
+        """Starts the node (or adopts a running one), waits until it is ready and starts the health checks."""
+        with self._lock:
+            self._stop.clear()
+            if self.probe(timeout=0.5):
+                self.external = True
+                self._ready.set()
+                self.logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node already running at {self.node_url}")
+            else:
+                self.external = False
+                self.logger.info(f"{LOG_PREFIX_HARDHAT}Starting Hardhat node...")
+                try:
+                    self._spawn()
+                except OSError as e:
+                    self.logger.error(f"{LOG_PREFIX_HARDHAT}Error starting Hardhat node: {e}")
+                    return False
+                if not self.wait_ready():
+                    self.logger.error(f"{LOG_PREFIX_HARDHAT}Hardhat node did not become ready "
+                                      f"within {self.startup_timeout} seconds")
+                    self._terminate()
+                    self._log_tail()
+                    return False
+
+            if self._health_thread is None or not self._health_thread.is_alive():
+                self._health_thread = threading.Thread(target=self._health_loop, name="HardhatHealth", daemon=True)
+                self._health_thread.start()
+            return True
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the listening banner; between waits the node is probed with exponential backoff.
+        Returns False on timeout or if the node process exits.
+        """
+        timeout = self.startup_timeout if timeout is None else timeout
+        inizio = time.monotonic()
+        scadenza = inizio + timeout
+        attesa = self.probe_delay
+        while not self._stop.is_set():
+            if self._ready.wait(min(attesa, max(scadenza - time.monotonic(), 0))):
+                break
+            if self.process is not None and self.process.poll() is not None:
+                self.logger.error(f"{LOG_PREFIX_HARDHAT}Hardhat node exited with code {self.process.returncode}")
+                return False
+            if self.probe(timeout=min(2.0, attesa * 2)):
+                self._ready.set()
+                break
+            if time.monotonic() >= scadenza:
+                return False
+            attesa = min(attesa * 2, self.max_probe_delay)
+        else:
+            return False
+        self.logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node is ready ({time.monotonic() - inizio:.2f}s)")
+        return True
+
+    def _health_loop(self):
+        fallimenti = 0
+        while not self._stop.wait(self.health_interval):
+            self.output.flush()
+            morto = not self.external and self.process is not None and self.process.poll() is not None
+            if not morto and self.probe():
+                fallimenti = 0
+                continue
+            fallimenti += 1
+            if not morto and fallimenti < self.health_failures:
+                continue
+            fallimenti = 0
+            if self.external:
+                self.logger.warning(f"{LOG_PREFIX_HARDHAT}External Hardhat node at {self.node_url} is not answering")
+                continue
+            if self.restarts >= self.max_restarts:
+                self.logger.error(f"{LOG_PREFIX_HARDHAT}Hardhat node is down, restart limit reached")
+                self._log_tail()
+                self._ready.clear()
+                break
+            self._restart()
+
+    def _restart(self):
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self.restarts += 1
+            self.logger.warning(f"{LOG_PREFIX_HARDHAT}Hardhat node is not healthy, restarting "
+                                f"({self.restarts}/{self.max_restarts})...")
+            self._terminate()
+            self._log_tail()
+            try:
+                self._spawn()
+            except OSError as e:
+                self.logger.error(f"{LOG_PREFIX_HARDHAT}Error restarting Hardhat node: {e}")
+                return
+            if not self.wait_ready():
+                self.logger.error(f"{LOG_PREFIX_HARDHAT}Restarted Hardhat node did not become ready")
+                return
+        for callback in self._on_restart:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX_HARDHAT}Error after restarting Hardhat node: {e}")
+
+    def tail(self, n: int = 50, stream: Optional[str] = None) -> List[str]:
+        """Last n lines written by the node (see NodeOutput.tail)."""
+        return self.output.tail(n, stream)
+
+    def _log_tail(self, n: int = 20):
+        righe = self.output.tail(n)
+        if righe:
+            self.logger.error(f"{LOG_PREFIX_HARDHAT}Last lines of the Hardhat node output:\n" + "\n".join(righe))
+
+    def _terminate(self, timeout: float = 5.0):
+        """Terminates the node process group, killing it if it does not exit within timeout seconds."""
+        process, self.process = self.process, None
+        self._ready.clear()
+        if process is None or process.poll() is not None:
+            return
+        try:
+            if sys.platform == 'win32':
+                subprocess.run(f"taskkill /F /PID {process.pid} /T", shell=True, capture_output=True)
+            else:
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            if sys.platform == 'win32':
+                process.kill()
+            else:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+            process.wait()
+        except (ProcessLookupError, OSError):
+            pass
+        for reader in self._readers:
+            reader.join(timeout=1)
+        self._readers = []
+
+    def stop(self):
+        """Stops the health checks and the node (an adopted node is left running)."""
+        self._stop.set()
+        health_thread = self._health_thread
+        if health_thread is not None and health_thread is not threading.current_thread():
+            health_thread.join(timeout=self.health_interval + 5)
+        self._health_thread = None
+        with self._lock:
+            if self.process is not None:
+                self.logger.info(f"{LOG_PREFIX_HARDHAT}Stopping Hardhat node...")
+                self._terminate()
+                self.logger.info(f"{LOG_PREFIX_HARDHAT}Hardhat node stopped")
+            self._ready.clear()
+
+    def close(self):
+        self.stop()
+        self._session.close()
+        self.output.close()
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor(**kwargs) -> HardhatSupervisor:
+    """Supervisor shared by the whole process (kwargs are used only when it is created)."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = HardhatSupervisor(**kwargs)
+        return _supervisor
@@ -1,33 +1,52 @@
-# interact_contract.py - Uses ethers.js bridge to call functions on the blockchain.
+# interact_contract.py - Calls functions on the blockchain through the ethers.js bridge or web3.py.
 
 import json
 import os
 import time
-import subprocess
 import requests
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+try:
+    from on_chain.bridge_client import EthersBridgeClient, BridgeError
+    from on_chain.web3_transport import Web3Transport, create_session
+except ImportError:
+    from bridge_client import EthersBridgeClient, BridgeError
+    from web3_transport import Web3Transport, create_session
+
+# Transport used by BlockchainInteractor: "bridge" (Node + ethers.js) or "web3" (pure Python)
+TRANSPORT_ENV = "SFS_CHAIN_TRANSPORT"
+DEFAULT_TRANSPORT = "bridge"
+
 class BlockchainInteractor:
-    def __init__(self):
+    def __init__(self, transport: Optional[str] = None):
         # Connection to Hardhat node
         self.node_url = "http://127.0.0.1:8545"
+        self.transport = (transport or os.environ.get(TRANSPORT_ENV) or DEFAULT_TRANSPORT).lower()
+        if self.transport not in ("bridge", "web3"):
+            raise ValueError(f"Unknown transport '{self.transport}', use 'bridge' or 'web3'")
+
+        # One keep-alive session for all the connection attempts
+        session = create_session(pool_size=1)
         max_attempts = 10
-        for i in range(max_attempts):
-            try:
-                response = requests.post(
-                    self.node_url,
-                    json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                    timeout=2
-                )
-                if response.status_code == 200:
-                    print("Connected to Hardhat node")
-                    break
-            except:
-                if i == max_attempts - 1:
-                    raise Exception("Failed to connect to Hardhat node")
-                print(f"Waiting for Hardhat node... ({i+1}/{max_attempts})")
-                time.sleep(1)
+        try:
+            for i in range(max_attempts):
+                try:
+                    response = session.post(
+                        self.node_url,
+                        json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
+                        timeout=2
+                    )
+                    if response.status_code == 200:
+                        print("Connected to Hardhat node")
+                        break
+                except requests.exceptions.RequestException:
+                    if i == max_attempts - 1:
+                        raise Exception("Failed to connect to Hardhat node")
+                    print(f"Waiting for Hardhat node... ({i+1}/{max_attempts})")
+                    time.sleep(1)
+        finally:
+            session.close()
 
         # Load contract addresses and ABIs
         contract_data_path = Path(__file__).parent / "contract_addresses.json"
@@ -36,12 +55,20 @@ class BlockchainInteractor:
         
         # Create ethers.js bridge script if it doesn't exist
         self.bridge_path = Path(__file__).parent / "ethers_bridge.js"
-        if not self.bridge_path.exists():
-            self._create_ethers_bridge()
+        if self.transport == "web3":
+            # Contract calls straight from Python over a pooled HTTP session, no Node process
+            self.bridge = Web3Transport(self.node_url, contract_data_path)
+        else:
+            if not self.bridge_path.exists():
+                self._create_ethers_bridge()
+
+            # One bridge process for the whole session: provider, signer and contracts stay warm
+            self.bridge = EthersBridgeClient(self.bridge_path, cwd=Path(__file__).parent)
+            self.bridge.start()
         
         # Get default account
         self.default_account = self._call_bridge("getDefaultAccount", [])
-        print(f"Using default account: {self.default_account}")
+        print(f"Using default account: {self.default_account} ({self.transport} transport)")
 
     def _create_ethers_bridge(self):
         """Create the ethers.js bridge script"""
@@ -57,32 +84,59 @@ class BlockchainInteractor:
         // Connect to provider
         const provider = new ethers.JsonRpcProvider('http://127.0.0.1:8545');
 
+        // Wallet, signer and contracts are created once and reused by every call of the process
+        let walletPromise = null;
+        let signerPromise = null;
+        const contracts = {};
+        const signedContracts = {};
+
         // Get wallet from provider
         async function getWallet() {
-            const accounts = await provider.listAccounts();
-            return accounts[0];
+            if (!walletPromise) {
+                // listAccounts restituisce dei signer (ethers v6): serve l'indirizzo
+                walletPromise = provider.listAccounts()
+                    .then(accounts => accounts[0].address)
+                    .catch(error => {
+                        walletPromise = null;
+                        throw error;
+                    });
+            }
+            return walletPromise;
         }
 
         // Get contract instance
         function getContract(contractName) {
-            const contractInfo = contractData.contracts[contractName];
-            return new ethers.Contract(
-                contractInfo.address,
-                contractInfo.abi,
-                provider
-            );
+            if (!contracts[contractName]) {
+                const contractInfo = contractData.contracts[contractName];
+                contracts[contractName] = new ethers.Contract(
+                    contractInfo.address,
+                    contractInfo.abi,
+                    provider
+                );
+            }
+            return contracts[contractName];
         }
 
         // Get contract with signer
         async function getSignedContract(contractName) {
-            const wallet = await getWallet();
-            const signer = await provider.getSigner(wallet);
-            const contractInfo = contractData.contracts[contractName];
-            return new ethers.Contract(
-                contractInfo.address,
-                contractInfo.abi,
-                signer
-            );
+            if (!signedContracts[contractName]) {
+                if (!signerPromise) {
+                    signerPromise = getWallet()
+                        .then(wallet => provider.getSigner(wallet))
+                        .catch(error => {
+                            signerPromise = null;
+                            throw error;
+                        });
+                }
+                const signer = await signerPromise;
+                const contractInfo = contractData.contracts[contractName];
+                signedContracts[contractName] = new ethers.Contract(
+                    contractInfo.address,
+                    contractInfo.abi,
+                    signer
+                );
+            }
+            return signedContracts[contractName];
         }
 
         // Bridge functions
@@ -188,6 +242,52 @@ class BlockchainInteractor:
             }
         }
 
+        // Server mode: newline-delimited JSON-RPC 2.0 on stdin/stdout.
+        // Requests are handled concurrently, each response carries the id of its request.
+        function serve() {
+            const readline = require('readline');
+            const input = readline.createInterface({ input: process.stdin, terminal: false });
+
+            function reply(message) {
+                process.stdout.write(JSON.stringify(message) + '\\n');
+            }
+
+            async function handle(line) {
+                let request;
+                try {
+                    request = JSON.parse(line);
+                } catch (error) {
+                    reply({ jsonrpc: '2.0', id: null, error: { code: -32700, message: 'Parse error' } });
+                    return;
+                }
+                const id = request.id === undefined ? null : request.id;
+                const functionName = request.method;
+                if (functionName === 'ping') {
+                    reply({ jsonrpc: '2.0', id, result: 'pong' });
+                    return;
+                }
+                if (typeof global[functionName] !== 'function') {
+                    reply({ jsonrpc: '2.0', id, error: { code: -32601, message: `Function ${functionName} not found` } });
+                    return;
+                }
+                try {
+                    const result = await global[functionName](...(request.params || []));
+                    reply({ jsonrpc: '2.0', id, result: result === undefined ? null : result });
+                } catch (error) {
+                    console.error('Error executing function:', error);
+                    reply({ jsonrpc: '2.0', id, error: { code: -32000, message: String(error && error.message || error) } });
+                }
+            }
+
+            input.on('line', line => {
+                if (line.trim()) {
+                    handle(line);
+                }
+            });
+            // stdin chiuso dal processo Python: il bridge termina
+            input.on('close', () => process.exit(0));
+        }
+
         // Export functions to global scope
         global.getDefaultAccount = getDefaultAccount;
         global.registerUser = registerUser;
@@ -195,35 +295,29 @@ class BlockchainInteractor:
         global.createProduct = createProduct;
         global.getProduct = getProduct;
 
-        main();
+        if (process.argv[2] === '--server') {
+            serve();
+        } else {
+            main();
+        }
         """
         with open(self.bridge_path, 'w') as f:
             f.write(bridge_code)
     
     def _call_bridge(self, function_name: str, args: List[Any]) -> Any:
-        """Call the ethers.js bridge with the given function and arguments"""
+        """Call the given bridge function on the selected transport"""
         try:
-            # Convert arguments to JSON string
-            args_json = json.dumps(args)
-            
-            # Call the bridge script with Node.js
-            result = subprocess.run(
-                ["node", str(self.bridge_path), function_name, args_json],
-                capture_output=True,
-                text=True,
-                cwd=str(Path(__file__).parent)
-            )
-            
-            if result.returncode != 0:
-                print(f"Error calling bridge: {result.stderr}")
-                return None
-            
-            # Parse the JSON result
-            return json.loads(result.stdout)
-            
+            return self.bridge.call(function_name, args)
+        except BridgeError as e:
+            print(f"Error calling bridge: {e}")
+            return None
         except Exception as e:
             print(f"Error in bridge call: {e}")
             return None
+
+    def close(self):
+        """Stop the ethers.js bridge process or close the HTTP session"""
+        self.bridge.close()
     
     def register_user(self, name: str, email: str, role: str) -> bool:
         """Register a new user in the system"""
@@ -300,6 +394,7 @@ def main():
         
     print("\nNote: Make sure the Hardhat node is running before using this script.")
     print("You can start it with 'python start_blockchain.py'")
+    print(f"Set {TRANSPORT_ENV}=web3 to call the contracts from Python instead of the ethers.js bridge.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,206 @@
+# merkle_anchor.py - Merkle-batched anchoring of the off-chain operations (one root per batch on OperationAnchor).
+
+import json
+import logging
+import threading
+from typing import Any, List, Optional, Sequence
+
+from eth_utils import keccak
+
+default_logger = logging.getLogger(__name__)
+
+
+def canonical_operation(operation: Sequence[Any]) -> bytes:
+    """
+    Canonical encoding of an Operazione row
+    (Id_operazione, Id_azienda, Id_prodotto, Data_operazione, Consumo_CO2, Operazione):
+    compact JSON, CO2 always as a float, so the same row always gives the same bytes.
+    """
+    id_operazione, azienda, prodotto, data, co2, tipo = operation
+    valori = [int(id_operazione), int(azienda), int(prodotto), str(data), float(co2), tipo]
+    return json.dumps(valori, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def leaf_hash(encoding: bytes) -> bytes:
+    """Leaf of the tree: hash of the hash of the encoding, as in the OpenZeppelin standard trees."""
+    return keccak(keccak(encoding))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    # Coppia ordinata: lo stesso hash di Hashes.commutativeKeccak256 usato da MerkleProof
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+class MerkleTree:
+    """
+    Merkle tree compatible with OpenZeppelin MerkleProof (sorted pairs).
+    A node without a sibling is carried to the next level unchanged.
+    """
+
+    def __init__(self, leaves: List[bytes]):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            livello = self.levels[-1]
+            superiore = [_hash_pair(livello[i], livello[i + 1]) if i + 1 < len(livello) else livello[i]
+                         for i in range(0, len(livello), 2)]
+            self.levels.append(superiore)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[bytes]:
+        """Siblings from the leaf to the root."""
+        prova = []
+        for livello in self.levels[:-1]:
+            fratello = index ^ 1
+            if fratello < len(livello):
+                prova.append(livello[fratello])
+            index //= 2
+        return prova
+
+    @staticmethod
+    def verify(leaf: bytes, proof: List[bytes], root: bytes) -> bool:
+        calcolato = leaf
+        for nodo in proof:
+            calcolato = _hash_pair(calcolato, nodo)
+        return calcolato == root
+
+
+class OperationAnchorService:
+    """
+    Collects the operations not anchored yet, builds a Merkle tree over their canonical
+    encodings and anchors only its root, one transaction per batch of up to batch_size operations.
+    The inclusion proof of every operation is stored off-chain by the repository.
+
+    Every batch is stored with the OperationAnchor address and the genesis hash of its chain.
+    The Hardhat chain lives in memory, so after a node restart the batch ids start again from 1:
+    check_anchors() marks the batches no longer on the chain as stale and their operations
+    are anchored again.
+
+    transport is a Web3Transport; repository provides get_operazioni_da_ancorare(limit),
+    salva_ancoraggio(id_batch, contratto, catena, radice, tx_hash, prove), get_ancoraggi_validi(),
+    segna_obsoleti(id_ancoraggi) and get_prova(id_operazione) (see the off-chain AnchorRepository).
+    """
+
+    def __init__(self, transport, repository, batch_size: int = 1000, interval: float = 5.0,
+                 logger: Optional[logging.Logger] = None):
+        self.transport = transport
+        self.repository = repository
+        self.batch_size = batch_size
+        self.interval = interval
+        self.logger = logger or default_logger
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._posizione = None  # (contratto, catena) dell'ultimo controllo completo
+
+    def check_anchors(self) -> List[int]:
+        """
+        Marks as stale the anchored batches that are no longer on the chain: anchored on another
+        contract or chain, or whose batches(id).root differs from the stored root.
+        All of them are checked when the contract or the chain changed since the last check,
+        otherwise only the latest one (a reset numbers the batches from 1 again, so it stops matching).
+        Returns the local ids of the stale batches.
+        """
+        with self._lock:
+            return self._check_anchors(completo=False)
+
+    def _check_anchors(self, completo: bool) -> List[int]:
+        ancoraggi = self.repository.get_ancoraggi_validi()
+        if not ancoraggi:
+            return []
+        posizione = tuple(self.transport.anchor_location())
+        parziale = not completo and posizione == self._posizione
+        da_controllare = ancoraggi[-1:] if parziale else ancoraggi
+
+        obsoleti = [a[0] for a in da_controllare if (a[2], a[3]) != posizione]
+        sulla_catena = [a for a in da_controllare if (a[2], a[3]) == posizione]
+        if sulla_catena:
+            radici = self.transport.anchored_roots([a[1] for a in sulla_catena])
+            obsoleti += [a[0] for a, radice in zip(sulla_catena, radici) if "0x" + radice.hex() != a[4]]
+        if obsoleti and parziale:
+            # L'ultimo batch non e' piu' sulla catena: si controllano tutti
+            return self._check_anchors(completo=True)
+
+        if obsoleti:
+            self.repository.segna_obsoleti(sorted(obsoleti))
+            self.logger.warning(f"[ANCHOR] {len(obsoleti)} anchored batches are no longer on the chain, "
+                                f"their operations will be anchored again")
+        self._posizione = posizione
+        return sorted(obsoleti)
+
+    def anchor_batch(self) -> Optional[int]:
+        """
+        Anchors one batch of pending operations; returns its local anchor id (Id_ancoraggio),
+        or None if nothing is pending.
+        """
+        with self._lock:
+            operazioni = self.repository.get_operazioni_da_ancorare(self.batch_size)
+            if not operazioni:
+                return None
+            foglie = [leaf_hash(canonical_operation(operazione)) for operazione in operazioni]
+            albero = MerkleTree(foglie)
+            contratto, catena = self.transport.anchor_location()
+            id_batch, tx_hash = self.transport.anchor_batch(albero.root, len(foglie))
+            prove = [(operazione[0], "0x" + foglia.hex(), json.dumps(["0x" + n.hex() for n in albero.proof(i)]))
+                     for i, (operazione, foglia) in enumerate(zip(operazioni, foglie))]
+            return self.repository.salva_ancoraggio(id_batch, contratto, catena, "0x" + albero.root.hex(),
+                                                    tx_hash, prove)
+
+    def anchor_pending(self) -> List[int]:
+        """
+        Checks the anchored batches against the chain, then anchors batches until no operation
+        is pending; returns the local anchor ids.
+        """
+        self.check_anchors()
+        batch = []
+        while True:
+            id_batch = self.anchor_batch()
+            if id_batch is None:
+                return batch
+            batch.append(id_batch)
+
+    def verify(self, id_operazione: int, on_chain: bool = True) -> bool:
+        """
+        Verifies one operation: its current row must give the stored leaf, the proof must lead
+        to the stored root and, with on_chain, the contract must accept the proof.
+        """
+        if on_chain:
+            # Una prova di un batch non piu' sulla catena verrebbe controllata contro un batch diverso
+            self.check_anchors()
+        prova = self.repository.get_prova(id_operazione)
+        if prova is None:
+            return False
+        id_batch, radice, foglia, nodi, operazione = prova
+        foglia_attuale = leaf_hash(canonical_operation(operazione))
+        nodi = [bytes.fromhex(n[2:]) for n in json.loads(nodi)]
+        if "0x" + foglia_attuale.hex() != foglia or not MerkleTree.verify(foglia_attuale, nodi,
+                                                                          bytes.fromhex(radice[2:])):
+            return False
+        if not on_chain:
+            return True
+        return bool(self.transport.verify_anchored_operations([(id_batch, foglia_attuale, nodi)])[0])
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.anchor_pending()
+            except Exception as e:
+                self.logger.warning(f"[ANCHOR] Error anchoring operations: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Anchors the pending operations every interval seconds on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="OperationAnchor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,136 +1,91 @@
 // scripts/deploy.js
-// Deploys all contracts for the Sustainable Food Supply Chain project
+// Deploys all contracts for the Sustainable Food Supply Chain project.
+// With SFS_DEPLOY_CONTRACTS (comma separated names, set by deployment_cache.py) only those contracts
+// are deployed: the others keep the address saved in contract_addresses.json.
 
 const { ethers } = require("hardhat");
+const fs = require("fs");
+const path = require("path");
+
+// Same order as CONTRACTS in deployment_cache.py
+const CONTRACT_NAMES = [
+  "UserRegistry",
+  "ProductRegistry",
+  "OperationRegistry",
+  "QualityControl",
+  "SustainabilityMetrics",
+  "CO2Token",
+  "ProductRequest",
+  "SupplyChainCO2",
+  "OperationAnchor", // Merkle roots of the off-chain operations
+  "SupplyChain" // main contract
+];
+
+const contractAddressesPath = path.join(__dirname, "..", "contract_addresses.json");
+
+function readSavedAddresses() {
+  try {
+    return JSON.parse(fs.readFileSync(contractAddressesPath, "utf8")).contracts || {};
+  } catch (error) {
+    return {};
+  }
+}
 
 async function main() {
   console.log("Starting deployment process...");
-  
+
   // Get the signers (accounts)
   const [deployer] = await ethers.getSigners();
   console.log(`Deploying contracts with the account: ${deployer.address}`);
 
-  // Deploy UserRegistry
-  console.log("Deploying UserRegistry...");
-  const UserRegistry = await ethers.getContractFactory("UserRegistry");
-  const userRegistry = await UserRegistry.deploy();
-  await userRegistry.deploymentTransaction().wait();
-  console.log(`UserRegistry deployed to: ${await userRegistry.getAddress()}`);
-
-  // Deploy ProductRegistry
-  console.log("Deploying ProductRegistry...");
-  const ProductRegistry = await ethers.getContractFactory("ProductRegistry");
-  const productRegistry = await ProductRegistry.deploy();
-  await productRegistry.deploymentTransaction().wait();
-  console.log(`ProductRegistry deployed to: ${await productRegistry.getAddress()}`);
+  const requested = process.env.SFS_DEPLOY_CONTRACTS
+    ? process.env.SFS_DEPLOY_CONTRACTS.split(",").map(name => name.trim()).filter(Boolean)
+    : CONTRACT_NAMES;
+  const saved = readSavedAddresses();
 
-  // Deploy OperationRegistry
-  console.log("Deploying OperationRegistry...");
-  const OperationRegistry = await ethers.getContractFactory("OperationRegistry");
-  const operationRegistry = await OperationRegistry.deploy();
-  await operationRegistry.deploymentTransaction().wait();
-  console.log(`OperationRegistry deployed to: ${await operationRegistry.getAddress()}`);
+  const factories = {};
+  const deployed = {};
+  const addresses = {};
 
-  // Deploy QualityControl
-  console.log("Deploying QualityControl...");
-  const QualityControl = await ethers.getContractFactory("QualityControl");
-  const qualityControl = await QualityControl.deploy();
-  await qualityControl.deploymentTransaction().wait();
-  console.log(`QualityControl deployed to: ${await qualityControl.getAddress()}`);
-
-  // Deploy SustainabilityMetrics
-  console.log("Deploying SustainabilityMetrics...");
-  const SustainabilityMetrics = await ethers.getContractFactory("SustainabilityMetrics");
-  const sustainabilityMetrics = await SustainabilityMetrics.deploy();
-  await sustainabilityMetrics.deploymentTransaction().wait();
-  console.log(`SustainabilityMetrics deployed to: ${await sustainabilityMetrics.getAddress()}`);
-
-  // Deploy CO2Token
-  console.log("Deploying CO2Token...");
-  const CO2Token = await ethers.getContractFactory("CO2Token");
-  const co2Token = await CO2Token.deploy();
-  await co2Token.deploymentTransaction().wait();
-  const co2TokenAddress = await co2Token.getAddress();
-  console.log(`CO2Token deployed to: ${co2TokenAddress}`);
-
-  // Deploy ProductRequest
-  console.log("Deploying ProductRequest...");
-  const ProductRequest = await ethers.getContractFactory("ProductRequest");
-  const productRequest = await ProductRequest.deploy();
-  await productRequest.deploymentTransaction().wait();
-  console.log(`ProductRequest deployed to: ${await productRequest.getAddress()}`);
+  // All the deployment transactions are sent first, then their receipts are awaited together
+  for (const name of CONTRACT_NAMES) {
+    factories[name] = await ethers.getContractFactory(name);
+    if (!requested.includes(name) && saved[name] && saved[name].address) {
+      addresses[name] = saved[name].address;
+      console.log(`${name} kept at: ${addresses[name]}`);
+      continue;
+    }
+    console.log(`Deploying ${name}...`);
+    deployed[name] = await factories[name].deploy();
+  }
 
-  // Deploy SupplyChainCO2
-  console.log("Deploying SupplyChainCO2...");
-  const SupplyChainCO2 = await ethers.getContractFactory("SupplyChainCO2");
-  const supplyChainCO2 = await SupplyChainCO2.deploy();
-  await supplyChainCO2.deploymentTransaction().wait();
-  console.log(`SupplyChainCO2 deployed to: ${await supplyChainCO2.getAddress()}`);
+  await Promise.all(Object.values(deployed).map(contract => contract.deploymentTransaction().wait()));
+  for (const [name, contract] of Object.entries(deployed)) {
+    addresses[name] = await contract.getAddress();
+    console.log(`${name} deployed to: ${addresses[name]}`);
+  }
 
-  // Deploy SupplyChain (main contract)
-  console.log("Deploying SupplyChain...");
-  const SupplyChain = await ethers.getContractFactory("SupplyChain");
-  const supplyChain = await SupplyChain.deploy();
-  await supplyChain.deploymentTransaction().wait();
-  console.log(`SupplyChain deployed to: ${await supplyChain.getAddress()}`);
-  
-  // Initialize SupplyChain with contract addresses
-  console.log("Initializing SupplyChain...");
-  const initTx = await supplyChain.initialize(
-    await userRegistry.getAddress(),
-    await productRequest.getAddress(),
-    await operationRegistry.getAddress()
-  );
-  await initTx.wait();
-  console.log("SupplyChain initialized successfully");
+  // Initialize SupplyChain with contract addresses (only a new SupplyChain needs it)
+  if (deployed.SupplyChain) {
+    console.log("Initializing SupplyChain...");
+    const initTx = await deployed.SupplyChain.initialize(
+      addresses.UserRegistry,
+      addresses.ProductRequest,
+      addresses.OperationRegistry
+    );
+    await initTx.wait();
+    console.log("SupplyChain initialized successfully");
+  }
 
   // Save contract addresses and ABIs to a JSON file
-  const fs = require("fs");
-  const path = require("path");
-  
-  // Get all the contract addresses
-  const contracts = {
-    contracts: {
-      UserRegistry: {
-        address: await userRegistry.getAddress(),
-        abi: UserRegistry.interface.format('json')
-      },
-      ProductRegistry: {
-        address: await productRegistry.getAddress(),
-        abi: ProductRegistry.interface.format('json')
-      },
-      OperationRegistry: {
-        address: await operationRegistry.getAddress(),
-        abi: OperationRegistry.interface.format('json')
-      },
-      QualityControl: {
-        address: await qualityControl.getAddress(),
-        abi: QualityControl.interface.format('json')
-      },
-      SustainabilityMetrics: {
-        address: await sustainabilityMetrics.getAddress(),
-        abi: SustainabilityMetrics.interface.format('json')
-      },
-      CO2Token: {
-        address: await co2Token.getAddress(),
-        abi: CO2Token.interface.format('json')
-      },
-      ProductRequest: {
-        address: await productRequest.getAddress(),
-        abi: ProductRequest.interface.format('json')
-      },
-      SupplyChainCO2: {
-        address: await supplyChainCO2.getAddress(),
-        abi: SupplyChainCO2.interface.format('json')
-      },
-      SupplyChain: {
-        address: await supplyChain.getAddress(),
-        abi: SupplyChain.interface.format('json')
-      }
-    }
-  };
+  const contracts = { contracts: {} };
+  for (const name of CONTRACT_NAMES) {
+    contracts.contracts[name] = {
+      address: addresses[name],
+      abi: factories[name].interface.format('json')
+    };
+  }
 
-  const contractAddressesPath = path.join(__dirname, "..", "contract_addresses.json");
   fs.writeFileSync(contractAddressesPath, JSON.stringify(contracts, null, 2));
   console.log(`Contract addresses and ABIs saved to ${contractAddressesPath}`);
 
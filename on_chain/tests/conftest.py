@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# I moduli on-chain si importano come pacchetto on_chain dalla radice del progetto
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
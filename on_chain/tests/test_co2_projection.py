@@ -0,0 +1,124 @@
+import sqlite3
+
+import pytest
+
+from on_chain import co2_projection
+from on_chain.co2_projection import CONTRACT_NAME, SupplyChainCO2Projection
+
+PRODUCER = "0x" + "aa" * 20
+TRANSPORTER = "0x" + "bb" * 20
+
+
+def evento(blocco, nome, contratto=CONTRACT_NAME, **args):
+    return {"contract": contratto, "event": nome, "args": args, "blockNumber": blocco, "logIndex": 0,
+            "transactionHash": "0x%064x" % blocco}
+
+
+EVENTI = [
+    evento(1, "LotCreated", lotId=1, productName="Grano", producer=PRODUCER, co2Produced=10),
+    evento(2, "TransformationLogged", fromLotId=1, toLotId=2, transformer=PRODUCER, co2Emitted=5),
+    evento(3, "TransportLogged", lotId=2, transporter=TRANSPORTER, co2Emitted=3, **{"from": "A", "to": "B"}),
+    evento(4, "LotCreated", contratto="ProductRegistry", lotId=9, productName="Altro", producer=PRODUCER,
+           co2Produced=1)
+]
+
+
+@pytest.fixture
+def cursor():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(co2_projection._SCHEMA)
+    cursor = connection.cursor()
+    yield cursor
+    connection.close()
+
+
+def conteggi(cursor):
+    return [cursor.execute(f"SELECT COUNT(*) FROM {tabella};").fetchone()[0]
+            for tabella in ("Lotto_chain", "Trasformazione_chain", "Trasporto_chain")]
+
+
+def test_apply_mirrors_lots_transformations_and_transports(cursor):
+    SupplyChainCO2Projection.apply(cursor, EVENTI)
+
+    assert conteggi(cursor) == [2, 1, 1]
+    assert cursor.execute("SELECT Id_lotto, Nome_prodotto, Co2 FROM Lotto_chain ORDER BY Id_lotto;").fetchall() \
+        == [(1, "Grano", 10.0), (2, None, 5.0)]
+    assert cursor.execute("SELECT Partenza, Arrivo, Co2 FROM Trasporto_chain;").fetchall() == [("A", "B", 3.0)]
+
+
+def test_replaying_the_same_events_changes_nothing(cursor):
+    SupplyChainCO2Projection.apply(cursor, EVENTI)
+    prima = cursor.execute("SELECT * FROM Lotto_chain ORDER BY Id_lotto;").fetchall()
+
+    SupplyChainCO2Projection.apply(cursor, EVENTI)
+    SupplyChainCO2Projection.apply(cursor, EVENTI[1:])
+
+    assert conteggi(cursor) == [2, 1, 1]
+    assert cursor.execute("SELECT * FROM Lotto_chain ORDER BY Id_lotto;").fetchall() == prima
+
+
+class FakeIndexer:
+    """add_projection come EventIndexer: schema, reset e replay degli eventi gia' indicizzati."""
+
+    def __init__(self, db_path, eventi):
+        self.db_path = db_path
+        self.eventi = eventi
+
+    def add_projection(self, projection, schema=None, replay=True, reset=None):
+        connection = sqlite3.connect(str(self.db_path))
+        with connection:
+            connection.executescript(schema)
+            reset(connection.cursor())
+            projection(connection.cursor(), self.eventi)
+        connection.close()
+
+
+def test_reset_empties_the_mirror_so_a_new_chain_replaces_it(cursor):
+    SupplyChainCO2Projection.apply(cursor, EVENTI)
+    SupplyChainCO2Projection.reset(cursor)
+    assert conteggi(cursor) == [0, 0, 0]
+
+    # Sulla nuova catena il lotto 1 e' un altro prodotto
+    SupplyChainCO2Projection.apply(cursor, [evento(1, "LotCreated", lotId=1, productName="Mela", producer=PRODUCER,
+                                                   co2Produced=2)])
+    assert cursor.execute("SELECT Id_lotto, Nome_prodotto, Co2 FROM Lotto_chain;").fetchall() == [(1, "Mela", 2.0)]
+
+
+def test_the_mirror_follows_a_chain_reset_of_the_real_indexer(tmp_path):
+    from types import SimpleNamespace
+    from on_chain.event_indexer import EventIndexer
+
+    indexer = EventIndexer(SimpleNamespace(), None, "http://node", {}, db_path=tmp_path / "index.db")
+    connection = sqlite3.connect(str(tmp_path / "index.db"))
+    try:
+        SupplyChainCO2Projection(indexer)
+        with connection:
+            SupplyChainCO2Projection.apply(connection.cursor(), EVENTI)
+        indexer.reset()
+        assert conteggi(connection.cursor()) == [0, 0, 0]
+    finally:
+        connection.close()
+        indexer.close()
+
+
+def test_diff_against_the_off_chain_tables(tmp_path):
+    off_chain = tmp_path / "off_chain.db"
+    connection = sqlite3.connect(str(off_chain))
+    with connection:
+        connection.executescript("""
+        CREATE TABLE Prodotto (Id_prodotto INTEGER PRIMARY KEY, Nome TEXT);
+        CREATE TABLE Operazione (Id_operazione INTEGER PRIMARY KEY, Id_prodotto INTEGER, Consumo_CO2 REAL);
+        CREATE TABLE Composizione (Prodotto INTEGER, Materia_prima INTEGER);
+        INSERT INTO Prodotto VALUES (1, 'Grano'), (2, 'Farina'), (3, 'Pane');
+        INSERT INTO Operazione VALUES (1, 1, 10), (2, 2, 20);
+        INSERT INTO Composizione VALUES (2, 1), (3, 2);
+        """)
+    connection.close()
+
+    projection = SupplyChainCO2Projection(FakeIndexer(tmp_path / "index.db", EVENTI), off_chain_db_path=off_chain)
+    diff = projection.diff()
+
+    assert diff["missing_on_chain"] == [(3, "Pane")]
+    assert diff["missing_off_chain"] == []
+    assert diff["co2_mismatch"] == [(2, 20.0, 8.0)]
+    assert diff["composition_mismatch"] == []
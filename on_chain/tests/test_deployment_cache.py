@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from on_chain import deployment_cache
+from on_chain.deployment_cache import CONTRACTS, DeploymentCache
+
+
+def indirizzo(nome):
+    return "0x%040x" % (CONTRACTS.index(nome) + 1)
+
+
+class FakeNode:
+    """eth_chainId e eth_getCode: ogni contratto ha un bytecode proprio, rimovibile per simulare un reset."""
+
+    def __init__(self):
+        self.chain_id = 31337
+        self.codes = {indirizzo(nome): "0x60" + nome.encode().hex() for nome in CONTRACTS}
+
+    def __call__(self, session, node_url, richieste, timeout=120.0):
+        risposte = []
+        for metodo, parametri in richieste:
+            if metodo == "eth_chainId":
+                risposte.append({"result": hex(self.chain_id)})
+            else:
+                risposte.append({"result": self.codes.get(parametri[0], "0x")})
+        return risposte
+
+
+@pytest.fixture
+def node(monkeypatch):
+    fake = FakeNode()
+    monkeypatch.setattr(deployment_cache, "batch_request", fake)
+    return fake
+
+
+@pytest.fixture
+def fingerprints(monkeypatch):
+    impronte = {nome: f"fp-{nome}" for nome in CONTRACTS}
+    monkeypatch.setattr(deployment_cache, "contract_fingerprint", impronte.get)
+    return impronte
+
+
+@pytest.fixture
+def cache(node, fingerprints, tmp_path):
+    indirizzi = tmp_path / "contract_addresses.json"
+    indirizzi.write_text(json.dumps({"contracts": {nome: {"address": indirizzo(nome)} for nome in CONTRACTS}}))
+    cache = DeploymentCache("http://node", manifest_file=tmp_path / "manifest.json",
+                            contract_addresses_file=indirizzi)
+    yield cache
+    cache.close()
+
+
+def test_everything_is_deployed_without_a_manifest(cache):
+    assert cache.contracts_to_deploy() == CONTRACTS
+
+
+def test_warm_start_deploys_nothing(cache):
+    cache.record_deployment()
+    assert cache.contracts_to_deploy() == []
+
+
+def test_a_changed_artifact_is_redeployed(cache, fingerprints):
+    cache.record_deployment()
+    fingerprints["QualityControl"] = "fp-new"
+    assert cache.contracts_to_deploy() == ["QualityControl"]
+
+
+def test_missing_code_redeploys_the_contract_and_its_dependents(cache, node):
+    cache.record_deployment()
+    del node.codes[indirizzo("UserRegistry")]
+    assert cache.contracts_to_deploy() == ["UserRegistry", "SupplyChain"]
+
+
+def test_an_address_changed_outside_the_manifest_is_redeployed(cache):
+    cache.record_deployment()
+    dati = json.loads(cache.contract_addresses_file.read_text())
+    dati["contracts"]["CO2Token"]["address"] = "0x" + "ff" * 20
+    cache.contract_addresses_file.write_text(json.dumps(dati))
+    assert cache.contracts_to_deploy() == ["CO2Token"]
+
+
+def test_another_chain_has_its_own_manifest_entry(cache, node):
+    cache.record_deployment()
+    node.chain_id = 1337
+    assert cache.contracts_to_deploy() == CONTRACTS
@@ -0,0 +1,192 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from web3 import Web3
+
+from on_chain import event_indexer
+from on_chain.event_indexer import EventIndexer
+
+W3 = Web3()
+ADDRESS = "0x" + "cc" * 20
+STORED_ABI = {"type": "event", "name": "Stored", "anonymous": False, "inputs": [
+    {"name": "id", "type": "uint256", "indexed": True},
+    {"name": "label", "type": "string", "indexed": False}
+]}
+STORED_TOPIC = "0x" + bytes(W3.keccak(text="Stored(uint256,string)")).hex()
+
+
+def stored_log(blocco, log_index, id_, label):
+    return {
+        "address": ADDRESS,
+        "topics": [STORED_TOPIC, "0x" + W3.codec.encode(["uint256"], [id_]).hex()],
+        "data": "0x" + W3.codec.encode(["string"], [label]).hex(),
+        "blockNumber": hex(blocco),
+        "logIndex": hex(log_index),
+        "transactionHash": "0x%064x" % blocco
+    }
+
+
+class FakeChain:
+    """
+    Nodo con un evento Stored per blocco; eth_getLogs rifiuta gli intervalli piu' lunghi di max_range.
+    restart() lo fa ripartire da zero come un nodo Hardhat riavviato: stessi numeri di blocco, altri hash.
+    """
+
+    def __init__(self, head, max_range=None):
+        self.head = head
+        self.max_range = max_range
+        self.ranges = []
+        self.epoca = 0
+        self.eth = SimpleNamespace()
+        self.w3 = SimpleNamespace(keccak=W3.keccak, codec=W3.codec, to_checksum_address=W3.to_checksum_address,
+                                  eth=self.eth)
+        self.set_head(head)
+
+    def set_head(self, head):
+        self.head = head
+        self.eth.block_number = head
+
+    def restart(self, head):
+        self.epoca += 1
+        self.set_head(head)
+
+    def label(self, blocco):
+        return f"lot {blocco}" + (f" (run {self.epoca})" if self.epoca else "")
+
+    def __call__(self, session, node_url, richieste, timeout=120.0):
+        risposte = []
+        for metodo, parametri in richieste:
+            if metodo == "eth_chainId":
+                risposte.append({"result": hex(31337)})
+                continue
+            if metodo == "eth_getBlockByNumber":
+                blocco = int(parametri[0], 16)
+                risposte.append({"result": {"hash": "0x%032x%032x" % (self.epoca, blocco)}
+                                 if blocco <= self.head else None})
+                continue
+            filtro = parametri[0]
+            da, a = int(filtro["fromBlock"], 16), int(filtro["toBlock"], 16)
+            if self.max_range and a - da + 1 > self.max_range:
+                risposte.append({"error": {"message": "block range too large"}})
+                continue
+            self.ranges.append((da, a))
+            risposte.append({"result": [stored_log(b, 0, b, self.label(b)) for b in range(max(da, 1), a + 1)]})
+        return risposte
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    fake = FakeChain(head=10)
+    monkeypatch.setattr(event_indexer, "batch_request", fake)
+    return fake
+
+
+@pytest.fixture
+def make_indexer(chain, tmp_path):
+    indexers = []
+
+    def make(**kwargs):
+        contratto = SimpleNamespace(address=ADDRESS, abi=[STORED_ABI])
+        indexer = EventIndexer(chain.w3, None, "http://node", {"Store": contratto},
+                               db_path=tmp_path / "index.db", **kwargs)
+        indexers.append(indexer)
+        return indexer
+
+    yield make
+    for indexer in indexers:
+        indexer.close()
+
+
+def test_sync_decodes_the_events_and_moves_the_checkpoint(make_indexer):
+    indexer = make_indexer()
+
+    assert indexer.sync() == 10
+    assert indexer.checkpoint == 10
+    evento = indexer.events("Store", "Stored")[2]
+    assert evento["blockNumber"] == 3
+    assert evento["args"] == {"id": 3, "label": "lot 3"}
+
+
+def test_restart_resumes_from_the_checkpoint_without_duplicates(chain, make_indexer):
+    make_indexer().sync()
+    chain.set_head(12)
+    chain.ranges.clear()
+
+    indexer = make_indexer()
+    assert indexer.sync() == 2
+    assert chain.ranges == [(11, 12)]
+    assert [e["blockNumber"] for e in indexer.events()] == list(range(1, 13))
+
+
+def test_backfill_in_parallel_chunks_commits_in_block_order(make_indexer):
+    indexer = make_indexer(chunk_size=3, workers=2)
+    visti = []
+    indexer.subscribe(lambda events: visti.extend(e["blockNumber"] for e in events))
+
+    assert indexer.sync() == 10
+    assert visti == list(range(1, 11))
+
+
+def test_a_refused_range_is_split(chain, make_indexer):
+    chain.max_range = 4
+    indexer = make_indexer(chunk_size=10)
+
+    assert indexer.sync() == 10
+    assert all(a - da < 4 for da, a in chain.ranges)
+
+
+def test_listener_errors_are_logged_not_raised(make_indexer, caplog):
+    indexer = make_indexer()
+    indexer.subscribe(lambda events: 1 / 0)
+
+    with caplog.at_level(logging.ERROR, logger=event_indexer.__name__):
+        assert indexer.sync() == 10
+    assert "Listener error" in caplog.text
+    assert indexer.checkpoint == 10
+
+
+def test_a_restarted_chain_is_indexed_again_from_the_start(chain, make_indexer, caplog):
+    indexer = make_indexer()
+    azzerate = []
+    indexer.add_projection(lambda cursor, events: None, reset=lambda cursor: azzerate.append(True))
+    indexer.sync()
+
+    # Il nodo riparte: la testa e' sotto il checkpoint
+    chain.restart(head=4)
+    with caplog.at_level(logging.WARNING, logger=event_indexer.__name__):
+        assert indexer.sync() == 4
+    assert "Chain reset detected" in caplog.text
+    assert azzerate == [True, True]
+    assert [e["args"]["label"] for e in indexer.events()] == [f"lot {b} (run 1)" for b in range(1, 5)]
+
+    # Riparte ancora e supera il vecchio checkpoint: lo rivela l'hash del blocco
+    chain.restart(head=12)
+    assert indexer.sync() == 12
+    assert indexer.checkpoint == 12
+    assert [e["args"]["label"] for e in indexer.events()] == [f"lot {b} (run 2)" for b in range(1, 13)]
+
+
+def test_a_restart_with_the_same_chain_is_not_a_reset(chain, make_indexer):
+    make_indexer().sync()
+    chain.set_head(11)
+    chain.ranges.clear()
+
+    indexer = make_indexer()
+    assert indexer.sync() == 1
+    assert chain.ranges == [(11, 11)]
+    assert len(indexer.events()) == 11
+
+
+def test_an_index_with_an_older_schema_is_rebuilt(make_indexer, tmp_path):
+    import sqlite3
+    vecchio = sqlite3.connect(str(tmp_path / "index.db"))
+    vecchio.executescript("""
+    CREATE TABLE Checkpoint (Nome TEXT PRIMARY KEY, Ultimo_blocco INTEGER NOT NULL);
+    INSERT INTO Checkpoint VALUES ('default', 50);
+    """)
+    vecchio.close()
+
+    indexer = make_indexer()
+    assert indexer.checkpoint == -1
+    assert indexer.sync() == 10
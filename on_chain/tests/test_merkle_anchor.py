@@ -0,0 +1,161 @@
+import pytest
+from eth_utils import keccak
+
+from on_chain.merkle_anchor import MerkleTree, canonical_operation, leaf_hash
+
+OPERAZIONI = [(i, 1, 10 + i, "2025-05-17", i * 1.5, "Trasporto") for i in range(1, 8)]
+
+
+def foglie(n):
+    return [leaf_hash(canonical_operation(operazione)) for operazione in OPERAZIONI[:n]]
+
+
+def test_canonical_encoding_does_not_depend_on_the_numeric_types():
+    assert canonical_operation((1, 2, 3, "2025-05-17", 4, "Trasporto")) \
+        == canonical_operation(("1", 2.0, 3, "2025-05-17", 4.0, "Trasporto"))
+
+
+def test_single_leaf_tree_is_its_own_root():
+    albero = MerkleTree(foglie(1))
+    assert albero.root == foglie(1)[0]
+    assert albero.proof(0) == []
+    assert MerkleTree.verify(foglie(1)[0], [], albero.root)
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 5, 7])
+def test_every_leaf_proof_verifies_against_the_root(n):
+    albero = MerkleTree(foglie(n))
+    for index, foglia in enumerate(foglie(n)):
+        assert MerkleTree.verify(foglia, albero.proof(index), albero.root)
+
+
+def test_root_uses_sorted_pairs_like_openzeppelin():
+    a, b = foglie(2)
+    assert MerkleTree([a, b]).root == MerkleTree([b, a]).root == keccak(min(a, b) + max(a, b))
+
+
+def test_verify_rejects_a_changed_leaf_or_proof():
+    albero = MerkleTree(foglie(5))
+    modificata = leaf_hash(canonical_operation(OPERAZIONI[2][:4] + (99.0, "Trasporto")))
+
+    assert not MerkleTree.verify(modificata, albero.proof(2), albero.root)
+    assert not MerkleTree.verify(foglie(5)[2], albero.proof(3), albero.root)
+
+
+def test_empty_tree_is_refused():
+    with pytest.raises(ValueError):
+        MerkleTree([])
+
+
+class FakeAnchorChain:
+    """OperationAnchor su una catena in memoria: reset() la fa ripartire come un nodo Hardhat riavviato."""
+
+    def __init__(self):
+        self.genesi = 0
+        self.reset()
+
+    def reset(self):
+        self.genesi += 1
+        self.batches = {}
+
+    def anchor_location(self):
+        return "0x" + "ab" * 20, "0x%064x" % self.genesi
+
+    def anchor_batch(self, root, count):
+        for batch_id, radice in self.batches.items():
+            if radice == root:
+                return batch_id, None
+        batch_id = len(self.batches) + 1
+        self.batches[batch_id] = root
+        return batch_id, "0x%064x" % batch_id
+
+    def anchored_roots(self, batch_ids):
+        return [self.batches.get(batch_id, bytes(32)) for batch_id in batch_ids]
+
+    def verify_anchored_operations(self, proofs):
+        return [batch_id in self.batches and MerkleTree.verify(foglia, nodi, self.batches[batch_id])
+                for batch_id, foglia, nodi in proofs]
+
+
+class FakeAnchorRepository:
+    """Stesso contratto di AnchorRepositoryImpl, in memoria."""
+
+    def __init__(self, operazioni):
+        self.operazioni = operazioni
+        self.ancoraggi = {}
+        self.prove = {}
+
+    def get_operazioni_da_ancorare(self, limit):
+        ultima = max(self.prove, default=0)
+        return [o for o in self.operazioni if o[0] > ultima][:limit]
+
+    def salva_ancoraggio(self, id_batch, contratto, catena, radice, tx_hash, prove):
+        for a in self.ancoraggi.values():
+            assert not (a["valido"] and (a["batch"], a["contratto"], a["catena"]) == (id_batch, contratto, catena))
+        id_ancoraggio = len(self.ancoraggi) + 1
+        self.ancoraggi[id_ancoraggio] = {"batch": id_batch, "contratto": contratto, "catena": catena,
+                                         "radice": radice, "valido": True}
+        for id_operazione, foglia, prova in prove:
+            self.prove[id_operazione] = (id_ancoraggio, foglia, prova)
+        return id_ancoraggio
+
+    def get_ancoraggi_validi(self):
+        return [(i, a["batch"], a["contratto"], a["catena"], a["radice"])
+                for i, a in sorted(self.ancoraggi.items()) if a["valido"]]
+
+    def segna_obsoleti(self, id_ancoraggi):
+        for id_ancoraggio in id_ancoraggi:
+            self.ancoraggi[id_ancoraggio]["valido"] = False
+        self.prove = {k: v for k, v in self.prove.items() if v[0] not in id_ancoraggi}
+
+    def get_prova(self, id_operazione):
+        if id_operazione not in self.prove:
+            return None
+        id_ancoraggio, foglia, prova = self.prove[id_operazione]
+        a = self.ancoraggi[id_ancoraggio]
+        return a["batch"], a["radice"], foglia, prova, self.operazioni[id_operazione - 1]
+
+
+@pytest.fixture
+def servizio():
+    from on_chain.merkle_anchor import OperationAnchorService
+    return OperationAnchorService(FakeAnchorChain(), FakeAnchorRepository(list(OPERAZIONI)), batch_size=3)
+
+
+def test_service_anchors_the_pending_operations_in_batches(servizio):
+    assert servizio.anchor_pending() == [1, 2, 3]
+    assert sorted(servizio.transport.batches) == [1, 2, 3]
+    assert all(servizio.verify(operazione[0]) for operazione in OPERAZIONI)
+    assert servizio.anchor_pending() == []
+
+
+def test_after_a_chain_reset_the_stale_batches_are_anchored_again(servizio, caplog):
+    servizio.anchor_pending()
+    servizio.transport.reset()
+
+    with caplog.at_level("WARNING"):
+        assert servizio.anchor_pending() == [4, 5, 6]
+    assert "no longer on the chain" in caplog.text
+    assert [a[0] for a in servizio.repository.get_ancoraggi_validi()] == [4, 5, 6]
+    assert [a[1] for a in servizio.repository.get_ancoraggi_validi()] == [1, 2, 3]
+    assert all(servizio.verify(operazione[0]) for operazione in OPERAZIONI)
+
+
+def test_a_reset_on_the_same_chain_marker_is_found_through_the_roots(servizio):
+    servizio.anchor_pending()
+    # Stesso blocco genesi e stesso indirizzo, ma OperationAnchor riparte da zero
+    servizio.transport.batches = {}
+
+    assert servizio.check_anchors() == [1, 2, 3]
+    assert servizio.repository.get_operazioni_da_ancorare(3) == OPERAZIONI[:3]
+
+
+def test_on_chain_verification_does_not_use_a_batch_of_another_chain(servizio):
+    servizio.anchor_pending()
+    servizio.transport.reset()
+    # Sulla nuova catena il batch 1 contiene altre operazioni
+    servizio.transport.anchor_batch(MerkleTree(foglie(2)).root, 2)
+
+    assert not servizio.verify(OPERAZIONI[4][0])
+    # Il batch obsoleto ha perso le prove: l'operazione torna tra quelle da ancorare
+    assert servizio.repository.get_prova(OPERAZIONI[4][0]) is None
@@ -0,0 +1,162 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from on_chain import transaction_pipeline
+from on_chain.transaction_pipeline import NonceManager, ReceiptTracker, TransactionPipeline
+from on_chain.web3_transport import Web3TransportError
+
+ACCOUNT = "0x" + "aa" * 20
+CONTRACT = SimpleNamespace(address="0x" + "cc" * 20)
+
+
+class FakeEth:
+    """w3.eth minimo: conteggio delle transazioni, numero di blocco e gas price."""
+
+    def __init__(self, transaction_count=5):
+        self.transaction_count = transaction_count
+        self.count_calls = 0
+        self._block = 0
+
+    def get_transaction_count(self, account, block):
+        self.count_calls += 1
+        return self.transaction_count
+
+    @property
+    def block_number(self):
+        # Un blocco nuovo a ogni lettura, cosi' il tracker ricontrolla le ricevute
+        self._block += 1
+        return self._block
+
+    gas_price = 1000
+
+
+class FakeNode:
+    """Risponde alle richieste batch come un nodo: hash per gli invii, ricevute dopo receipt_after letture."""
+
+    def __init__(self, receipt_after=0, send_errors=None):
+        self.receipt_after = receipt_after
+        self.send_errors = list(send_errors or [])
+        self.sent = []
+        self.receipt_reads = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, session, node_url, richieste, timeout=120.0):
+        risposte = []
+        with self.lock:
+            for metodo, parametri in richieste:
+                if metodo == "eth_sendTransaction":
+                    if self.send_errors:
+                        risposte.append({"error": {"message": self.send_errors.pop(0)}})
+                        continue
+                    self.sent.append(parametri[0])
+                    risposte.append({"result": "0x%064x" % len(self.sent)})
+                else:
+                    tx_hash = parametri[0]
+                    letture = self.receipt_reads[tx_hash] = self.receipt_reads.get(tx_hash, 0) + 1
+                    if letture <= self.receipt_after:
+                        risposte.append({"result": None})
+                    else:
+                        risposte.append({"result": {"transactionHash": tx_hash, "status": "0x1",
+                                                    "blockNumber": "0x2"}})
+        return risposte
+
+
+@pytest.fixture
+def node(monkeypatch):
+    fake = FakeNode()
+    monkeypatch.setattr(transaction_pipeline, "batch_request", fake)
+    monkeypatch.setattr(transaction_pipeline, "encode_function_call",
+                        lambda w3, contract, function_name, args: ({}, "0xabcdef"))
+    return fake
+
+
+def test_nonce_manager_reads_the_node_once_then_counts_locally():
+    eth = FakeEth(transaction_count=5)
+    nonces = NonceManager(SimpleNamespace(eth=eth))
+
+    assert [nonces.next_nonce(ACCOUNT) for _ in range(3)] == [5, 6, 7]
+    assert eth.count_calls == 1
+
+    eth.transaction_count = 9
+    nonces.resync(ACCOUNT)
+    assert nonces.next_nonce(ACCOUNT) == 9
+    assert eth.count_calls == 2
+
+
+def test_receipt_tracker_resolves_the_future_when_the_receipt_arrives(node):
+    node.receipt_after = 2
+    tracker = ReceiptTracker(SimpleNamespace(eth=FakeEth()), None, "http://node", poll_interval=0.01)
+    try:
+        ricevuta = tracker.track(bytes.fromhex("11" * 32)).result(timeout=5)
+    finally:
+        tracker.close()
+
+    assert ricevuta["status"] == 1
+    assert ricevuta["blockNumber"] == 2
+    assert node.receipt_reads["0x" + "11" * 32] == 3
+
+
+def test_receipt_tracker_times_out_a_transaction_never_mined(node):
+    node.receipt_after = 10 ** 6
+    tracker = ReceiptTracker(SimpleNamespace(eth=FakeEth()), None, "http://node", poll_interval=0.01,
+                             timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            tracker.track("0x" + "22" * 32).result(timeout=5)
+    finally:
+        tracker.close()
+
+
+def test_receipt_tracker_close_fails_the_pending_futures(node):
+    node.receipt_after = 10 ** 6
+    tracker = ReceiptTracker(SimpleNamespace(eth=FakeEth()), None, "http://node", poll_interval=0.01)
+    future = tracker.track("0x" + "33" * 32)
+    tracker.close()
+
+    with pytest.raises(Web3TransportError):
+        future.result(timeout=5)
+    with pytest.raises(Web3TransportError):
+        tracker.track("0x" + "44" * 32).result(timeout=5)
+
+
+def test_pipeline_sends_with_consecutive_nonces_and_returns_the_receipts(node):
+    pipeline = TransactionPipeline(SimpleNamespace(eth=FakeEth(transaction_count=5)), None, "http://node",
+                                   poll_interval=0.01)
+    try:
+        futures = [pipeline.submit(CONTRACT, "createProduct", [i], ACCOUNT) for i in range(3)]
+        ricevute = [future.result(timeout=5) for future in futures]
+    finally:
+        pipeline.close()
+
+    assert [int(tx["nonce"], 16) for tx in node.sent] == [5, 6, 7]
+    assert all(tx["to"] == CONTRACT.address and tx["data"] == "0xabcdef" for tx in node.sent)
+    assert [ricevuta["status"] for ricevuta in ricevute] == [1, 1, 1]
+
+
+def test_pipeline_resyncs_and_retries_once_on_a_nonce_error(node):
+    eth = FakeEth(transaction_count=5)
+    node.send_errors = ["nonce too low"]
+    pipeline = TransactionPipeline(SimpleNamespace(eth=eth), None, "http://node", poll_interval=0.01)
+    eth.transaction_count = 8
+    try:
+        pipeline.submit(CONTRACT, "createProduct", [], ACCOUNT).result(timeout=5)
+    finally:
+        pipeline.close()
+
+    assert [int(tx["nonce"], 16) for tx in node.sent] == [8]
+    assert eth.count_calls == 2
+
+
+def test_pipeline_fails_the_future_on_other_send_errors(node):
+    node.send_errors = ["execution reverted"]
+    pipeline = TransactionPipeline(SimpleNamespace(eth=FakeEth()), None, "http://node", poll_interval=0.01)
+    try:
+        with pytest.raises(Web3TransportError, match="execution reverted"):
+            pipeline.submit(CONTRACT, "createProduct", [], ACCOUNT).result(timeout=5)
+        with pytest.raises(ValueError):
+            pipeline.submit(CONTRACT, "createProduct", [], "")
+    finally:
+        pipeline.close()
+    assert node.sent == []
@@ -0,0 +1,99 @@
+import pytest
+import requests
+from web3 import Web3
+
+from on_chain import web3_transport
+from on_chain.web3_transport import Web3TransportError, batch_eth_call, batch_request
+
+W3 = Web3()
+ABI = [
+    {"type": "function", "name": "getValue", "stateMutability": "view",
+     "inputs": [{"name": "id", "type": "uint256"}], "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "getOwner", "stateMutability": "view",
+     "inputs": [], "outputs": [{"name": "", "type": "address"}, {"name": "", "type": "string"}]}
+]
+CONTRACT = W3.eth.contract(address="0x" + "11" * 20, abi=ABI)
+OWNER = "0x" + "ab" * 20
+
+
+class FakeResponse:
+    def __init__(self, corpo):
+        self.corpo = corpo
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.corpo
+
+
+class FakeSession:
+    """Risponde a ogni batch in ordine inverso, come puo' fare un nodo: conta solo l'id."""
+
+    def __init__(self, risultato):
+        self.risultato = risultato
+        self.batches = []
+
+    def post(self, node_url, json, timeout):
+        self.batches.append(json)
+        return FakeResponse([{"jsonrpc": "2.0", "id": r["id"], **self.risultato(r)} for r in reversed(json)])
+
+
+def test_batch_request_splits_the_calls_and_keeps_their_order(monkeypatch):
+    monkeypatch.setattr(web3_transport, "MAX_BATCH_SIZE", 3)
+    session = FakeSession(lambda r: {"result": r["params"][0]})
+
+    risposte = batch_request(session, "http://node", [("eth_echo", [i]) for i in range(7)])
+
+    assert [r["result"] for r in risposte] == list(range(7))
+    assert [len(batch) for batch in session.batches] == [3, 3, 1]
+
+
+def test_batch_request_reports_a_node_without_batch_support():
+    class Rifiuta(FakeSession):
+        def post(self, node_url, json, timeout):
+            return FakeResponse({"error": {"message": "batch not supported"}})
+
+    with pytest.raises(Web3TransportError, match="rejected"):
+        batch_request(Rifiuta(None), "http://node", [("eth_blockNumber", [])])
+
+
+def test_batch_request_wraps_connection_errors():
+    class Irraggiungibile(FakeSession):
+        def post(self, node_url, json, timeout):
+            raise requests.exceptions.ConnectionError("refused")
+
+    with pytest.raises(Web3TransportError, match="refused"):
+        batch_request(Irraggiungibile(None), "http://node", [("eth_blockNumber", [])])
+
+
+def risposta_eth_call(richiesta):
+    data = richiesta["params"][0]["data"]
+    if data.startswith("0x" + bytes(W3.keccak(text="getOwner()")[:4]).hex()):
+        return {"result": "0x" + W3.codec.encode(["address", "string"], [OWNER, "Azienda"]).hex()}
+    valore = W3.codec.decode(["uint256"], bytes.fromhex(data[10:]))[0]
+    return {"result": "0x" + W3.codec.encode(["uint256"], [valore * 10]).hex()}
+
+
+def test_batch_eth_call_decodes_single_and_multiple_outputs():
+    session = FakeSession(risposta_eth_call)
+
+    risultati = batch_eth_call(W3, session, "http://node",
+                               [(CONTRACT, "getValue", [1]), (CONTRACT, "getOwner", []), (CONTRACT, "getValue", [7])])
+
+    assert risultati == [10, (W3.to_checksum_address(OWNER), "Azienda"), 70]
+    assert len(session.batches) == 1
+
+
+def test_batch_eth_call_raises_on_an_error_entry():
+    session = FakeSession(lambda r: {"error": {"message": "execution reverted"}})
+
+    with pytest.raises(Web3TransportError, match="getValue failed"):
+        batch_eth_call(W3, session, "http://node", [(CONTRACT, "getValue", [1])])
+
+
+def test_batch_eth_call_raises_on_empty_data_naming_the_contract():
+    session = FakeSession(lambda r: {"result": "0x"})
+
+    with pytest.raises(Web3TransportError, match=f"getValue on {CONTRACT.address} returned no data"):
+        batch_eth_call(W3, session, "http://node", [(CONTRACT, "getValue", [1])])
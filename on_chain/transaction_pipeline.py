@@ -0,0 +1,280 @@
+# transaction_pipeline.py - Pipelined transaction submission: local nonces, send queue, async receipts.
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import requests
+from web3.datastructures import AttributeDict
+
+try:
+    # Formatter interno di web3: se manca la ricevuta viene riletta con get_transaction_receipt
+    from web3._utils.method_formatters import receipt_formatter
+except ImportError:
+    receipt_formatter = None
+
+try:
+    from on_chain.web3_transport import MAX_BATCH_SIZE, batch_request, encode_function_call, Web3TransportError
+except ImportError:
+    from web3_transport import MAX_BATCH_SIZE, batch_request, encode_function_call, Web3TransportError
+
+default_logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    """
+    Keeps the next nonce of each account locally.
+    The node is asked (pending transaction count) only on first use and after a resync.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._nonces: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def next_nonce(self, account: str) -> int:
+        with self._lock:
+            if account not in self._nonces:
+                self._nonces[account] = self.w3.eth.get_transaction_count(account, "pending")
+            nonce = self._nonces[account]
+            self._nonces[account] = nonce + 1
+            return nonce
+
+    def resync(self, account: str):
+        """Forgets the local nonce: the next one is read again from the node."""
+        with self._lock:
+            self._nonces.pop(account, None)
+
+
+class ReceiptTracker:
+    """
+    Resolves the Future of each tracked transaction when its receipt is available.
+    A background thread watches the block number and, when a new block arrives
+    (or new transactions are tracked), asks all the pending receipts with one batch request.
+    """
+
+    def __init__(self, w3, session: requests.Session, node_url: str, poll_interval: float = 0.05,
+                 timeout: float = 120.0, logger: Optional[logging.Logger] = None):
+        self.w3 = w3
+        self.session = session
+        self.node_url = node_url
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.logger = logger or default_logger
+
+        self._pending: Dict[str, tuple] = {}  # tx hash -> (future, scadenza)
+        self._condition = threading.Condition()
+        self._nuove = False
+        self._closed = False
+        self._thread = None
+
+    def track(self, tx_hash, future: Optional[Future] = None) -> Future:
+        """Returns a Future resolved with the receipt of tx_hash (web3 format)."""
+        future = future or Future()
+        tx_hash = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+        if not tx_hash.startswith("0x"):
+            tx_hash = "0x" + tx_hash
+        with self._condition:
+            if self._closed:
+                future.set_exception(Web3TransportError("Receipt tracker is closed"))
+                return future
+            self._pending[tx_hash] = (future, time.monotonic() + self.timeout)
+            self._nuove = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ReceiptTracker", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        ultimo_blocco = None
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    break
+                nuove, self._nuove = self._nuove, False
+                hashes = list(self._pending)
+
+            try:
+                blocco = self.w3.eth.block_number
+                if nuove or blocco != ultimo_blocco:
+                    ultimo_blocco = blocco
+                    self._controlla(hashes)
+            except Exception as e:
+                self.logger.warning(f"[RECEIPTS] Error polling receipts: {e}")
+
+            with self._condition:
+                if not self._nuove and not self._closed:
+                    self._condition.wait(self.poll_interval)
+
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.set_exception(Web3TransportError("Receipt tracker closed before the receipt arrived"))
+
+    def _controlla(self, hashes):
+        risposte = batch_request(self.session, self.node_url,
+                                 [("eth_getTransactionReceipt", [h]) for h in hashes])
+        adesso = time.monotonic()
+        for tx_hash, risposta in zip(hashes, risposte):
+            with self._condition:
+                future, scadenza = self._pending.get(tx_hash, (None, None))
+            if future is None:
+                continue
+            if risposta.get("result"):
+                try:
+                    ricevuta = self._formatta(tx_hash, risposta["result"])
+                except Exception as e:
+                    self._risolvi(tx_hash, exception=e)
+                    continue
+                self._risolvi(tx_hash, result=ricevuta)
+            elif adesso > scadenza:
+                self._risolvi(tx_hash, exception=TimeoutError(f"Transaction {tx_hash} not mined in time"))
+
+    def _formatta(self, tx_hash, ricevuta):
+        """Receipt in the web3 format (AttributeDict), as wait_for_transaction_receipt returns it."""
+        if receipt_formatter is None:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        return AttributeDict.recursive(receipt_formatter(ricevuta))
+
+    def _risolvi(self, tx_hash, result=None, exception=None):
+        with self._condition:
+            future, _ = self._pending.pop(tx_hash, (None, None))
+        if future is None:
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class TransactionPipeline:
+    """
+    Sends transactions back to back from a single queue, without waiting for receipts.
+    The call data is encoded locally, nonces come from the NonceManager and the gas price
+    is cached for gas_price_ttl seconds, so the transactions waiting in the queue go out
+    together as one batch of eth_sendTransaction.
+    submit() returns a Future resolved by the ReceiptTracker when the transaction is mined.
+    A send error resyncs the nonce of the account; a nonce error is retried once.
+    """
+
+    def __init__(self, w3, session: requests.Session, node_url: str, gas: int = 2000000,
+                 gas_price_ttl: float = 10.0, poll_interval: float = 0.05, timeout: float = 120.0,
+                 logger: Optional[logging.Logger] = None):
+        self.w3 = w3
+        self.session = session
+        self.node_url = node_url
+        self.gas = gas
+        self.gas_price_ttl = gas_price_ttl
+        self.timeout = timeout
+        self.nonces = NonceManager(w3)
+        self.receipts = ReceiptTracker(w3, session, node_url, poll_interval=poll_interval, timeout=timeout,
+                                       logger=logger)
+
+        self._gas_price = None
+        self._gas_price_letto = 0.0
+        self._coda = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="TransactionPipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, contract, function_name: str, args: List[Any], from_address: str,
+               gas: Optional[int] = None, gas_price: Optional[int] = None) -> Future:
+        """
+        Queues a call of a contract function (web3 contract object) as a transaction.
+        Returns the Future of its receipt.
+        """
+        if not from_address:
+            raise ValueError("A valid Ethereum address must be provided as 'from_address'.")
+        future = Future()
+        try:
+            _, data = encode_function_call(self.w3, contract, function_name, args)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        transazione = {"from": from_address, "to": contract.address, "data": data, "gas": gas or self.gas}
+        self._coda.put((transazione, gas_price, future, 0))
+        return future
+
+    def _get_gas_price(self) -> int:
+        adesso = time.monotonic()
+        if self._gas_price is None or adesso - self._gas_price_letto > self.gas_price_ttl:
+            self._gas_price = self.w3.eth.gas_price
+            self._gas_price_letto = adesso
+        return self._gas_price
+
+    def _run(self):
+        while True:
+            elemento = self._coda.get()
+            if elemento is None:
+                break
+            # Tutto quello che e' gia' in coda parte nello stesso batch
+            elementi = [elemento]
+            fine = False
+            while len(elementi) < MAX_BATCH_SIZE:
+                try:
+                    elemento = self._coda.get_nowait()
+                except queue.Empty:
+                    break
+                if elemento is None:
+                    fine = True
+                    break
+                elementi.append(elemento)
+            self._invia(elementi)
+            if fine:
+                break
+
+    def _invia(self, elementi):
+        pronti, richieste = [], []
+        for transazione, gas_price, future, tentativo in elementi:
+            if tentativo == 0 and not future.set_running_or_notify_cancel():
+                continue
+            try:
+                parametri = dict(transazione)
+                parametri["gas"] = hex(parametri["gas"])
+                parametri["gasPrice"] = hex(gas_price or self._get_gas_price())
+                parametri["nonce"] = hex(self.nonces.next_nonce(transazione["from"]))
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            pronti.append((transazione, gas_price, future, tentativo))
+            richieste.append(("eth_sendTransaction", [parametri]))
+        if not richieste:
+            return
+
+        try:
+            risposte = batch_request(self.session, self.node_url, richieste, timeout=self.timeout)
+        except Exception as e:
+            risposte = [{"error": str(e)}] * len(richieste)
+
+        da_ripetere = []
+        for (transazione, gas_price, future, tentativo), risposta in zip(pronti, risposte):
+            if "error" not in risposta:
+                # La Future e' gia' in esecuzione: il tracker la risolve con la ricevuta
+                self.receipts.track(risposta["result"], future)
+                continue
+            # Il nonce locale non e' piu' affidabile: viene riletto dal nodo
+            self.nonces.resync(transazione["from"])
+            errore = risposta["error"]
+            messaggio = errore.get("message", str(errore)) if isinstance(errore, dict) else str(errore)
+            if tentativo == 0 and "nonce" in messaggio.lower():
+                da_ripetere.append((transazione, gas_price, future, 1))
+            else:
+                future.set_exception(Web3TransportError(f"Transaction failed: {messaggio}"))
+        if da_ripetere:
+            self._invia(da_ripetere)
+
+    def close(self):
+        """Sends the transactions already queued, then stops the pipeline and the tracker."""
+        self._coda.put(None)
+        self._thread.join()
+        self.receipts.close()
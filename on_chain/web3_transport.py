@@ -0,0 +1,392 @@
+# web3_transport.py - Pure-Python transport to the Hardhat node (web3.py over a keep-alive HTTP pool).
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HARDHAT_NODE_URL = "http://127.0.0.1:8545"
+PROJECT_DIR = Path(__file__).parent
+CONTRACT_ADDRESSES_FILE = PROJECT_DIR / "contract_addresses.json"
+ARTIFACTS_DIR = PROJECT_DIR / "artifacts" / "contracts"
+
+# Numero massimo di chiamate per singola richiesta batch JSON-RPC
+MAX_BATCH_SIZE = 500
+
+
+class Web3TransportError(Exception):
+    """Error raised by the web3 transport (node not reachable, unknown contract or function)."""
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Returns a requests session whose connections to the node stay open between calls.
+    pool_size is the number of keep-alive connections kept per host (one per concurrent caller).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def wait_for_node(node_url: str = HARDHAT_NODE_URL, max_attempts: int = 30, delay: float = 1,
+                  session: Optional[requests.Session] = None) -> bool:
+    """Polls eth_blockNumber on one keep-alive session until the node answers."""
+    session = session or create_session(pool_size=1)
+    for attempt in range(max_attempts):
+        try:
+            response = session.post(
+                node_url,
+                json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
+                timeout=2
+            )
+            if response.status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        if attempt < max_attempts - 1:
+            time.sleep(delay)
+    return False
+
+
+def abi_type(param: Dict[str, Any]) -> str:
+    """Canonical ABI type of an input/output, tuples included (e.g. "(uint256,string)[]")."""
+    tipo = param["type"]
+    if tipo.startswith("tuple"):
+        return "(" + ",".join(abi_type(c) for c in param["components"]) + ")" + tipo[len("tuple"):]
+    return tipo
+
+
+def _find_function_abi(abi: List[Dict[str, Any]], function_name: str, args: List[Any]) -> Dict[str, Any]:
+    """ABI entry of the function with the given name and number of arguments."""
+    for item in abi:
+        if item.get("type") == "function" and item.get("name") == function_name \
+                and len(item.get("inputs", [])) == len(args):
+            return item
+    raise Web3TransportError(f"Function {function_name} with {len(args)} arguments not found in the ABI")
+
+
+def encode_function_call(w3, contract, function_name: str, args) -> tuple:
+    """Returns (function ABI, call data as 0x hex) for a call of the contract function."""
+    args = list(args or [])
+    fn_abi = _find_function_abi(contract.abi, function_name, args)
+    tipi_input = [abi_type(p) for p in fn_abi.get("inputs", [])]
+    firma = f"{function_name}({','.join(tipi_input)})"
+    data = bytes(w3.keccak(text=firma)[:4]) + w3.codec.encode(tipi_input, args)
+    return fn_abi, "0x" + data.hex()
+
+
+def batch_request(session: requests.Session, node_url: str, calls: List[tuple],
+                  timeout: float = 120.0) -> List[Dict[str, Any]]:
+    """
+    Sends many JSON-RPC requests, given as (method, params), as batch requests
+    of at most MAX_BATCH_SIZE calls. Returns the response objects in the same order.
+    """
+    richieste = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                 for i, (method, params) in enumerate(calls)]
+    risposte = {}
+    for inizio in range(0, len(richieste), MAX_BATCH_SIZE):
+        blocco = richieste[inizio:inizio + MAX_BATCH_SIZE]
+        try:
+            response = session.post(node_url, json=blocco, timeout=timeout)
+            response.raise_for_status()
+            corpo = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise Web3TransportError(f"Batch request failed: {e}")
+        # Un nodo che non supporta i batch risponde con un singolo oggetto di errore
+        if not isinstance(corpo, list):
+            raise Web3TransportError(f"Batch request rejected by the node: {corpo.get('error', corpo)}")
+        risposte.update((r.get("id"), r) for r in corpo)
+    return [risposte.get(i) or {"error": "no response"} for i in range(len(richieste))]
+
+
+def batch_eth_call(w3, session: requests.Session, node_url: str, calls: List[tuple],
+                   block: str = "latest", timeout: float = 120.0) -> List[Any]:
+    """
+    Executes many read-only calls as a single JSON-RPC batch of eth_call.
+    calls is a list of (contract, function_name, args), where contract is a web3 contract object.
+    Results are decoded in bulk and returned in the same order; a single output is returned
+    as a value, several outputs as a tuple (as ContractFunction.call() does).
+    """
+    richieste = []
+    tipi_output = []
+    for contract, function_name, args in calls:
+        fn_abi, data = encode_function_call(w3, contract, function_name, args)
+        richieste.append(("eth_call", [{"to": contract.address, "data": data}, block]))
+        tipi_output.append([abi_type(p) for p in fn_abi.get("outputs", [])])
+
+    risposte = batch_request(session, node_url, richieste, timeout=timeout)
+
+    risultati = []
+    for i, (contract, function_name, _) in enumerate(calls):
+        risposta = risposte[i]
+        if "error" in risposta:
+            raise Web3TransportError(f"eth_call {function_name} failed: {risposta['error']}")
+        # "0x" senza errore: nessun contratto a quell'indirizzo (o chiamata revertita senza motivo)
+        if tipi_output[i] and risposta.get("result") in (None, "0x"):
+            raise Web3TransportError(f"eth_call {function_name} on {contract.address} returned no data: "
+                                     f"is the contract deployed at that address?")
+        valori = w3.codec.decode(tipi_output[i], bytes.fromhex(risposta["result"][2:]))
+        # Indirizzi in formato checksum, come li restituisce ContractFunction.call()
+        valori = [w3.to_checksum_address(v) if t == "address" else v for t, v in zip(tipi_output[i], valori)]
+        risultati.append(valori[0] if len(valori) == 1 else tuple(valori))
+    return risultati
+
+
+class Web3Transport:
+    """
+    Talks to the deployed contracts directly from Python, without the Node bridge.
+    Exposes the same functions of ethers_bridge.js (getDefaultAccount, registerUser, getUser,
+    createProduct, getProduct) through call(), so BlockchainInteractor can use either transport.
+    Contract objects are built once from contract_addresses.json and reused.
+    """
+
+    def __init__(self, node_url: str = HARDHAT_NODE_URL,
+                 contract_data_path: Path = CONTRACT_ADDRESSES_FILE,
+                 artifacts_dir: Path = ARTIFACTS_DIR, pool_size: int = 10, timeout: float = 120.0):
+        # web3 viene importato solo se questo transport e' scelto
+        from web3 import Web3
+
+        self.node_url = node_url
+        self.artifacts_dir = Path(artifacts_dir)
+        self.timeout = timeout
+        self.session = create_session(pool_size)
+        self.w3 = Web3(Web3.HTTPProvider(node_url, request_kwargs={"timeout": timeout}, session=self.session))
+
+        with open(contract_data_path, 'r') as f:
+            self.contract_data = json.load(f)
+
+        self._contracts = {}
+        self._contracts_lock = threading.Lock()
+        self._default_account = None
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+
+    def is_connected(self) -> bool:
+        return wait_for_node(self.node_url, max_attempts=1, session=self.session)
+
+    def _load_abi(self, contract_name: str) -> List[Dict[str, Any]]:
+        """
+        The ABI in contract_addresses.json is in the human-readable ethers format,
+        which web3.py cannot parse: in that case the JSON ABI of the Hardhat artifact is used.
+        """
+        abi = self.contract_data["contracts"][contract_name].get("abi") or []
+        if isinstance(abi, str):
+            # interface.format('json') di ethers v6 restituisce l'ABI come stringa JSON
+            try:
+                abi = json.loads(abi)
+            except json.JSONDecodeError:
+                abi = []
+        if abi and all(isinstance(item, dict) for item in abi):
+            return abi
+        artifact_path = self.artifacts_dir / f"{contract_name}.sol" / f"{contract_name}.json"
+        try:
+            with open(artifact_path, 'r') as f:
+                return json.load(f)["abi"]
+        except (OSError, KeyError, json.JSONDecodeError) as e:
+            raise Web3TransportError(f"ABI not available for {contract_name}: {e}")
+
+    def contract(self, contract_name: str):
+        """Returns the cached contract object, building it on first use."""
+        contract = self._contracts.get(contract_name)
+        if contract is not None:
+            return contract
+        with self._contracts_lock:
+            if contract_name not in self._contracts:
+                info = self.contract_data.get("contracts", {}).get(contract_name)
+                if not info:
+                    raise Web3TransportError(f"Contract {contract_name} not found in contract_addresses.json")
+                self._contracts[contract_name] = self.w3.eth.contract(
+                    address=self.w3.to_checksum_address(info["address"]),
+                    abi=self._load_abi(contract_name)
+                )
+            return self._contracts[contract_name]
+
+    def _get_pipeline(self):
+        """Transaction pipeline shared by all the writes, so nonces are tracked in one place."""
+        with self._pipeline_lock:
+            if self._pipeline is None:
+                try:
+                    from on_chain.transaction_pipeline import TransactionPipeline
+                except ImportError:
+                    from transaction_pipeline import TransactionPipeline
+                self._pipeline = TransactionPipeline(self.w3, self.session, self.node_url, timeout=self.timeout)
+            return self._pipeline
+
+    def _submit(self, contract_name: str, function_name: str, args: List[Any]):
+        """Queues a transaction from the default (unlocked) account; returns the Future of its receipt."""
+        return self._get_pipeline().submit(self.contract(contract_name), function_name, args,
+                                           self.getDefaultAccount())
+
+    def _transact(self, contract_name: str, function_name: str, args: List[Any]):
+        """Sends a transaction from the default (unlocked) account and waits for the receipt."""
+        return self._submit(contract_name, function_name, args).result(timeout=self.timeout)
+
+    def call(self, function_name: str, args: Optional[List[Any]] = None) -> Any:
+        """Same contract as EthersBridgeClient.call: function name of the bridge and its arguments."""
+        if function_name.startswith("_") or function_name not in self._FUNCTIONS:
+            raise Web3TransportError(f"Function {function_name} not found")
+        return getattr(self, function_name)(*(args or []))
+
+    def read_batch(self, calls: List[tuple]) -> List[Any]:
+        """
+        Reads many view functions in one round trip.
+        calls is a list of (contract_name, function_name, args).
+        """
+        if not calls:
+            return []
+        return batch_eth_call(
+            self.w3, self.session, self.node_url,
+            [(self.contract(contract_name), function_name, args) for contract_name, function_name, args in calls],
+            timeout=self.timeout
+        )
+
+    def get_company_history(self, address: str) -> Dict[str, List[Any]]:
+        """
+        Full on-chain history of a company: its operations, its products and their quality checks.
+        Three batch round trips, whatever the number of records: the ID lists,
+        then operations, products and check IDs, then the quality checks.
+        """
+        address = self.w3.to_checksum_address(address)
+        id_operazioni, id_prodotti = self.read_batch([
+            ("OperationRegistry", "getUserOperations", [address]),
+            ("ProductRegistry", "getProducerProducts", [address])
+        ])
+        risultati = self.read_batch(
+            [("OperationRegistry", "getOperation", [i]) for i in id_operazioni]
+            + [("ProductRegistry", "getProduct", [i]) for i in id_prodotti]
+            + [("QualityControl", "getProductQualityChecks", [i]) for i in id_prodotti]
+        )
+        operazioni = risultati[:len(id_operazioni)]
+        prodotti = risultati[len(id_operazioni):len(id_operazioni) + len(id_prodotti)]
+        id_controlli = [i for ids in risultati[len(id_operazioni) + len(id_prodotti):] for i in ids]
+        controlli = self.read_batch([("QualityControl", "getQualityCheck", [i]) for i in id_controlli])
+        return {"operations": operazioni, "products": prodotti, "quality_checks": controlli}
+
+    def create_operations(self, operations: List[tuple]) -> List[int]:
+        """
+        Registers many operations on OperationRegistry: all the transactions are sent back to back
+        and the receipts are collected afterwards.
+        operations is a list of (operation_type, description, location, metadata).
+        Returns the ids of the created operations (0 where the event is missing).
+        """
+        from web3.logs import DISCARD
+
+        contract = self.contract("OperationRegistry")
+        futures = [self._submit("OperationRegistry", "createOperation", list(operation)) for operation in operations]
+        ids = []
+        for future in futures:
+            events = contract.events.OperationCreated().process_receipt(
+                future.result(timeout=self.timeout), errors=DISCARD
+            )
+            ids.append(int(events[0]["args"]["operationId"]) if events else 0)
+        return ids
+
+    def anchor_batch(self, root: bytes, count: int) -> tuple:
+        """
+        Anchors a Merkle root on OperationAnchor and returns (batch id, tx hash).
+        A root anchored already (e.g. before a crash) is not sent again: its batch id is returned.
+        """
+        from web3.logs import DISCARD
+
+        contract = self.contract("OperationAnchor")
+        batch_id = contract.functions.batchOfRoot(root).call()
+        if batch_id:
+            return int(batch_id), None
+        receipt = self._transact("OperationAnchor", "anchorBatch", [root, count])
+        if receipt.status != 1:
+            raise Web3TransportError("anchorBatch reverted")
+        events = contract.events.BatchAnchored().process_receipt(receipt, errors=DISCARD)
+        batch_id = int(events[0]["args"]["batchId"]) if events else contract.functions.batchOfRoot(root).call()
+        return int(batch_id), receipt.transactionHash.hex()
+
+    def anchor_location(self) -> tuple:
+        """
+        (OperationAnchor address, genesis block hash): the batch ids are only meaningful on that
+        contract of that chain, and the in-memory Hardhat chain starts again on every node restart.
+        """
+        genesi = self.w3.eth.get_block(0)["hash"]
+        return self.contract("OperationAnchor").address, "0x" + bytes(genesi).hex()
+
+    def anchored_roots(self, batch_ids: List[int]) -> List[bytes]:
+        """Roots of many OperationAnchor batches in one round trip (zero bytes for a missing batch)."""
+        return [bytes(batch[0]) for batch in self.read_batch([("OperationAnchor", "batches", [int(batch_id)])
+                                                              for batch_id in batch_ids])]
+
+    def verify_anchored_operations(self, proofs: List[tuple]) -> List[bool]:
+        """Checks many (batch id, leaf, proof) on-chain with one batch of eth_call."""
+        return self.read_batch([("OperationAnchor", "verifyOperation", [batch_id, leaf, proof])
+                                for batch_id, leaf, proof in proofs])
+
+    def event_indexer(self, **kwargs):
+        """EventIndexer over the events of all the deployed contracts (see event_indexer.EventIndexer)."""
+        try:
+            from on_chain.event_indexer import EventIndexer
+        except ImportError:
+            from event_indexer import EventIndexer
+        contracts = {name: self.contract(name) for name in self.contract_data.get("contracts", {})}
+        return EventIndexer(self.w3, self.session, self.node_url, contracts, **kwargs)
+
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.close()
+        self.session.close()
+
+    # Funzioni equivalenti a quelle di ethers_bridge.js
+
+    def getDefaultAccount(self) -> str:
+        if self._default_account is None:
+            accounts = self.w3.eth.accounts
+            if not accounts:
+                raise Web3TransportError("The node has no unlocked accounts")
+            self._default_account = accounts[0]
+        return self._default_account
+
+    def registerUser(self, name: str, email: str, role: str) -> bool:
+        receipt = self._transact("UserRegistry", "registerUser", [name, email, role])
+        return receipt.status == 1
+
+    def getUser(self, address: str) -> Dict[str, Any]:
+        contract = self.contract("UserRegistry")
+        address = self.w3.to_checksum_address(address)
+        if not contract.functions.isUserRegistered(address).call():
+            return {}
+        user = contract.functions.getUser(address).call()
+        return {
+            "name": user[0],
+            "email": user[1],
+            "role": user[2],
+            "isActive": user[3],
+            "registrationDate": str(user[4])
+        }
+
+    def createProduct(self, name: str, description: str, category: str, unit: str, metadata: str = "") -> int:
+        from web3.logs import DISCARD
+
+        contract = self.contract("ProductRegistry")
+        receipt = self._transact("ProductRegistry", "createProduct", [name, description, category, unit, metadata or ""])
+        # Gli altri eventi della ricevuta vengono ignorati
+        events = contract.events.ProductCreated().process_receipt(receipt, errors=DISCARD)
+        return int(events[0]["args"]["productId"]) if events else 0
+
+    def getProduct(self, product_id: int) -> Dict[str, Any]:
+        contract = self.contract("ProductRegistry")
+        product = contract.functions.getProduct(int(product_id)).call()
+        return {
+            "id": int(product[0]),
+            "name": product[1],
+            "description": product[2],
+            "category": product[3],
+            "unit": product[4],
+            "producer": product[5],
+            "createdAt": str(product[6]),
+            "isActive": product[7],
+            "metadata": product[8]
+        }
+
+    _FUNCTIONS = frozenset({"getDefaultAccount", "registerUser", "getUser", "createProduct", "getProduct"})
@@ -35,48 +35,18 @@ def check_node_modules():
             sys.exit(1)
 
 def start_hardhat_node():
-    """Start the Hardhat node in a separate process."""
+    """Start the Hardhat node through the supervisor; returns the supervisor once the node is ready."""
     try:
-        logger.info("Starting Hardhat node...")
-        # Use shell=True on Windows to avoid console window popup
-        shell_param = True if sys.platform == 'win32' else False
+        from on_chain.hardhat_supervisor import HardhatSupervisor
         
-        # Start the Hardhat node
-        node_process = subprocess.Popen(
-            "npx hardhat node",
-            shell=shell_param,
-            cwd=str(ON_CHAIN_DIR),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        supervisor = HardhatSupervisor(cwd=ON_CHAIN_DIR, logger=logger)
+        # Il nodo Hardhat tiene la catena in memoria: dopo un riavvio i contratti vanno ridistribuiti
+        supervisor.on_restart(deploy_contracts)
+        if supervisor.start():
+            return supervisor
         
-        # Wait for node to be ready
-        logger.info("Waiting for Hardhat node to be ready...")
-        max_attempts = 10
-        for attempt in range(max_attempts):
-            try:
-                # Check if the node is running by making a JSON-RPC request
-                import requests
-                response = requests.post(
-                    "http://127.0.0.1:8545",
-                    json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-                    timeout=2
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Hardhat node is ready (attempt {attempt + 1}/{max_attempts})")
-                    return node_process
-            except requests.exceptions.RequestException:
-                pass
-            
-            logger.info(f"Waiting for Hardhat node... ({attempt + 1}/{max_attempts})")
-            time.sleep(1)
-        
-        # If we get here, the node didn't start properly
-        logger.error("Failed to start Hardhat node after multiple attempts")
-        if node_process:
-            node_process.terminate()
+        logger.error("Failed to start Hardhat node")
+        supervisor.close()
         sys.exit(1)
             
     except Exception as e:
@@ -84,24 +54,22 @@ def start_hardhat_node():
         sys.exit(1)
 
 def deploy_contracts():
-    """Deploy contracts to the Hardhat node."""
+    """Deploy to the Hardhat node the contracts missing or changed since the last deployment."""
     try:
+        from on_chain.deployment_cache import deploy_contracts as deploy_contracts_cached
+
         logger.info("Deploying contracts...")
-        result = subprocess.run(
-            "npx hardhat run scripts/deploy.js --network localhost",
-            shell=True,
-            cwd=str(ON_CHAIN_DIR),
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        result = deploy_contracts_cached()
+        if result is None:
+            logger.info("Contracts already deployed, deployment skipped")
+            return True
+        if result.returncode != 0:
+            logger.error(f"Contract deployment failed: {result.stderr}")
+            return False
         
         logger.info("Contracts deployed successfully")
         logger.info(result.stdout)
         return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Contract deployment failed: {e.stderr}")
-        return False
     except Exception as e:
         logger.error(f"Error deploying contracts: {e}")
         return False
@@ -110,19 +78,18 @@ def start_blockchain():
     """Start the Hardhat node and deploy contracts."""
     try:
         # Start Hardhat node
-        node_process = start_hardhat_node()
+        supervisor = start_hardhat_node()
         
         # Deploy contracts
         if not deploy_contracts():
-            if node_process:
-                node_process.terminate()
+            supervisor.close()
             sys.exit(1)
         
         logger.info("Blockchain and contracts are ready!")
         logger.info("You can now interact with the contracts.")
         
-        # Return the node process so it can be managed by the caller
-        return node_process
+        # Return the supervisor so the caller can stop the node
+        return supervisor
         
     except Exception as e:
         logger.error(f"Error in blockchain startup: {e}")